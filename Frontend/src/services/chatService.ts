@@ -54,21 +54,40 @@ export async function sendMessageStream(
 
   if (!reader) throw new Error("No reader available");
 
+  // Server-Sent Events: events are separated by a blank line and may arrive
+  // split across reads; multi-line payloads come as several "data: " lines
+  let buffer = "";
+
+  const handleEvent = (raw: string) => {
+    let event = "message";
+    const dataLines: string[] = [];
+    for (const line of raw.split("\n")) {
+      if (line.startsWith("event: ")) event = line.slice(7);
+      else if (line.startsWith("data: ")) dataLines.push(line.slice(6));
+      else if (line.startsWith("data:")) dataLines.push(line.slice(5));
+    }
+    if (dataLines.length === 0) return; // comment / heartbeat
+    const data = dataLines.join("\n");
+
+    if (event === "message") {
+      onChunk(data);
+    } else if (event === "done") {
+      onSources?.(JSON.parse(data).sources ?? []);
+    } else if (event === "error") {
+      throw new Error(JSON.parse(data).detail ?? "Streaming failed");
+    }
+  };
+
   while (true) {
     const { done, value } = await reader.read();
     if (done) break;
 
-    const chunk = decoder.decode(value, { stream: true });
-    const lines = chunk.split('\n');
-
-    for (const line of lines) {
-      if (!line.trim()) continue;
-      
-      // Handle Server-Sent Events format (data: ...)
-      if (line.startsWith('data: ')) {
-        const data = line.slice(6); // Remove "data: " prefix
-        onChunk(data);
-      }
+    buffer += decoder.decode(value, { stream: true }).replace(/\r\n/g, "\n");
+    let boundary = buffer.indexOf("\n\n");
+    while (boundary !== -1) {
+      handleEvent(buffer.slice(0, boundary));
+      buffer = buffer.slice(boundary + 2);
+      boundary = buffer.indexOf("\n\n");
     }
   }
 }
@@ -1,5 +1,9 @@
 from fastapi import APIRouter, Depends
 from backend.auth.dependencies import get_current_user
+from backend.granite.model_router import routing_stats
+from backend.granite.usage import usage_stats
+from backend.rag.faq_index import get_faq_stats
+from backend.services.chat_log_sink import chat_log_sink
 
 router = APIRouter()
 
@@ -7,3 +11,21 @@ router = APIRouter()
 @router.get("/admin/health")
 def admin_health(user=Depends(get_current_user)):
     return {"status": "admin ok"}
+
+
+@router.get("/admin/faq/stats")
+def faq_stats(user=Depends(get_current_user)):
+    """FAQ fast-path size and hit rate since startup"""
+    return get_faq_stats()
+
+
+@router.get("/admin/chat-logs/stats")
+def chat_log_stats(user=Depends(get_current_user)):
+    """Chat log buffer depth, write and drop counters"""
+    return chat_log_sink.stats()
+
+
+@router.get("/admin/llm/usage")
+def llm_usage(user=Depends(get_current_user)):
+    """LLM token usage per endpoint and model, and the model cascade's routing decisions"""
+    return {**usage_stats.stats(), "routes": routing_stats()}
@@ -1,85 +1,139 @@
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from backend.rag.retriever import retrieve_context
-from backend.granite.granite_client import GraniteClient
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from typing import Callable, List
+from backend.config import settings
+from backend.rag.retriever import retrieve_context_batch
+from backend.rag.faq_index import lookup_faq
+from backend.rag.extractive import DEGRADED_ANSWERS, extractive_answer, lexical_index
+from backend.rag.feedback_loop import normalize_question
+from backend.rag.rag_pipeline import NO_CONTEXT_ANSWER
+from backend.services.admission import AdmissionRejected, admit_batch, llm_slot
+from backend.services.intent_router import route_question
+from backend.services.chat_log_sink import log_chat
+from backend.granite.circuit_breaker import failure_reason, is_upstream_failure
+from backend.granite.model_router import route_model
+from backend.granite.prompts import build_prompt
+from backend.granite.providers import get_llm
+import asyncio
+import json
 import logging
+import time
 
 # Configure logger
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
-try:
-    granite = GraniteClient()
-except Exception as e:
-    logger.error(f"Failed to initialize GraniteClient: {e}")
-    granite = None
-
-class ChatRequest(BaseModel):
-    question: str
-
-@router.post("/chat")
-def chat(req: ChatRequest):
-    # FAST PATH: Check for basic greetings
-    query_lower = req.question.lower().strip().rstrip("?!.")
-    greetings = ["hi", "hello", "hey", "greetings", "good morning", "good afternoon", "good evening"]
-    basic_queries = ["can you help me", "what you do", "how you can help me", "who are you", "what is this"]
-    
-    fast_response = None
-    if query_lower in greetings:
-        fast_response = "Hello! I am the Vishwakarma University Admission Assistant. How can I help you today?"
-    elif query_lower in basic_queries:
-        fast_response = "I am an AI assistant here to help you with information about Vishwakarma University admissions, programs, fees, and campus life. Feel free to ask me anything!"
-
-    if fast_response:
-        return {
-            "answer": fast_response,
-            "sources": []
-        }
-
-    if not granite:
-        raise HTTPException(status_code=503, detail="Granite service unavailable")
 
+
+class BatchChatRequest(BaseModel):
+    questions: List[str]
+    k: int = Field(5, ge=1, le=20)
+
+
+def _fast_responses(questions: List[str]) -> list:
+    """Routed intents and lexical FAQ matches, answered without retrieval"""
+    return [route_question(q) or lookup_faq(q) for q in questions]
+
+
+def _retrieve_batch(questions: List[str], k: int) -> List[dict]:
+    """retrieve_context_batch, or a lexical search per question if that fails (the embeddings come from watsonx)"""
     try:
-        result = retrieve_context(req.question)
+        return retrieve_context_batch(questions, k)
+    except Exception as e:
+        logger.error(f"Error retrieving batch context, using the lexical index: {e}")
+        return [lexical_index.search(q, k) for q in questions]
+
+
+@router.post("/chat/batch")
+async def chat_batch(req: BatchChatRequest, charge: Callable[[], None] = Depends(admit_batch)):
+    """
+    Answer many questions in one request.
+    Retrieval is batched (one embedding call, one FAISS matrix search),
+    generations run concurrently under BATCH_MAX_CONCURRENCY, and results
+    are streamed back as NDJSON in completion order, each tagged with the
+    index of its question. Questions that differ only in case and spacing
+    share one generation. Each generation costs the client one rate-limit
+    token and takes a slot in the shared LLM queue, waiting at most
+    LLM_QUEUE_TIMEOUT for it; questions over the limit or that can't get a
+    slot come back as errors with retry_after.
+    """
+    if not req.questions:
+        raise HTTPException(status_code=400, detail="No questions provided")
+    if len(req.questions) > settings.BATCH_MAX_QUESTIONS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {settings.BATCH_MAX_QUESTIONS} questions per batch"
+        )
+    fast_responses = await run_in_threadpool(_fast_responses, req.questions)
+
+    # Indices of the remaining questions, by normalized question
+    pending = {}
+    for i, (question, fast) in enumerate(zip(req.questions, fast_responses)):
+        if fast is None:
+            pending.setdefault(normalize_question(question), []).append(i)
+    distinct = [req.questions[indices[0]] for indices in pending.values()]
+    retrieved = await run_in_threadpool(_retrieve_batch, distinct, req.k)
+
+    semaphore = asyncio.Semaphore(settings.BATCH_MAX_CONCURRENCY)
+
+    async def answer_one(key: str, question: str, result: dict):
+        """The answer fields shared by every question normalizing to `key`"""
         context = result.get("context", "")
         sources = result.get("sources", [])
-    except Exception as e:
-        logger.error(f"Error retrieving context: {e}")
-        context = ""
-        sources = []
+        if not context.strip():
+            return key, {"answer": NO_CONTEXT_ANSWER, "sources": sources}
 
-    prompt = f"""You are a helpful and professional admission assistant for Vishwakarma University.
-Your task is to answer the user's question based ONLY on the provided context.
-Answer directly and concisely. Do not make up new questions or answers.
-If the answer is not in the context, politely state that you don't have that information.
+        prompt = build_prompt(context, question)
+        try:
+            charge()
+            # Each question gets its own queue deadline, from when it starts waiting for a slot
+            async with semaphore, llm_slot(time.monotonic() + settings.LLM_QUEUE_TIMEOUT):
+                answer = await run_in_threadpool(get_llm().generate, prompt, route_model(question))
+        except AdmissionRejected as e:
+            return key, {"error": "Too many requests", "retry_after": round(e.retry_after, 1)}
+        except Exception as e:
+            logger.error(f"Error generating batch response: {e}")
+            extracted = extractive_answer(question, context) if is_upstream_failure(e) else None
+            if extracted is None:
+                return key, {"error": "Failed to generate response"}
+            # The LLM is unavailable: answer from the retrieved chunks instead
+            DEGRADED_ANSWERS.inc(reason=failure_reason(e))
+            return key, {"answer": extracted, "sources": sources, "degraded": True}
 
----
-Context:
-{context}
----
+        return key, {"answer": answer, "sources": sources}
 
-User Question: {req.question}
+    started = time.perf_counter()
 
-Assistant Answer:"""
+    def line(index: int, fields: dict) -> str:
+        item = {"index": index, "question": req.questions[index], **fields}
+        if "answer" in item:
+            log_chat(
+                item["question"], item["answer"], (time.perf_counter() - started) * 1000,
+                item.get("sources"), endpoint="/api/chat/batch"
+            )
+        return json.dumps(item) + "\n"
 
-    try:
-        # Use simple generation instead of streaming to restore stability
-        # We need to ensure GraniteClient supports non-streaming generation via generate_chat_response
-        # or we consume the stream here and join it.
-        # Assuming generate_chat_response still exists and works.
-        answer = granite.generate_chat_response(prompt)
-        
-        # Clean up artifacts if any
-        for stop_seq in ["User Question:", "Question:", "\nUser:", "\nQuestion:"]:
-            if stop_seq in answer:
-                answer = answer.split(stop_seq)[0]
-        answer = answer.strip()
-        
-    except Exception as e:
-        logger.error(f"Error generating response: {e}")
-        raise HTTPException(status_code=500, detail="Failed to generate response")
+    async def ndjson_generator():
+        tasks = [
+            asyncio.create_task(answer_one(key, question, result))
+            for key, question, result in zip(pending, distinct, retrieved)
+        ]
+        try:
+            for i, fast in enumerate(fast_responses):
+                if fast:
+                    yield line(i, fast)
+            for next_done in asyncio.as_completed(tasks):
+                key, fields = await next_done
+                for i in pending[key]:
+                    yield line(i, fields)
+        finally:
+            for task in tasks:
+                task.cancel()
 
-    return {
-        "answer": answer,
-        "sources": sources
-    }
+    return StreamingResponse(
+        ndjson_generator(),
+        media_type="application/x-ndjson",
+        headers={"X-Accel-Buffering": "no"}
+    )
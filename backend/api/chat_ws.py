@@ -0,0 +1,163 @@
+"""
+WebSocket chat: several concurrent answer streams over one connection.
+
+Messages are JSON objects tagged with a client-chosen request id.
+
+    client -> server
+        {"type": "ask", "id": "r1", "question": "...", "session_id": "..."}   session_id optional
+        {"type": "cancel", "id": "r1"}
+
+    server -> client
+        {"type": "token", "id": "r1", "seq": 1, "data": "..."}
+        {"type": "done", "id": "r1", "sources": [...], "session_id": "...", "degraded": false, "timings": {...}}
+        {"type": "cancelled", "id": "r1"}
+        {"type": "error", "id": "r1", "detail": "...", "retry_after": 3}    retry_after only when rate-limited
+
+Asks without a session_id share one conversation per connection. Outgoing
+messages go through a bounded queue drained by a single writer, so a client
+that reads slowly fills the queue and the streams feeding it stop pulling
+tokens from the pipeline until it catches up. Each ask goes through the
+same admission control as the HTTP endpoints (rate limit per client IP, then
+a slot in the LLM queue).
+"""
+import asyncio
+import json
+import logging
+import math
+import time
+from typing import Dict, Optional
+
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+
+from backend.config import settings
+from backend.rag.rag_pipeline import stream_answer_question
+from backend.services.admission import LANE_ANONYMOUS, AdmissionRejected, check_rate, enter
+from backend.services.chat_log_sink import log_chat
+from backend.services.session_store import Session, session_store
+from backend.utils.metrics import registry, request_timings, track_timings
+from backend.utils.sse import coalesce
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+WS_CONNECTIONS = registry.gauge("chat_ws_connections", "Open WebSocket chat connections")
+WS_STREAMS = registry.gauge("chat_ws_streams_in_flight", "Answer streams running over WebSocket connections")
+
+
+async def _writer(websocket: WebSocket, outbox: asyncio.Queue):
+    while True:
+        message = await outbox.get()
+        await websocket.send_text(json.dumps(message))
+
+
+async def _stream(request_id: str, question: str, session: Session, outbox: asyncio.Queue):
+    """Run one question through the streaming pipeline and queue its messages"""
+    track_timings("/api/chat/ws")
+    enter(LANE_ANONYMOUS)
+    started = time.perf_counter()
+    meta: Dict = {}
+    chunks = []
+    seq = 0
+    with WS_STREAMS.track_inprogress():
+        try:
+            async for text in coalesce(stream_answer_question(question, session, meta)):
+                chunks.append(text)
+                seq += 1
+                # Blocks while the outbox is full: backpressure from a slow reader
+                await outbox.put({"type": "token", "id": request_id, "seq": seq, "data": text})
+            timings = request_timings()
+            timings["total"] = round((time.perf_counter() - started) * 1000, 1)
+            await outbox.put({
+                "type": "done", "id": request_id, "sources": meta.get("sources", []),
+                "session_id": session.id, "degraded": meta.get("degraded", False), "timings": timings,
+            })
+        except asyncio.CancelledError:
+            raise
+        except AdmissionRejected as e:
+            await outbox.put({
+                "type": "error", "id": request_id, "detail": "Too many requests, please retry shortly",
+                "retry_after": max(1, math.ceil(e.retry_after)),
+            })
+        except Exception as e:
+            logger.error(f"WebSocket stream {request_id} failed: {e}")
+            await outbox.put({"type": "error", "id": request_id, "detail": "Failed to generate response"})
+        finally:
+            log_chat(
+                question, "".join(chunks), (time.perf_counter() - started) * 1000,
+                meta.get("sources"), endpoint="/api/chat/ws"
+            )
+
+
+@router.websocket("/chat/ws")
+async def chat_ws(websocket: WebSocket):
+    await websocket.accept()
+    outbox: asyncio.Queue = asyncio.Queue(maxsize=settings.WS_SEND_QUEUE_SIZE)
+    writer = asyncio.create_task(_writer(websocket, outbox))
+    streams: Dict[str, asyncio.Task] = {}
+    connection_session: Optional[Session] = None
+
+    async def reject(request_id, detail: str, **extra):
+        await outbox.put({"type": "error", "id": request_id, "detail": detail, **extra})
+
+    WS_CONNECTIONS.inc()
+    try:
+        while True:
+            try:
+                message = json.loads(await websocket.receive_text())
+            except json.JSONDecodeError:
+                await reject(None, "Messages must be JSON")
+                continue
+            if not isinstance(message, dict):
+                await reject(None, "Messages must be JSON objects")
+                continue
+
+            kind, request_id = message.get("type"), message.get("id")
+            if request_id is None:
+                await reject(None, "Missing request id")
+                continue
+
+            if kind == "cancel":
+                task = streams.pop(request_id, None)
+                if task is not None:
+                    task.cancel()
+                    await outbox.put({"type": "cancelled", "id": request_id})
+                continue
+
+            if kind != "ask":
+                await reject(request_id, f"Unknown message type: {kind}")
+                continue
+            question = message.get("question")
+            if not isinstance(question, str) or not question.strip():
+                await reject(request_id, "Missing question")
+                continue
+            if request_id in streams:
+                await reject(request_id, "A stream with this id is already running")
+                continue
+            if len(streams) >= settings.WS_MAX_STREAMS:
+                await reject(request_id, f"At most {settings.WS_MAX_STREAMS} concurrent streams per connection")
+                continue
+            try:
+                check_rate(f"ip:{websocket.client.host if websocket.client else 'unknown'}", LANE_ANONYMOUS)
+            except AdmissionRejected as e:
+                await reject(request_id, "Too many requests, please retry shortly", retry_after=max(1, math.ceil(e.retry_after)))
+                continue
+
+            if message.get("session_id"):
+                session = session_store.get_or_create(message["session_id"])
+            else:
+                if connection_session is None:
+                    connection_session = session_store.get_or_create()
+                session = session_store.get_or_create(connection_session.id)
+                connection_session = session
+
+            task = asyncio.create_task(_stream(request_id, question, session, outbox))
+            streams[request_id] = task
+            task.add_done_callback(lambda t, rid=request_id: streams.pop(rid, None) if streams.get(rid) is t else None)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        WS_CONNECTIONS.dec()
+        for task in streams.values():
+            task.cancel()
+        writer.cancel()
@@ -1,16 +1,14 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 from pydantic import BaseModel
 from datetime import datetime
-import json
-from pathlib import Path
+from typing import Optional
+from backend.auth.dependencies import get_current_user
+from backend.services.feedback_store import feedback_store
+from backend.rag.feedback_loop import apply_feedback, get_feedback_loop
+from backend.rag.rag_pipeline import answer_cache
 
 router = APIRouter()
 
-# Create feedback directory and file
-FEEDBACK_DIR = Path("data/feedback")
-FEEDBACK_DIR.mkdir(parents=True, exist_ok=True)
-FEEDBACK_FILE = FEEDBACK_DIR / "feedback.jsonl"
-
 
 class FeedbackRequest(BaseModel):
     messageId: str
@@ -31,11 +29,40 @@ def submit_feedback(req: FeedbackRequest):
         "timestamp": datetime.utcnow().isoformat()
     }
     
-    # Append to JSONL file (one JSON object per line)
+    # Credit the vote to the retrieved chunks, drop a disliked answer from the
+    # cache, then buffer it for the group-committed JSONL store
     try:
-        with open(FEEDBACK_FILE, "a") as f:
-            f.write(json.dumps(feedback_data) + "\n")
-        
+        apply_feedback(feedback_data)
+        if req.feedbackType == "dislike":
+            answer_cache.evict(req.question)
+        feedback_store.submit(feedback_data)
         return {"status": "success", "message": "Feedback recorded"}
     except Exception as e:
         return {"status": "error", "message": str(e)}
+
+
+@router.get("/feedback")
+def list_feedback(
+    message_id: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: int = 100,
+    user=Depends(get_current_user)
+):
+    """Look up feedback by message ID and/or date range via the store index"""
+    return feedback_store.query(message_id=message_id, start=start, end=end, limit=limit)
+
+
+@router.get("/feedback/stats")
+def feedback_stats(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    user=Depends(get_current_user)
+):
+    """Like/dislike counts in a date range, without reading the feedback files"""
+    return {
+        "counts": feedback_store.counts(start=start, end=end),
+        **feedback_store.stats(),
+        "feedback_loop": get_feedback_loop().stats(),
+        "answer_cache": answer_cache.stats(),
+    }
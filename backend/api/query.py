@@ -1,41 +1,101 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, Request
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from backend.rag.rag_pipeline import answer_question, stream_answer_question
+from typing import Optional
+from backend.rag.rag_pipeline import answer_question_async, stream_answer_question
+from backend.services.admission import AdmissionRejected, admit, rejection_response
+from backend.services.chat_log_sink import log_chat
+from backend.services.session_store import session_store
+from backend.utils.metrics import request_timings
+from backend.utils.sse import close_on_disconnect, prime, sse_stream
+import time
 
 router = APIRouter()
 
 
 class ChatRequest(BaseModel):
     question: str
+    # Omit to start a new conversation; the id to continue it is returned with the answer
+    session_id: Optional[str] = None
 
 
 class ChatResponse(BaseModel):
     answer: str
+    session_id: Optional[str] = None
+    # True when watsonx was unavailable and the answer was extracted from documents instead
+    degraded: bool = False
 
 
-@router.post("/chat", response_model=ChatResponse)
-def chat(req: ChatRequest):
-    """Traditional blocking endpoint for backward compatibility"""
-    answer = answer_question(req.question)
-    return {"answer": answer}
+@router.post("/chat", response_model=ChatResponse, dependencies=[Depends(admit)])
+async def chat(req: ChatRequest):
+    """
+    Traditional blocking endpoint for backward compatibility
+    Answers 429 with Retry-After when admission control turns the request away
+    """
+    started = time.perf_counter()
+    session = session_store.get_or_create(req.session_id)
+    meta = {}
+    answer = await answer_question_async(req.question, session, meta)
+    log_chat(
+        req.question, answer, (time.perf_counter() - started) * 1000, meta.get("sources"), endpoint="/api/chat"
+    )
+    return {"answer": answer, "session_id": session.id, "degraded": meta.get("degraded", False)}
 
 
-@router.post("/chat/stream")
-async def chat_stream(req: ChatRequest):
+@router.post("/chat/stream", dependencies=[Depends(admit)])
+async def chat_stream(req: ChatRequest, request: Request):
     """
     Streaming endpoint - responds like ChatGPT
-    Sends response tokens in real-time
+    Sends response tokens in real-time as SSE "message" events, coalesced
+    into frames, then a "done" event with the sources, session id and
+    per-stage timings (and "degraded": true if the answer was extracted from
+    documents because watsonx was unavailable). The session id is also in
+    the X-Session-Id header.
+    If the client disconnects, generation upstream is cancelled.
+    Requests turned away by admission control get 429 with Retry-After
+    instead of a stream.
     """
+    session = session_store.get_or_create(req.session_id)
+    started = time.perf_counter()
+    meta = {}
+
     async def response_generator():
-        async for chunk in stream_answer_question(req.question):
-            yield f"data: {chunk}\n\n"
+        chunks = []
+        rejected = False
+        try:
+            async for chunk in stream_answer_question(req.question, session, meta):
+                chunks.append(chunk)
+                yield chunk
+        except AdmissionRejected:
+            rejected = True
+            raise
+        finally:
+            if not rejected:
+                log_chat(
+                    req.question, "".join(chunks), (time.perf_counter() - started) * 1000,
+                    meta.get("sources"), endpoint="/api/chat/stream"
+                )
     
+    def done():
+        timings = request_timings()
+        timings["total"] = round((time.perf_counter() - started) * 1000, 1)
+        return {
+            "sources": meta.get("sources", []), "session_id": session.id,
+            "degraded": meta.get("degraded", False), "timings": timings,
+        }
+
+    # Wait for the first chunk (and so an LLM slot, if one is needed) before committing to a 200
+    try:
+        chunks = await prime(response_generator(), raise_now=(AdmissionRejected,))
+    except AdmissionRejected as e:
+        return rejection_response(e)
+
     return StreamingResponse(
-        response_generator(),
+        close_on_disconnect(request, sse_stream(chunks, on_done=done)),
         media_type="text/event-stream",
         headers={
             "Cache-Control": "no-cache",
-            "X-Accel-Buffering": "no"
+            "X-Accel-Buffering": "no",
+            "X-Session-Id": session.id,
         }
     )
@@ -0,0 +1,27 @@
+from fastapi import APIRouter
+from pydantic import BaseModel, Field
+from typing import Literal, Optional
+from backend.services.course_recommender import get_recommender
+
+router = APIRouter()
+
+
+class RecommendRequest(BaseModel):
+    interests: str
+    budget: Optional[float] = Field(None, gt=0)  # maximum annual fee in rupees
+    max_duration: Optional[float] = Field(None, gt=0)  # years
+    level: Optional[Literal["undergraduate", "postgraduate", "doctoral"]] = None
+    top_k: int = Field(3, ge=1, le=20)
+
+
+@router.post("/recommend")
+def recommend(req: RecommendRequest):
+    """Rank programs against a student profile, with the reasons for each match"""
+    recommendations = get_recommender().recommend(
+        req.interests,
+        budget=req.budget,
+        max_duration=req.max_duration,
+        level=req.level,
+        top_k=req.top_k,
+    )
+    return {"recommendations": recommendations}
@@ -1,10 +1,21 @@
 from passlib.context import CryptContext
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
 from jose import jwt
 from backend.config import settings
+from typing import Optional
+import asyncio
+import threading
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt is deliberately CPU-heavy (~100+ ms per call). It runs in a small
+# process pool so a burst of logins neither holds the GIL nor ties up the
+# threadpool that sync chat endpoints run on.
+_hash_pool: Optional[ProcessPoolExecutor] = None
+_hash_pool_lock = threading.Lock()
+_hash_slots: Optional[asyncio.Semaphore] = None
+
 
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
@@ -25,3 +36,37 @@ def create_access_token(data: dict):
         settings.JWT_SECRET,
         algorithm=settings.JWT_ALGORITHM
     )
+
+
+def _get_hash_pool() -> ProcessPoolExecutor:
+    global _hash_pool
+    if _hash_pool is None:
+        with _hash_pool_lock:
+            if _hash_pool is None:
+                _hash_pool = ProcessPoolExecutor(max_workers=settings.AUTH_HASH_WORKERS)
+    return _hash_pool
+
+
+async def _run_hash(func, *args):
+    """Run a bcrypt call in the process pool, with at most AUTH_HASH_MAX_PENDING in flight"""
+    global _hash_slots
+    if _hash_slots is None:
+        _hash_slots = asyncio.Semaphore(settings.AUTH_HASH_MAX_PENDING)
+    async with _hash_slots:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_hash_pool(), func, *args)
+
+
+async def hash_password_async(password: str) -> str:
+    return await _run_hash(hash_password, password)
+
+
+async def verify_password_async(password: str, hashed: str) -> bool:
+    return await _run_hash(verify_password, password, hashed)
+
+
+def shutdown_hash_pool():
+    global _hash_pool
+    if _hash_pool is not None:
+        _hash_pool.shutdown(wait=False, cancel_futures=True)
+        _hash_pool = None
@@ -1,31 +1,53 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
-from sqlalchemy.orm import Session
-from backend.database import get_db
+from backend.database import SessionLocal
 from backend.auth.models import User
+from backend.auth.principal_cache import Principal, principal_cache
 from backend.config import settings
+from typing import Optional
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login", auto_error=False)
 
 
-def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-):
+def get_current_user(token: str = Depends(oauth2_scheme)) -> Principal:
     try:
         payload = jwt.decode(
             token,
             settings.JWT_SECRET,
             algorithms=[settings.JWT_ALGORITHM]
         )
-        user_id: int = payload.get("sub")
-        if user_id is None:
+        subject = payload.get("sub")
+        if subject is None:
             raise HTTPException(status_code=401)
-    except JWTError:
+        user_id = int(subject)  # JWT subjects are strings
+    except (JWTError, ValueError):
         raise HTTPException(status_code=401)
 
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=401)
-    return user
+    # Signature and expiry are checked above on every call; only the user row is cached
+    principal = principal_cache.get(token)
+    if principal is not None:
+        return principal
+
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.id == user_id).first()
+        if not user:
+            raise HTTPException(status_code=401)
+        principal = Principal.from_user(user)
+    finally:
+        db.close()
+
+    principal_cache.put(token, principal, payload.get("exp"))
+    return principal
+
+
+def get_optional_user(token: Optional[str] = Depends(optional_oauth2_scheme)) -> Optional[Principal]:
+    """The signed-in user for endpoints that also serve anonymous clients; bad tokens count as anonymous"""
+    if not token:
+        return None
+    try:
+        return get_current_user(token)
+    except HTTPException:
+        return None
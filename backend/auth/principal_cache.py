@@ -0,0 +1,111 @@
+"""
+Short-lived cache of authenticated principals.
+
+get_current_user decodes the JWT on every request but only loads the user
+row on a cache miss. Entries expire after AUTH_PRINCIPAL_TTL seconds (or
+when the token does, if sooner) and are dropped as soon as the user's
+username, email or role is changed or the user is deleted through the ORM.
+"""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Set, Tuple
+
+from sqlalchemy import event, inspect
+
+from backend.auth.models import User
+from backend.config import settings
+from backend.utils.metrics import register_cache
+
+# Columns a principal is built from; changes to other columns (e.g. last_login) keep the cache
+PRINCIPAL_FIELDS = ("username", "email", "role")
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Detached, read-only view of the authenticated user"""
+    id: int
+    username: str
+    email: str
+    role: str
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(id=user.id, username=user.username, email=user.email, role=user.role)
+
+
+class PrincipalCache:
+    def __init__(self, ttl: float = settings.AUTH_PRINCIPAL_TTL, maxsize: int = settings.AUTH_PRINCIPAL_CACHE_SIZE):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[str, Tuple[float, Principal]]" = OrderedDict()
+        self._tokens_by_user: Dict[int, Set[str]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token: str) -> Optional[Principal]:
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    self._discard(token)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, token: str, principal: Principal, token_expires_at: Optional[float] = None):
+        """Cache a principal; token_expires_at is the JWT 'exp' as a Unix timestamp"""
+        ttl = self.ttl
+        if token_expires_at is not None:
+            ttl = min(ttl, token_expires_at - time.time())
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._discard(token)
+            self._entries[token] = (time.monotonic() + ttl, principal)
+            self._tokens_by_user.setdefault(principal.id, set()).add(token)
+            while len(self._entries) > self.maxsize:
+                self._discard(next(iter(self._entries)))
+
+    def _discard(self, token: str):
+        entry = self._entries.pop(token, None)
+        if entry is None:
+            return
+        tokens = self._tokens_by_user.get(entry[1].id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_user[entry[1].id]
+
+    def invalidate_user(self, user_id: int):
+        with self._lock:
+            for token in list(self._tokens_by_user.get(user_id, ())):
+                self._discard(token)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tokens_by_user.clear()
+
+    def stats(self) -> Dict:
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+principal_cache = PrincipalCache()
+register_cache("principal", lambda: (principal_cache.hits, principal_cache.misses))
+
+
+@event.listens_for(User, "after_update")
+def _invalidate_on_update(mapper, connection, target):
+    state = inspect(target)
+    if any(state.attrs[field].history.has_changes() for field in PRINCIPAL_FIELDS):
+        principal_cache.invalidate_user(target.id)
+
+
+@event.listens_for(User, "after_delete")
+def _invalidate_on_delete(mapper, connection, target):
+    principal_cache.invalidate_user(target.id)
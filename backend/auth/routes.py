@@ -1,55 +1,121 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from datetime import datetime
-from backend.database import get_db
+from backend.database import get_db, SessionLocal
 from backend.auth.models import User
-from backend.auth.schemas import UserCreate, UserLogin, UserOut
+from backend.auth.schemas import UserCreate, UserLogin, UserOut, UserPage
 from backend.auth.auth_utils import (
-    hash_password,
-    verify_password,
+    hash_password_async,
+    verify_password_async,
     create_access_token
 )
 from backend.auth.dependencies import get_current_user
+from backend.auth.principal_cache import Principal
 
 router = APIRouter()
 
 
+def _find_by_email(db: Session, email: str):
+    return db.query(User).filter(User.email == email).first()
+
+
+def _save(db: Session, user: User = None):
+    if user is not None:
+        db.add(user)
+    db.commit()
+    if user is not None:
+        db.refresh(user)
+
+
+# Both handlers are async so that waiting on bcrypt in the process pool does
+# not occupy a threadpool thread; the short DB calls run in the threadpool.
 @router.post("/register", response_model=UserOut)
-def register(user: UserCreate, db: Session = Depends(get_db)):
-    if db.query(User).filter(User.email == user.email).first():
+async def register(user: UserCreate, db: Session = Depends(get_db)):
+    if await run_in_threadpool(_find_by_email, db, user.email):
         raise HTTPException(400, "Email already registered")
 
     new_user = User(
         username=user.username,
         email=user.email,
-        hashed_password=hash_password(user.password)
+        hashed_password=await hash_password_async(user.password)
     )
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await run_in_threadpool(_save, db, new_user)
     return new_user
 
 
 @router.post("/login")
-def login(user: UserLogin, db: Session = Depends(get_db)):
-    db_user = db.query(User).filter(User.email == user.email).first()
-    if not db_user or not verify_password(
+async def login(user: UserLogin, db: Session = Depends(get_db)):
+    db_user = await run_in_threadpool(_find_by_email, db, user.email)
+    if not db_user or not await verify_password_async(
         user.password, db_user.hashed_password
     ):
         raise HTTPException(401, "Invalid credentials")
 
     db_user.last_login = datetime.utcnow()
-    db.commit()
+    await run_in_threadpool(_save, db)
 
-    token = create_access_token({"sub": db_user.id})
+    token = create_access_token({"sub": str(db_user.id)})
     return {"access_token": token, "token_type": "bearer"}
 
 
-@router.get("/users", response_model=list[UserOut])
+# Only the UserOut columns are selected, so rows come back as plain tuples
+# instead of full ORM objects (no password hashes, no identity map)
+USER_COLUMNS = (User.id, User.username, User.email, User.role)
+EXPORT_BATCH_SIZE = 1000
+
+
+def _user_page(db: Session, after_id: int, limit: int):
+    """Keyset page: the next `limit` users with id > after_id, in id order"""
+    return (
+        db.query(*USER_COLUMNS)
+        .filter(User.id > after_id)
+        .order_by(User.id)
+        .limit(limit)
+        .all()
+    )
+
+
+def _export_users():
+    """Yield every user as one NDJSON line, one short-lived session per batch"""
+    after_id = 0
+    while True:
+        db = SessionLocal()
+        try:
+            rows = _user_page(db, after_id, EXPORT_BATCH_SIZE)
+        finally:
+            db.close()
+        if not rows:
+            return
+        yield "".join(UserOut.model_validate(row._mapping).model_dump_json() + "\n" for row in rows)
+        after_id = rows[-1].id
+
+
+@router.get("/users", response_model=UserPage)
 def list_users(
-    current_user: User = Depends(get_current_user),
+    after_id: int = Query(0, ge=0, description="Return users with an id greater than this"),
+    limit: int = Query(100, ge=1, le=1000),
+    export_format: str = Query("json", alias="format", pattern="^(json|ndjson)$"),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
+    """
+    Paginated user listing. Pass next_after_id back as after_id for the
+    next page. format=ndjson streams every user as newline-delimited JSON.
+    """
     if current_user.role != "admin":
         raise HTTPException(403, "Admins only")
-    return db.query(User).all()
+
+    if export_format == "ndjson":
+        return StreamingResponse(
+            _export_users(),
+            media_type="application/x-ndjson",
+            headers={"Content-Disposition": "attachment; filename=users.ndjson"}
+        )
+
+    rows = _user_page(db, after_id, limit)
+    return {
+        "items": [row._mapping for row in rows],
+        "next_after_id": rows[-1].id if len(rows) == limit else None,
+    }
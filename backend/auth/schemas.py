@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr
-from typing import Optional
+from typing import List, Optional
 
 
 class UserCreate(BaseModel):
@@ -22,3 +22,8 @@ class UserOut(BaseModel):
     class Config:
         from_attributes = True
 
+
+
+class UserPage(BaseModel):
+    items: List[UserOut]
+    next_after_id: Optional[int] = None
@@ -0,0 +1,289 @@
+"""
+Offline retrieval evaluation: quality and speed across parameter grids.
+
+Runs retrieve_context over a labeled question -> relevant-source set
+(backend/benchmarks/retrieval_eval.jsonl by default) for every combination
+of chunk size, overlap, index type and k, and reports recall@k, MRR, nDCG@k
+and per-query latency. Question and chunk embeddings are cached on disk, so
+only the first run for a given chunking calls the embedding API.
+
+    python -m backend.benchmarks.eval_retrieval
+    python -m backend.benchmarks.eval_retrieval --chunk-sizes 50,100,500 --index-types flat_l2,hnsw --ks 1,3,5
+    python -m backend.benchmarks.eval_retrieval --offline --output eval.json
+
+"current" in the chunking column is the FAISS index shipped in
+backend/data/VectorStore, as served today.
+"""
+import argparse
+import hashlib
+import json
+import math
+import pickle
+import statistics
+import time
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+import faiss
+import numpy as np
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+
+from backend.config import settings
+from backend.granite.granite_client import granite_embeddings
+from backend.rag import feedback_loop, retriever
+from backend.rag.chunking import chunk_text
+
+BENCHMARKS_DIR = Path(__file__).resolve().parent
+DATA_DIR = BENCHMARKS_DIR.parent / "data"
+VECTOR_STORE_DIR = DATA_DIR / "VectorStore"
+DEFAULT_DATASET = BENCHMARKS_DIR / "retrieval_eval.jsonl"
+DEFAULT_CACHE = BENCHMARKS_DIR / "cache" / "embeddings.pkl"
+
+INDEX_TYPES = ("flat_l2", "flat_ip", "hnsw", "ivf")
+
+
+# ===============================
+# Embedding cache
+# ===============================
+class EmbeddingCache:
+    """Text -> embedding vectors persisted between runs, keyed by model and text"""
+
+    def __init__(self, path: Path, offline: bool = False):
+        self.path = path
+        self.offline = offline
+        self.model = settings.GRANITE_EMBEDDING_MODEL
+        self._vectors: Dict[str, np.ndarray] = {}
+        if path.exists():
+            with open(path, "rb") as f:
+                self._vectors = pickle.load(f)
+        self.fetched = 0
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha1(f"{self.model}\0{text}".encode("utf-8")).hexdigest()
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        missing = list(dict.fromkeys(t for t in texts if self._key(t) not in self._vectors))
+        if missing:
+            if self.offline:
+                raise RuntimeError(f"{len(missing)} texts are not in the embedding cache (--offline)")
+            for text, vector in zip(missing, granite_embeddings.embed_documents(missing)):
+                self._vectors[self._key(text)] = np.asarray(vector, dtype=np.float32)
+            self.fetched += len(missing)
+            self.save()
+        return np.vstack([self._vectors[self._key(t)] for t in texts])
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "wb") as f:
+            pickle.dump(self._vectors, f)
+
+
+# ===============================
+# Index construction
+# ===============================
+def load_dataset(path: Path) -> List[Dict]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def chunk_documents(chunk_size: int, overlap: int) -> List[Document]:
+    documents = []
+    for file in sorted(DATA_DIR.glob("**/*.txt")):
+        source = file.relative_to(DATA_DIR).as_posix()
+        for chunk in chunk_text(file.read_text(encoding="utf-8"), chunk_size=chunk_size, overlap=overlap):
+            documents.append(Document(page_content=chunk, metadata={"source": source, "filename": file.name}))
+    return documents
+
+
+def build_store(index_type: str, documents: List[Document], vectors: np.ndarray) -> FAISS:
+    """A LangChain FAISS store over precomputed vectors with the requested FAISS index"""
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    dim = vectors.shape[1]
+    normalize = index_type == "flat_ip"
+
+    if index_type == "flat_l2":
+        index = faiss.IndexFlatL2(dim)
+    elif index_type == "flat_ip":
+        index = faiss.IndexFlatIP(dim)
+        vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    elif index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, 32)
+        index.hnsw.efSearch = 64
+    elif index_type == "ivf":
+        nlist = max(1, int(math.sqrt(len(vectors))))
+        index = faiss.IndexIVFFlat(faiss.IndexFlatL2(dim), dim, nlist)
+        index.train(vectors)
+        index.nprobe = max(1, nlist // 4)
+    else:
+        raise ValueError(f"Unknown index type: {index_type}")
+    index.add(vectors)
+
+    ids = [str(i) for i in range(len(documents))]
+    return FAISS(
+        embedding_function=granite_embeddings,
+        index=index,
+        docstore=InMemoryDocstore(dict(zip(ids, documents))),
+        index_to_docstore_id=dict(enumerate(ids)),
+        normalize_L2=normalize,
+    )
+
+
+def load_current_store() -> FAISS:
+    return FAISS.load_local(
+        VECTOR_STORE_DIR, embeddings=granite_embeddings, index_name="index",
+        allow_dangerous_deserialization=True,
+    )
+
+
+# ===============================
+# Metrics
+# ===============================
+def rank_metrics(ranked_sources: List[str], relevant: set, k: int) -> Dict[str, float]:
+    """recall@k, reciprocal rank and nDCG@k with binary, once-per-source relevance"""
+    top = ranked_sources[:k]
+    found = set(top) & relevant
+    recall = len(found) / len(relevant) if relevant else 0.0
+
+    reciprocal_rank = 0.0
+    for rank, source in enumerate(top, start=1):
+        if source in relevant:
+            reciprocal_rank = 1.0 / rank
+            break
+
+    dcg, seen = 0.0, set()
+    for rank, source in enumerate(top, start=1):
+        if source in relevant and source not in seen:
+            dcg += 1.0 / math.log2(rank + 1)
+            seen.add(source)
+    ideal = sum(1.0 / math.log2(rank + 1) for rank in range(1, min(len(relevant), k) + 1))
+    return {"recall": recall, "mrr": reciprocal_rank, "ndcg": dcg / ideal if ideal else 0.0}
+
+
+def _label(source: Dict) -> str:
+    return f"{source['category']}/{source['filename']}"
+
+
+def _p95(values: List[float]) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(0.95 * (len(values) - 1))))]
+
+
+def evaluate(store: FAISS, dataset: List[Dict], question_vectors: Dict[str, np.ndarray],
+             ks: Sequence[int], repeat: int) -> List[Dict]:
+    """Point retrieve_context at `store` and score every k"""
+    retriever.vector_store.store = store
+    rows = []
+    for k in ks:
+        totals = {"recall": 0.0, "mrr": 0.0, "ndcg": 0.0}
+        search_ms, retrieve_ms = [], []
+        for item in dataset:
+            question = item["question"]
+            vector = question_vectors[question]
+
+            started = time.perf_counter()
+            retriever.vector_store.similarity_search_with_ids([vector], k=k)
+            search_ms.append((time.perf_counter() - started) * 1000)
+
+            for _ in range(max(1, repeat)):
+                started = time.perf_counter()
+                result = retriever.retrieve_context(question, k=k)
+                retrieve_ms.append((time.perf_counter() - started) * 1000)
+
+            # Score the sources retrieve_context serves; they carry a label, not the source path
+            ranked = [_label(source) for source in result["sources"]]
+            relevant = {_label(retriever.source_label(path)) for path in item["relevant"]}
+            for name, value in rank_metrics(ranked, relevant, k).items():
+                totals[name] += value
+
+        n = len(dataset)
+        rows.append({
+            "k": k,
+            "recall": round(totals["recall"] / n, 4),
+            "mrr": round(totals["mrr"] / n, 4),
+            "ndcg": round(totals["ndcg"] / n, 4),
+            "search_ms_mean": round(statistics.mean(search_ms), 4),
+            "search_ms_p95": round(_p95(search_ms), 4),
+            "retrieve_ms_mean": round(statistics.mean(retrieve_ms), 4),
+            "retrieve_ms_p95": round(_p95(retrieve_ms), 4),
+        })
+    return rows
+
+
+def _ints(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate retrieval quality and latency over a parameter grid")
+    parser.add_argument("--dataset", type=Path, default=DEFAULT_DATASET)
+    parser.add_argument("--chunk-sizes", type=_ints, default=[50, 100, 500], help="words per chunk")
+    parser.add_argument("--overlaps", type=_ints, default=[0, 20], help="overlap in words")
+    parser.add_argument("--index-types", default=",".join(INDEX_TYPES))
+    parser.add_argument("--ks", type=_ints, default=[1, 3, 5])
+    parser.add_argument("--repeat", type=int, default=3, help="retrieve_context calls per question for latency")
+    parser.add_argument("--no-current", action="store_true", help="skip the shipped index")
+    parser.add_argument("--cache", type=Path, default=DEFAULT_CACHE)
+    parser.add_argument("--offline", action="store_true", help="fail instead of calling the embedding API")
+    parser.add_argument("--output", type=Path, help="write all rows as JSON")
+    args = parser.parse_args()
+
+    index_types = [t.strip() for t in args.index_types.split(",") if t.strip()]
+    unknown = set(index_types) - set(INDEX_TYPES)
+    if unknown:
+        parser.error(f"unknown index types: {', '.join(sorted(unknown))}")
+
+    dataset = load_dataset(args.dataset)
+    cache = EmbeddingCache(args.cache, offline=args.offline)
+    questions = [item["question"] for item in dataset]
+    question_vectors = dict(zip(questions, cache.embed(questions)))
+
+    # retrieve_context embeds through this cache; feedback priors would skew the ranking
+    original_embed, original_store = retriever._cached_embed_query, retriever.vector_store.store
+    retriever._cached_embed_query = lambda question: tuple(question_vectors[question])
+    feedback_loop._loop = feedback_loop.FeedbackLoop()
+
+    rows = []
+    try:
+        if not args.no_current:
+            store = load_current_store()
+            for row in evaluate(store, dataset, question_vectors, args.ks, args.repeat):
+                rows.append({"chunking": "current", "index": "current", "chunks": store.index.ntotal, **row})
+
+        for chunk_size in args.chunk_sizes:
+            for overlap in args.overlaps:
+                if overlap >= chunk_size:
+                    continue
+                documents = chunk_documents(chunk_size, overlap)
+                vectors = cache.embed([d.page_content for d in documents])
+                for index_type in index_types:
+                    store = build_store(index_type, documents, vectors)
+                    for row in evaluate(store, dataset, question_vectors, args.ks, args.repeat):
+                        rows.append({
+                            "chunking": f"{chunk_size}/{overlap}", "index": index_type,
+                            "chunks": len(documents), **row,
+                        })
+    finally:
+        retriever._cached_embed_query = original_embed
+        retriever.vector_store.store = original_store
+        feedback_loop._loop = None
+
+    header = f"{'chunking':<9} {'index':<8} {'chunks':>6} {'k':>3} {'recall':>7} {'mrr':>6} {'ndcg':>6} {'search ms':>10} {'retrieve ms':>12}"
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        print(
+            f"{row['chunking']:<9} {row['index']:<8} {row['chunks']:>6} {row['k']:>3} "
+            f"{row['recall']:>7.3f} {row['mrr']:>6.3f} {row['ndcg']:>6.3f} "
+            f"{row['search_ms_mean']:>10.3f} {row['retrieve_ms_mean']:>12.3f}"
+        )
+    print(f"\n{len(dataset)} questions, {cache.fetched} new embeddings fetched")
+
+    if args.output:
+        args.output.write_text(json.dumps({"dataset": str(args.dataset), "rows": rows}, indent=2))
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+"""
+Local stand-in for the IBM Cloud IAM and watsonx.ai APIs.
+
+Serves the endpoints GraniteClient calls (IAM token, embeddings, text
+generation and streamed generation) with configurable latency and token
+rate, so the whole stack can be load-tested offline and reproducibly.
+Embeddings are deterministic per input text.
+
+It can also misbehave like a throttled API: answer a share of watsonx
+calls with 429 (with Retry-After) or 503, or enforce a request quota of its
+own, to exercise the client's retries and throttling. With --run-on it
+keeps generating past the answer into an invented next turn, up to
+max_new_tokens, like a model that ignores its stop sequences.
+
+    python -m backend.benchmarks.fake_watsonx --port 8099 --latency-ms 50 --tokens-per-second 40
+    python -m backend.benchmarks.fake_watsonx --port 8099 --throttle-rate 0.2 --quota-rps 10
+
+Point the app at it with IBM_WATSONX_URL=http://127.0.0.1:8099 and
+IBM_IAM_URL=http://127.0.0.1:8099/identity/token.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import time
+import zlib
+from dataclasses import dataclass, field
+
+import numpy as np
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+ANSWER = (
+    "Vishwakarma University offers undergraduate, postgraduate and doctoral programs. "
+    "Admission is based on the VU-NET entrance test followed by counselling. "
+    "Please check the official admissions page for the latest fee structure and deadlines."
+)
+# Split the way a tokenizer would, so stop sequences straddle token boundaries
+RUN_ON = ["\n", "User", " Quest", "ion", ":", " What", " about", " hostel", " fees", "?", "\n", "Assistant", " Answer", ":"]
+
+
+@dataclass
+class FakeConfig:
+    latency_ms: float = float(os.getenv("FAKE_WATSONX_LATENCY_MS", "50"))
+    tokens_per_second: float = float(os.getenv("FAKE_WATSONX_TOKENS_PER_SECOND", "40"))
+    answer_tokens: int = int(os.getenv("FAKE_WATSONX_ANSWER_TOKENS", "40"))
+    embedding_dim: int = int(os.getenv("FAKE_WATSONX_EMBEDDING_DIM", "384"))
+    # Fault injection on /ml/ calls: shares answered 429 / 503, and a requests-per-second quota (0 = none)
+    throttle_rate: float = float(os.getenv("FAKE_WATSONX_THROTTLE_RATE", "0"))
+    error_rate: float = float(os.getenv("FAKE_WATSONX_ERROR_RATE", "0"))
+    retry_after: float = float(os.getenv("FAKE_WATSONX_RETRY_AFTER", "1"))
+    quota_rps: float = float(os.getenv("FAKE_WATSONX_QUOTA_RPS", "0"))
+    seed: int = int(os.getenv("FAKE_WATSONX_SEED", "0"))
+    run_on: bool = os.getenv("FAKE_WATSONX_RUN_ON", "") == "1"
+    requests: dict = field(default_factory=dict)
+
+
+def _embedding(text: str, dim: int):
+    rng = np.random.default_rng(zlib.crc32(text.encode("utf-8")))
+    vector = rng.standard_normal(dim)
+    return (vector / np.linalg.norm(vector)).round(6).tolist()
+
+
+def _tokens(count: int, max_new_tokens: int = 0):
+    words = ANSWER.split()
+    tokens = [words[i % len(words)] + " " for i in range(count)]
+    # Run on into the next turn until the token cap
+    tokens += [RUN_ON[i % len(RUN_ON)] for i in range(max(0, max_new_tokens - count))]
+    return tokens
+
+
+def _generated_tokens(config: FakeConfig, body: dict):
+    max_new_tokens = body.get("parameters", {}).get("max_new_tokens", 400)
+    return _tokens(min(config.answer_tokens, max_new_tokens), max_new_tokens if config.run_on else 0)
+
+
+def create_app(config: FakeConfig = None) -> FastAPI:
+    config = config or FakeConfig()
+    app = FastAPI(title="fake watsonx")
+
+    def count(name: str):
+        config.requests[name] = config.requests.get(name, 0) + 1
+
+    async def network_delay():
+        if config.latency_ms:
+            await asyncio.sleep(config.latency_ms / 1000)
+
+    rng = random.Random(config.seed)
+    quota = {"tokens": config.quota_rps, "updated": time.monotonic()}
+
+    def quota_wait() -> float:
+        """0 if the quota admits a request now, else seconds until it will"""
+        now = time.monotonic()
+        quota["tokens"] = min(config.quota_rps, quota["tokens"] + (now - quota["updated"]) * config.quota_rps)
+        quota["updated"] = now
+        if quota["tokens"] >= 1:
+            quota["tokens"] -= 1
+            return 0.0
+        return (1 - quota["tokens"]) / config.quota_rps
+
+    def throttled(retry_after: float):
+        count("throttled")
+        return JSONResponse(
+            {"errors": [{"code": "too_many_requests", "message": "Rate limit exceeded"}], "status_code": 429},
+            status_code=429, headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
+
+    @app.middleware("http")
+    async def inject_faults(request: Request, call_next):
+        if request.url.path.startswith("/ml/"):
+            if config.quota_rps:
+                wait = quota_wait()
+                if wait:
+                    return throttled(wait)
+            roll = rng.random()
+            if roll < config.throttle_rate:
+                return throttled(config.retry_after)
+            if roll < config.throttle_rate + config.error_rate:
+                count("errors")
+                return JSONResponse({"errors": [{"code": "service_unavailable"}], "status_code": 503}, status_code=503)
+        return await call_next(request)
+
+    @app.post("/identity/token")
+    async def iam_token():
+        count("iam_token")
+        await network_delay()
+        return {"access_token": "fake-token", "expires_in": 3600, "token_type": "Bearer"}
+
+    @app.post("/ml/v1/text/embeddings")
+    async def embeddings(request: Request):
+        count("embeddings")
+        body = await request.json()
+        await network_delay()
+        inputs = body.get("inputs", [])
+        return {
+            "model_id": body.get("model_id"),
+            "results": [{"embedding": _embedding(text, config.embedding_dim)} for text in inputs],
+            "input_token_count": sum(len(text.split()) for text in inputs),
+        }
+
+    @app.post("/ml/v1/text/generation")
+    async def generation(request: Request):
+        count("generation")
+        body = await request.json()
+        tokens = _generated_tokens(config, body)
+        await network_delay()
+        if config.tokens_per_second:
+            await asyncio.sleep(len(tokens) / config.tokens_per_second)
+        return {
+            "model_id": body.get("model_id"),
+            "results": [{
+                "generated_text": "".join(tokens).strip(),
+                "generated_token_count": len(tokens),
+                "input_token_count": len(body.get("input", "").split()),
+                "stop_reason": "eos_token",
+            }],
+        }
+
+    @app.post("/ml/v1/text/generation_stream")
+    async def generation_stream(request: Request):
+        count("generation_stream")
+        body = await request.json()
+        tokens = _generated_tokens(config, body)
+        input_tokens = len(body.get("input", "").split())
+
+        async def events():
+            await network_delay()
+            for i, token in enumerate(tokens, start=1):
+                if config.tokens_per_second:
+                    await asyncio.sleep(1 / config.tokens_per_second)
+                result = {
+                    "generated_text": token,
+                    "generated_token_count": i,
+                    "input_token_count": input_tokens,
+                    "stop_reason": "eos_token" if i == len(tokens) else "not_finished",
+                }
+                yield f"id: {i}\nevent: message\ndata: {json.dumps({'results': [result]})}\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.get("/stats")
+    async def stats():
+        return {"requests": config.requests}
+
+    return app
+
+
+app = create_app()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake watsonx server for load tests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency-ms", type=float, default=FakeConfig.latency_ms)
+    parser.add_argument("--tokens-per-second", type=float, default=FakeConfig.tokens_per_second)
+    parser.add_argument("--answer-tokens", type=int, default=FakeConfig.answer_tokens)
+    parser.add_argument("--embedding-dim", type=int, default=FakeConfig.embedding_dim)
+    parser.add_argument("--throttle-rate", type=float, default=FakeConfig.throttle_rate, help="share of calls answered 429")
+    parser.add_argument("--error-rate", type=float, default=FakeConfig.error_rate, help="share of calls answered 503")
+    parser.add_argument("--retry-after", type=float, default=FakeConfig.retry_after, help="Retry-After of injected 429s")
+    parser.add_argument("--quota-rps", type=float, default=FakeConfig.quota_rps, help="requests per second before 429s (0 = none)")
+    parser.add_argument("--seed", type=int, default=FakeConfig.seed)
+    parser.add_argument("--run-on", action="store_true", default=FakeConfig.run_on,
+                        help="generate past the answer into an invented next turn, up to max_new_tokens")
+    args = parser.parse_args()
+
+    import uvicorn
+
+    config = FakeConfig(
+        latency_ms=args.latency_ms,
+        tokens_per_second=args.tokens_per_second,
+        answer_tokens=args.answer_tokens,
+        embedding_dim=args.embedding_dim,
+        throttle_rate=args.throttle_rate,
+        error_rate=args.error_rate,
+        retry_after=args.retry_after,
+        quota_rps=args.quota_rps,
+        seed=args.seed,
+        run_on=args.run_on,
+    )
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,389 @@
+"""
+Reproducible load test for the chat and ingest endpoints.
+
+Starts the fake watsonx server and the app (in a scratch working directory
+with a copy of the FAISS index and its own SQLite file), drives /api/chat,
+/api/chat/stream and /api/ingest at a fixed concurrency, and writes
+throughput, latency percentiles, time-to-first-token and app memory to a
+JSON file so runs can be compared between commits.
+
+    python -m backend.benchmarks.load_test --concurrency 16 --requests 200
+    python -m backend.benchmarks.load_test --compare benchmarks/results/<earlier>.json
+
+Use --app-url to target an already running app instead (memory is then not
+reported and upstream settings are whatever that app was started with).
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+VECTOR_STORE_DIR = REPO_ROOT / "backend" / "data" / "VectorStore"
+RESULTS_DIR = REPO_ROOT / "benchmarks" / "results"
+
+# Questions that go through retrieval and generation rather than the fast paths
+QUESTIONS = [
+    "What facilities does the campus library provide?",
+    "Tell me about placement opportunities for computer engineering students",
+    "Which companies recruit from the university?",
+    "What documents are required during admission counselling?",
+    "How is the hostel accommodation arranged for first year students?",
+    "Describe the research opportunities available for doctoral students",
+    "What is the teaching approach in the MBA program?",
+    "Are there scholarships for meritorious students?",
+]
+
+SCENARIOS = ("chat", "stream", "ingest")
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _percentile(sorted_values: List[float], q: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(q * (len(sorted_values) - 1)))))
+    return round(sorted_values[index], 2)
+
+
+def _summary(values_ms: List[float]) -> Dict:
+    values = sorted(values_ms)
+    return {
+        "p50_ms": _percentile(values, 0.50),
+        "p95_ms": _percentile(values, 0.95),
+        "p99_ms": _percentile(values, 0.99),
+        "max_ms": round(values[-1], 2) if values else None,
+    }
+
+
+def _memory_kb(pid: Optional[int]) -> Dict:
+    """Resident and peak resident memory of a process, from /proc (Linux only)"""
+    if pid is None:
+        return {}
+    try:
+        status = Path(f"/proc/{pid}/status").read_text()
+    except OSError:
+        return {}
+    memory = {}
+    for line in status.splitlines():
+        key, _, value = line.partition(":")
+        if key in ("VmRSS", "VmHWM"):
+            memory[key.lower() + "_kb"] = int(value.split()[0])
+    return memory
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+# ===============================
+# Process management
+# ===============================
+class Stack:
+    """Fake watsonx plus the app, each in its own uvicorn process"""
+
+    def __init__(self, args):
+        self.args = args
+        self.workdir = Path(tempfile.mkdtemp(prefix="vu-loadtest-"))
+        self.fake_port = _free_port()
+        self.app_port = _free_port()
+        self.processes: List[subprocess.Popen] = []
+        self.app_pid: Optional[int] = None
+
+    @property
+    def app_url(self) -> str:
+        return f"http://127.0.0.1:{self.app_port}"
+
+    def _spawn(self, module: str, port: int, env: dict, cwd: Path) -> subprocess.Popen:
+        process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", module, "--host", "127.0.0.1",
+             "--port", str(port), "--log-level", "warning"],
+            cwd=cwd, env=env, stdout=subprocess.DEVNULL, stderr=open(cwd / f"{port}.log", "wb"),
+        )
+        self.processes.append(process)
+        return process
+
+    def _wait_ready(self, url: str, process: subprocess.Popen, timeout: float = 120.0):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError(f"{url} exited during startup, see logs in {self.workdir}")
+            try:
+                if httpx.get(url, timeout=1.0).status_code < 500:
+                    return
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.2)
+        raise RuntimeError(f"{url} did not become ready within {timeout}s")
+
+    def start(self):
+        env = dict(os.environ, PYTHONPATH=str(REPO_ROOT))
+        fake_env = dict(
+            env,
+            FAKE_WATSONX_LATENCY_MS=str(self.args.latency_ms),
+            FAKE_WATSONX_TOKENS_PER_SECOND=str(self.args.tokens_per_second),
+            FAKE_WATSONX_ANSWER_TOKENS=str(self.args.answer_tokens),
+        )
+        fake = self._spawn("backend.benchmarks.fake_watsonx:app", self.fake_port, fake_env, self.workdir)
+        self._wait_ready(f"http://127.0.0.1:{self.fake_port}/stats", fake)
+
+        # The app resolves data/VectorStore, data/feedback etc. against its working directory
+        shutil.copytree(VECTOR_STORE_DIR, self.workdir / "data" / "VectorStore")
+        fake_url = f"http://127.0.0.1:{self.fake_port}"
+        app_env = dict(
+            env,
+            DATABASE_URL=f"sqlite:///{self.workdir / 'loadtest.db'}",
+            JWT_SECRET="loadtest",
+            IBM_CLOUD_API_KEY="loadtest",
+            IBM_PROJECT_ID="loadtest",
+            IBM_WATSONX_URL=fake_url,
+            IBM_IAM_URL=f"{fake_url}/identity/token",
+            GRANITE_EMBEDDING_MODEL="ibm/slate-30m-english-rtrvr",
+            GRANITE_CHAT_MODEL="ibm/granite-3-8b-instruct",
+        )
+        if not self.args.rate_limits:
+            # All load comes from one IP; per-client limits would turn the latency run into a count of 429s
+            app_env.update(RATE_LIMIT_ANONYMOUS_PER_MINUTE="1000000", RATE_LIMIT_BURST="1000000")
+        started = time.perf_counter()
+        app = self._spawn("backend.main:app", self.app_port, app_env, self.workdir)
+        self._wait_ready(f"{self.app_url}/health", app)
+        self.startup_seconds = round(time.perf_counter() - started, 3)
+        self.app_pid = app.pid
+
+    def upstream_stats(self) -> Dict:
+        try:
+            return httpx.get(f"http://127.0.0.1:{self.fake_port}/stats", timeout=5).json()
+        except httpx.HTTPError:
+            return {}
+
+    def stop(self):
+        for process in self.processes:
+            process.terminate()
+        for process in self.processes:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+
+# ===============================
+# Load generation
+# ===============================
+def _question(scenario: str, i: int, unique: bool) -> str:
+    question = QUESTIONS[i % len(QUESTIONS)]
+    # A numbered suffix defeats the answer/embedding caches so every request does full work
+    return f"{question} ({scenario} request {i})" if unique else question
+
+
+async def _chat(client: httpx.AsyncClient, i: int, unique: bool) -> Dict:
+    started = time.perf_counter()
+    response = await client.post("/api/chat", json={"question": _question("chat", i, unique)})
+    response.raise_for_status()
+    return {"latency_ms": (time.perf_counter() - started) * 1000}
+
+
+class StreamErrorEvent(Exception):
+    """The stream ended with an SSE "error" event instead of a "done" one"""
+
+
+async def _stream(client: httpx.AsyncClient, i: int, unique: bool) -> Dict:
+    started = time.perf_counter()
+    ttft = None
+    last_event = None
+    async with client.stream("POST", "/api/chat/stream", json={"question": _question("stream", i, unique)}) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if ttft is None and line.strip():
+                ttft = (time.perf_counter() - started) * 1000
+            if line.startswith("event:"):
+                last_event = line[len("event:"):].strip()
+    if last_event == "error":
+        raise StreamErrorEvent()
+    return {"latency_ms": (time.perf_counter() - started) * 1000, "ttft_ms": ttft}
+
+
+async def _ingest(client: httpx.AsyncClient, i: int, unique: bool) -> Dict:
+    text = (
+        f"LOAD TEST NOTICE {i}\n\n"
+        f"This is synthetic document number {i} used to measure ingestion throughput. "
+        "It describes a fictional workshop on campus facilities and student services.\n"
+    )
+    started = time.perf_counter()
+    response = await client.post(
+        "/api/ingest", files={"file": (f"loadtest_{i}.txt", text.encode("utf-8"), "text/plain")}
+    )
+    response.raise_for_status()
+    return {"latency_ms": (time.perf_counter() - started) * 1000}
+
+
+RUNNERS = {"chat": _chat, "stream": _stream, "ingest": _ingest}
+
+
+async def run_scenario(name: str, app_url: str, concurrency: int, total: int, unique: bool, pid=None) -> Dict:
+    runner = RUNNERS[name]
+    results, errors = [], {}
+    counter = iter(range(total))
+    memory_before = _memory_kb(pid)
+
+    async def worker(client):
+        for i in counter:
+            try:
+                results.append(await runner(client, i, unique))
+            except Exception as e:
+                key = type(e).__name__
+                errors[key] = errors.get(key, 0) + 1
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=app_url, timeout=120.0, limits=limits) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    report = {
+        "requests": total,
+        "completed": len(results),
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(results) / elapsed, 2) if elapsed else 0.0,
+        "latency": _summary([r["latency_ms"] for r in results]),
+    }
+    ttfts = [r["ttft_ms"] for r in results if r.get("ttft_ms") is not None]
+    if ttfts:
+        report["ttft"] = _summary(ttfts)
+    if pid is not None:
+        report["memory"] = {"before": memory_before, "after": _memory_kb(pid)}
+    return report
+
+
+# ===============================
+# Reporting
+# ===============================
+def print_report(results: Dict):
+    print("=" * 72)
+    print(f"Load test @ {results['commit']}  concurrency={results['config']['concurrency']}")
+    print("=" * 72)
+    for name, report in results["scenarios"].items():
+        latency = report["latency"]
+        line = (
+            f"{name:<7} {report['throughput_rps']:>8.1f} req/s  "
+            f"p50={latency['p50_ms']}  p95={latency['p95_ms']}  p99={latency['p99_ms']} ms"
+        )
+        if "ttft" in report:
+            line += f"  ttft p50={report['ttft']['p50_ms']} ms"
+        if report["errors"]:
+            line += f"  errors={report['errors']}"
+        print(line)
+        if report.get("memory"):
+            print(f"        rss {report['memory']['before'].get('vmrss_kb')} -> "
+                  f"{report['memory']['after'].get('vmrss_kb')} kB")
+
+
+def compare(current: Dict, baseline_path: Path):
+    """Print the change of each headline number against an earlier results file"""
+    baseline = json.loads(baseline_path.read_text())
+    print(f"\nCompared with {baseline_path.name} ({baseline.get('commit')}):")
+    for name, report in current["scenarios"].items():
+        before = baseline.get("scenarios", {}).get(name)
+        if not before:
+            continue
+        pairs = [("throughput_rps", report["throughput_rps"], before["throughput_rps"])]
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            pairs.append((key, report["latency"][key], before["latency"][key]))
+        if "ttft" in report and "ttft" in before:
+            pairs.append(("ttft_p50_ms", report["ttft"]["p50_ms"], before["ttft"]["p50_ms"]))
+        deltas = []
+        for key, now, then in pairs:
+            if now is None or not then:
+                continue
+            deltas.append(f"{key} {(now - then) / then * 100:+.1f}%")
+        print(f"  {name:<7} " + ", ".join(deltas))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test /api/chat, /api/chat/stream and /api/ingest")
+    parser.add_argument("--scenarios", default="chat,stream,ingest", help="comma-separated subset of " + ",".join(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=100, help="requests per scenario")
+    parser.add_argument("--cached", action="store_true", help="repeat questions so caches can hit")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="fake upstream latency per call")
+    parser.add_argument("--tokens-per-second", type=float, default=40.0, help="fake generation speed")
+    parser.add_argument("--answer-tokens", type=int, default=40)
+    parser.add_argument("--rate-limits", action="store_true", help="keep the app's per-client rate limits")
+    parser.add_argument("--app-url", help="benchmark an already running app instead of starting one")
+    parser.add_argument("--output", type=Path, help="results file (default: benchmarks/results/<time>-<commit>.json)")
+    parser.add_argument("--compare", type=Path, help="earlier results file to compare against")
+    args = parser.parse_args()
+
+    scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    stack = None
+    app_url, pid = args.app_url, None
+    try:
+        if app_url is None:
+            stack = Stack(args)
+            stack.start()
+            app_url, pid = stack.app_url, stack.app_pid
+
+        results = {
+            "commit": _git_commit(),
+            "timestamp": datetime.utcnow().isoformat(),
+            "config": {
+                "concurrency": args.concurrency,
+                "requests": args.requests,
+                "cached": args.cached,
+                "latency_ms": args.latency_ms,
+                "tokens_per_second": args.tokens_per_second,
+                "answer_tokens": args.answer_tokens,
+                "app_url": args.app_url,
+            },
+            "startup_s": getattr(stack, "startup_seconds", None),
+            "scenarios": {},
+        }
+        for name in scenarios:
+            results["scenarios"][name] = asyncio.run(run_scenario(
+                name, app_url, args.concurrency, args.requests, not args.cached, pid
+            ))
+        if stack is not None:
+            results["upstream"] = stack.upstream_stats()
+            results["memory_peak"] = _memory_kb(pid)
+    finally:
+        if stack is not None:
+            stack.stop()
+
+    output = args.output or RESULTS_DIR / f"{datetime.utcnow():%Y%m%d-%H%M%S}-{results['commit']}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+
+    print_report(results)
+    print(f"\nResults written to {output}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
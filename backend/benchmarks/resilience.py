@@ -0,0 +1,154 @@
+"""
+Resilience check for the watsonx client.
+
+Starts the fake watsonx server with injected 429s, 503s, latency and a
+request quota, drives GraniteClient (embeddings, blocking and streamed
+generation) from a thread pool, and reports how many calls succeeded, how
+often the client retried, and how many 429s the stub had to send. Exits
+non-zero if the success rate is below --min-success, so it can gate a
+change to the retry or throttling policy.
+
+    python -m backend.benchmarks.resilience
+    python -m backend.benchmarks.resilience --throttle-rate 0.3 --quota-rps 5 --client-rps 5
+    python -m backend.benchmarks.resilience --client-rps 0     # no client-side throttling, for comparison
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict
+
+import httpx
+
+from backend.benchmarks.load_test import REPO_ROOT, RESULTS_DIR, _free_port, _git_commit, _summary
+
+OPERATIONS = ("embedding", "generation", "generation_stream")
+
+
+def _start_fake(port: int, args) -> subprocess.Popen:
+    process = subprocess.Popen(
+        [sys.executable, "-m", "backend.benchmarks.fake_watsonx", "--port", str(port),
+         "--latency-ms", str(args.latency_ms), "--tokens-per-second", "0",
+         "--throttle-rate", str(args.throttle_rate), "--error-rate", str(args.error_rate),
+         "--retry-after", str(args.retry_after), "--quota-rps", str(args.quota_rps)],
+        cwd=REPO_ROOT, env=dict(os.environ, PYTHONPATH=str(REPO_ROOT)),
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/stats", timeout=1.0).status_code == 200:
+                return process
+        except httpx.HTTPError:
+            time.sleep(0.05)
+    process.kill()
+    raise RuntimeError("fake watsonx did not start")
+
+
+def _configure(port: int, args):
+    # Settings are read when backend.config is first imported, so this must run before that
+    os.environ.update(
+        DATABASE_URL="sqlite://",
+        JWT_SECRET="resilience",
+        IBM_CLOUD_API_KEY="resilience",
+        IBM_PROJECT_ID="resilience",
+        IBM_WATSONX_URL=f"http://127.0.0.1:{port}",
+        IBM_IAM_URL=f"http://127.0.0.1:{port}/identity/token",
+        GRANITE_EMBEDDING_MODEL="ibm/slate-30m-english-rtrvr",
+        GRANITE_CHAT_MODEL="ibm/granite-3-8b-instruct",
+        WATSONX_REQUESTS_PER_SECOND=str(args.client_rps),
+        WATSONX_BURST=str(max(1, int(args.client_rps))),
+        # Injected errors are not an outage; keep the breaker out of the measurement
+        CIRCUIT_FAILURE_THRESHOLD="1000000",
+    )
+
+
+def run(args) -> Dict:
+    from backend.granite.granite_client import GraniteClient
+    from backend.granite.resilience import GRANITE_RETRIES, QUOTA_WAIT
+
+    client = GraniteClient()
+
+    def call(i: int):
+        operation = OPERATIONS[i % len(OPERATIONS)]
+        started = time.perf_counter()
+        try:
+            if operation == "embedding":
+                client.generate_embedding(f"resilience check {i}")
+            elif operation == "generation":
+                client.generate_chat_response(f"Question {i}?")
+            else:
+                "".join(client.generate_chat_stream(f"Question {i}?"))
+            outcome = "ok"
+        except Exception as e:
+            outcome = type(e).__name__
+        return operation, outcome, (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(call, range(args.calls)))
+    elapsed = time.perf_counter() - started
+
+    outcomes = Counter(outcome for _, outcome, _ in results)
+    retries = {
+        f"{operation}/{kind}": GRANITE_RETRIES.value(operation=operation, kind=kind)
+        for operation in OPERATIONS for kind in ("throttled", "transient")
+    }
+    return {
+        "calls": args.calls,
+        "elapsed_s": round(elapsed, 2),
+        "success_rate": round(outcomes["ok"] / args.calls, 4),
+        "outcomes": dict(outcomes),
+        "latency_ms": _summary(sorted(ms for _, outcome, ms in results if outcome == "ok")),
+        "client_retries": {key: value for key, value in retries.items() if value},
+        "quota_waits": QUOTA_WAIT.count(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Drive GraniteClient against a fake watsonx that throttles and fails")
+    parser.add_argument("--calls", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.1, help="share of calls the stub answers 429")
+    parser.add_argument("--error-rate", type=float, default=0.05, help="share of calls the stub answers 503")
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--quota-rps", type=float, default=20.0, help="stub's own quota (0 = none)")
+    parser.add_argument("--client-rps", type=float, default=20.0, help="client-side quota (0 = off)")
+    parser.add_argument("--min-success", type=float, default=0.99)
+    parser.add_argument("--output", type=Path, help="results file (default: benchmarks/results/resilience-<time>-<commit>.json)")
+    args = parser.parse_args()
+
+    port = _free_port()
+    fake = _start_fake(port, args)
+    try:
+        _configure(port, args)
+        results = run(args)
+        results["stub"] = httpx.get(f"http://127.0.0.1:{port}/stats", timeout=5).json()["requests"]
+    finally:
+        fake.terminate()
+        fake.wait(timeout=10)
+
+    results.update(commit=_git_commit(), timestamp=datetime.utcnow().isoformat(), settings=vars(args) | {"output": None})
+    output = args.output or RESULTS_DIR / f"resilience-{datetime.utcnow():%Y%m%d-%H%M%S}-{results['commit']}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2, default=str))
+
+    print(f"{results['calls']} calls in {results['elapsed_s']}s, success rate {results['success_rate']:.2%}")
+    print(f"  outcomes        {results['outcomes']}")
+    print(f"  latency (ms)    {results['latency_ms']}")
+    print(f"  client retries  {results['client_retries']}")
+    print(f"  stub requests   {results['stub']}")
+    print(f"\nResults written to {output}")
+    if results["success_rate"] < args.min_success:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
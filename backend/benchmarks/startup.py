@@ -0,0 +1,159 @@
+"""
+Startup-time benchmark.
+
+Measures, over several cold starts of the app in a scratch working directory
+(with a copy of the FAISS index and its own SQLite file):
+
+  - import_s:  time to import backend.main in a fresh interpreter
+  - health_s:  process spawn -> first 200 from /health (liveness)
+  - ready_s:   process spawn -> first 200 from /ready (indexes warmed)
+
+plus the per-component warm-up times reported by /ready, and writes them
+to a JSON file next to the load-test results.
+
+    python -m backend.benchmarks.startup --runs 5
+    python -m backend.benchmarks.startup --runs 3 --output startup.json
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+import httpx
+
+from backend.benchmarks.load_test import REPO_ROOT, RESULTS_DIR, VECTOR_STORE_DIR, _free_port, _git_commit
+
+IMPORT_SNIPPET = "import time; t = time.perf_counter(); import backend.main; print(time.perf_counter() - t)"
+
+
+def _env(workdir: Path) -> Dict[str, str]:
+    # No upstream calls happen during startup, so the watsonx URL only has to parse
+    return dict(
+        os.environ,
+        PYTHONPATH=str(REPO_ROOT),
+        DATABASE_URL=f"sqlite:///{workdir / 'startup.db'}",
+        JWT_SECRET="startup",
+        IBM_CLOUD_API_KEY="startup",
+        IBM_PROJECT_ID="startup",
+        IBM_WATSONX_URL="http://127.0.0.1:9",
+        GRANITE_EMBEDDING_MODEL="ibm/slate-30m-english-rtrvr",
+        GRANITE_CHAT_MODEL="ibm/granite-3-8b-instruct",
+    )
+
+
+def _wait_for(url: str, process: subprocess.Popen, started: float, timeout: float) -> float:
+    """Seconds from `started` until `url` first answers 200"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"app exited during startup (exit code {process.returncode})")
+        try:
+            if httpx.get(url, timeout=1.0).status_code == 200:
+                return time.perf_counter() - started
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.01)
+    raise RuntimeError(f"{url} did not answer 200 within {timeout}s")
+
+
+def measure_import(workdir: Path) -> float:
+    out = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET], cwd=workdir, env=_env(workdir),
+        capture_output=True, text=True, check=True,
+    ).stdout
+    return float(out.strip().splitlines()[-1])
+
+
+def measure_start(workdir: Path, timeout: float) -> Dict:
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.main:app", "--host", "127.0.0.1",
+         "--port", str(port), "--log-level", "warning"],
+        cwd=workdir, env=_env(workdir), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        health_s = _wait_for(f"{url}/health", process, started, timeout)
+        ready_s = _wait_for(f"{url}/ready", process, started, timeout)
+        components = httpx.get(f"{url}/ready", timeout=5).json().get("components", {})
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+    return {
+        "health_s": round(health_s, 3),
+        "ready_s": round(ready_s, 3),
+        "components": {name: c.get("seconds") for name, c in components.items()},
+    }
+
+
+def _stats(values: List[float]) -> Dict:
+    return {
+        "min": round(min(values), 3),
+        "median": round(statistics.median(values), 3),
+        "max": round(max(values), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure import, liveness and readiness times at startup")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=120.0, help="seconds to wait for /ready per run")
+    parser.add_argument("--output", type=Path, help="results file (default: benchmarks/results/startup-<time>-<commit>.json)")
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix="vu-startup-"))
+    runs = []
+    try:
+        # The app resolves data/VectorStore against its working directory
+        shutil.copytree(VECTOR_STORE_DIR, workdir / "data" / "VectorStore")
+        for i in range(args.runs):
+            run = {"import_s": round(measure_import(workdir), 3), **measure_start(workdir, args.timeout)}
+            runs.append(run)
+            print(f"run {i + 1}: import {run['import_s']:.3f}s  /health {run['health_s']:.3f}s  /ready {run['ready_s']:.3f}s")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    components = sorted({name for run in runs for name in run["components"]})
+    results = {
+        "commit": _git_commit(),
+        "timestamp": datetime.utcnow().isoformat(),
+        "runs": runs,
+        "summary": {
+            metric: _stats([run[metric] for run in runs])
+            for metric in ("import_s", "health_s", "ready_s")
+        },
+        "components_median_s": {
+            name: round(statistics.median(
+                run["components"][name] for run in runs if run["components"].get(name) is not None
+            ), 4)
+            for name in components
+            if any(run["components"].get(name) is not None for run in runs)
+        },
+    }
+
+    output = args.output or RESULTS_DIR / f"startup-{datetime.utcnow():%Y%m%d-%H%M%S}-{results['commit']}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+
+    print()
+    for metric, stats in results["summary"].items():
+        print(f"{metric:<9} min {stats['min']:.3f}s  median {stats['median']:.3f}s  max {stats['max']:.3f}s")
+    for name, seconds in results["components_median_s"].items():
+        print(f"  warm-up {name:<20} {seconds:.3f}s")
+    print(f"\nResults written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,7 +8,22 @@ class Settings(BaseSettings):
     JWT_SECRET: str
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+
+    # Auth performance
+    AUTH_HASH_WORKERS: int = 2
+    AUTH_HASH_MAX_PENDING: int = 32
+    AUTH_PRINCIPAL_TTL: float = 60.0
+    AUTH_PRINCIPAL_CACHE_SIZE: int = 10000
     
+    # Database pooling and SQLite tuning
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_CACHE_SIZE_KB: int = 20000
+
     # App
     APP_NAME: str = "College Admission Agent"
 
@@ -16,11 +31,107 @@ class Settings(BaseSettings):
     IBM_CLOUD_API_KEY: str = Field(..., env="IBM_CLOUD_API_KEY")
     IBM_PROJECT_ID: str = Field(..., env="IBM_PROJECT_ID")
     IBM_WATSONX_URL: str = Field(..., env="IBM_WATSONX_URL")
+    IBM_IAM_URL: str = "https://iam.cloud.ibm.com/identity/token"
 
     # Granite models
     GRANITE_EMBEDDING_MODEL: str
     GRANITE_CHAT_MODEL: str
 
+    # Batch chat
+    BATCH_MAX_QUESTIONS: int = 500
+    BATCH_MAX_CONCURRENCY: int = 8
+
+    # FAQ fast path (cosine similarity thresholds)
+    FAQ_LEXICAL_THRESHOLD: float = 0.8
+    FAQ_VECTOR_THRESHOLD: float = 0.9
+
+    # Intent router
+    INTENT_CONFIDENCE_THRESHOLD: float = 0.6
+    INTENT_SELF_TRAIN_THRESHOLD: float = 0.9
+    INTENT_MAX_LOG_EXAMPLES: int = 5000
+
+    # Buffered chat logging
+    CHAT_LOG_BUFFER_SIZE: int = 10000
+    CHAT_LOG_BATCH_SIZE: int = 200
+    CHAT_LOG_FLUSH_INTERVAL: float = 2.0
+
+    # Feedback store
+    FEEDBACK_BATCH_SIZE: int = 100
+    FEEDBACK_FLUSH_INTERVAL: float = 1.0
+    FEEDBACK_MAX_FILE_BYTES: int = 10 * 1024 * 1024
+
+    # Feedback loop (answer cache and retrieval prior)
+    ANSWER_CACHE_SIZE: int = 128
+    FEEDBACK_PRIOR_WEIGHT: float = 0.5
+    FEEDBACK_RERANK_CANDIDATES: int = 5
+    FEEDBACK_PROVENANCE_SIZE: int = 2048
+
+    # Conversation sessions (history budget in estimated tokens)
+    SESSION_MAX: int = 10000
+    SESSION_TTL: float = 1800.0
+    SESSION_TOKEN_BUDGET: int = 600
+    SESSION_SUMMARY_TOKENS: int = 200
+    SESSION_FOLLOWUP_MAX_WORDS: int = 3
+    SESSION_REUSE_SIMILARITY: float = 0.6
+
+    # Streaming (SSE framing)
+    SSE_COALESCE_MS: float = 30.0
+    SSE_COALESCE_BYTES: int = 512
+    SSE_HEARTBEAT_INTERVAL: float = 15.0
+
+    # WebSocket chat (streams per connection, queued outgoing messages)
+    WS_MAX_STREAMS: int = 8
+    WS_SEND_QUEUE_SIZE: int = 64
+
+    # Admission control (per-client token buckets, global LLM slots)
+    RATE_LIMIT_ANONYMOUS_PER_MINUTE: float = 20.0
+    RATE_LIMIT_USER_PER_MINUTE: float = 60.0
+    RATE_LIMIT_BURST: int = 10
+    RATE_LIMIT_MAX_KEYS: int = 100000
+    LLM_MAX_CONCURRENCY: int = 16
+    LLM_MAX_QUEUE: int = 64
+    LLM_QUEUE_TIMEOUT: float = 10.0
+
+    # watsonx circuit breaker and per-stage latency budgets (seconds)
+    CIRCUIT_FAILURE_THRESHOLD: int = 5
+    CIRCUIT_RESET_TIMEOUT: float = 30.0
+    BUDGET_IAM_TOKEN: float = 10.0
+    BUDGET_EMBEDDING: float = 5.0
+    # Added to BUDGET_EMBEDDING for each input after the first in a batch embedding call
+    BUDGET_EMBEDDING_PER_INPUT: float = 0.2
+    BUDGET_FIRST_TOKEN: float = 8.0
+    BUDGET_GENERATION: float = 20.0
+
+    # watsonx quota and retries (one client-side token bucket for all embedding and generation calls)
+    WATSONX_REQUESTS_PER_SECOND: float = 8.0
+    WATSONX_BURST: int = 8
+    GRANITE_MAX_RETRIES: int = 3
+    GRANITE_BACKOFF_BASE: float = 0.25
+    GRANITE_BACKOFF_MAX: float = 4.0
+    GRANITE_RETRY_MAX_WAIT: float = 10.0
+
+    # Degraded mode (extractive answers while watsonx is unavailable)
+    DEGRADED_MAX_SENTENCES: int = 3
+
+    # LLM provider ("watsonx" or "local"); the fallback, if set, takes over when the primary is down
+    LLM_PROVIDER: str = "watsonx"
+    LLM_FALLBACK_PROVIDER: str = ""
+    LLM_MAX_NEW_TOKENS: int = 400
+    LLM_TEMPERATURE: float = 0.2
+
+    # Model cascade: simple factual lookups go to the small model with a tighter token cap.
+    # Without a small model they still get the cap, on GRANITE_CHAT_MODEL.
+    GRANITE_SMALL_CHAT_MODEL: str = ""
+    LLM_SMALL_MAX_NEW_TOKENS: int = 150
+    CASCADE_SIMPLE_MAX_WORDS: int = 12
+    # Small model's price per token relative to the large one's, for the savings estimate
+    CASCADE_SMALL_COST_RATIO: float = 0.25
+
+    # Local CPU model (a GGUF file; needs `pip install llama-cpp-python`). 0 threads = llama.cpp's default
+    LOCAL_MODEL_PATH: str = "data/models/granite-3.1-2b-instruct-Q4_K_M.gguf"
+    LOCAL_MODEL_CONTEXT: int = 4096
+    LOCAL_MODEL_THREADS: int = 0
+
     class Config:
         env_file = ".env"
         extra = "ignore"
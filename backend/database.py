@@ -1,11 +1,74 @@
-from sqlalchemy import create_engine
+import threading
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import StaticPool
 from backend.config import settings
 
-engine = create_engine(
-    settings.DATABASE_URL,
-    connect_args={"check_same_thread": False}
-)
+
+# ===============================
+# Engine configuration
+# ===============================
+def _is_sqlite(url) -> bool:
+    return make_url(url).get_backend_name() == "sqlite"
+
+
+def _is_sqlite_memory(url) -> bool:
+    database = make_url(url).database
+    return not database or database == ":memory:"
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    """
+    WAL lets readers (auth lookups) proceed while a writer (chat logs,
+    logins) commits; busy_timeout makes writers wait instead of failing
+    with "database is locked"; synchronous=NORMAL is durable under WAL.
+    """
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+        cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA cache_size=-{int(settings.SQLITE_CACHE_SIZE_KB)}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+    finally:
+        cursor.close()
+
+
+def _engine_options(url) -> dict:
+    """Pool and driver options suited to the database behind the URL"""
+    if _is_sqlite(url):
+        if _is_sqlite_memory(url):
+            # One shared connection, otherwise every checkout sees an empty database
+            return {"connect_args": {"check_same_thread": False}, "poolclass": StaticPool}
+        return {
+            "connect_args": {
+                "check_same_thread": False,
+                "timeout": settings.SQLITE_BUSY_TIMEOUT_MS / 1000,
+            },
+            "pool_size": settings.DB_POOL_SIZE,
+            "max_overflow": settings.DB_MAX_OVERFLOW,
+            "pool_timeout": settings.DB_POOL_TIMEOUT,
+        }
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": True,
+    }
+
+
+def create_db_engine(url: str = settings.DATABASE_URL):
+    """Create a tuned engine: pooling per backend, plus pragmas on every SQLite connection"""
+    db_engine = create_engine(url, **_engine_options(url))
+    if _is_sqlite(url):
+        event.listen(db_engine, "connect", _apply_sqlite_pragmas)
+    return db_engine
+
+
+engine = create_db_engine()
 
 SessionLocal = sessionmaker(
     autocommit=False,
@@ -23,3 +86,66 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# ===============================
+# Async sessions (optional)
+# ===============================
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+_async_engine = None
+_async_sessionmaker = None
+_async_lock = threading.Lock()
+
+
+def async_database_url(url: str = settings.DATABASE_URL) -> str:
+    """Map a sync DATABASE_URL to the matching async driver"""
+    parsed = make_url(url)
+    if parsed.get_dialect().is_async:
+        return url
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None:
+        raise RuntimeError(f"No async driver configured for {parsed.get_backend_name()}")
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+
+def get_async_sessionmaker():
+    """
+    Lazily create the async engine and sessionmaker.
+    Requires aiosqlite (SQLite) or asyncpg (Postgres).
+    """
+    global _async_engine, _async_sessionmaker
+    if _async_sessionmaker is None:
+        with _async_lock:
+            if _async_sessionmaker is None:
+                from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+                url = async_database_url(settings.DATABASE_URL)
+                options = _engine_options(settings.DATABASE_URL)
+                options.pop("connect_args", None)
+                if _is_sqlite(url) and not _is_sqlite_memory(url):
+                    options["connect_args"] = {"timeout": settings.SQLITE_BUSY_TIMEOUT_MS / 1000}
+                _async_engine = create_async_engine(url, **options)
+                if _is_sqlite(url):
+                    event.listen(_async_engine.sync_engine, "connect", _apply_sqlite_pragmas)
+                _async_sessionmaker = async_sessionmaker(
+                    _async_engine, class_=AsyncSession, expire_on_commit=False
+                )
+    return _async_sessionmaker
+
+
+# Async dependency
+async def get_async_db():
+    async with get_async_sessionmaker()() as db:
+        yield db
+
+
+async def dispose_async_engine():
+    global _async_engine, _async_sessionmaker
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
+        _async_sessionmaker = None
@@ -0,0 +1,140 @@
+"""
+Circuit breaker for watsonx calls.
+
+After CIRCUIT_FAILURE_THRESHOLD consecutive upstream failures (timeouts,
+connection errors, 429 and 5xx answers) the circuit opens and calls fail at
+once with CircuitOpen instead of waiting on a service that is down. After
+CIRCUIT_RESET_TIMEOUT seconds one probe call is let through (half-open):
+success closes the circuit, failure opens it again.
+
+Callers that can answer without the model (see rag.extractive) check
+is_upstream_failure to decide when to degrade.
+"""
+import threading
+import time
+from typing import Dict
+
+import requests
+
+from backend.config import settings
+from backend.granite.resilience import Throttled
+from backend.utils.metrics import registry
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+CIRCUIT_TRANSITIONS = registry.counter(
+    "granite_circuit_transitions_total", "watsonx circuit breaker state changes", labels=("state",)
+)
+CIRCUIT_REJECTED = registry.counter(
+    "granite_circuit_rejected_total", "watsonx calls failed fast because the circuit was open"
+)
+
+
+class CircuitOpen(Exception):
+    def __init__(self, retry_after: float):
+        super().__init__(f"watsonx circuit is open; retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+def is_upstream_failure(exc: BaseException) -> bool:
+    """Whether an error means watsonx is unavailable or over its latency budget (not a bad request)"""
+    if isinstance(exc, (CircuitOpen, Throttled, requests.Timeout, requests.ConnectionError)):
+        return True
+    if isinstance(exc, requests.HTTPError) and exc.response is not None:
+        return exc.response.status_code == 429 or exc.response.status_code >= 500
+    return False
+
+
+def failure_reason(exc: BaseException) -> str:
+    """Metric label for an upstream failure"""
+    if isinstance(exc, CircuitOpen):
+        return "circuit_open"
+    if isinstance(exc, Throttled):
+        return "throttled"
+    return "budget_exceeded" if isinstance(exc, requests.Timeout) else "upstream_error"
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        failure_threshold: int = settings.CIRCUIT_FAILURE_THRESHOLD,
+        reset_timeout: float = settings.CIRCUIT_RESET_TIMEOUT,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return HALF_OPEN
+            return self._state
+
+    @property
+    def is_open(self) -> bool:
+        """True while calls would be rejected (open, or half-open with the probe already out)"""
+        with self._lock:
+            if self._state == OPEN:
+                return time.monotonic() - self._opened_at < self.reset_timeout
+            return self._state == HALF_OPEN and self._probing
+
+    def before_call(self):
+        """Raise CircuitOpen unless a call may go upstream now"""
+        with self._lock:
+            now = time.monotonic()
+            if self._state == OPEN and now - self._opened_at >= self.reset_timeout:
+                self._transition(HALF_OPEN)
+            if self._state == OPEN or (self._state == HALF_OPEN and self._probing):
+                CIRCUIT_REJECTED.inc()
+                raise CircuitOpen(max(0.0, self.reset_timeout - (now - self._opened_at)))
+            if self._state == HALF_OPEN:
+                self._probing = True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._probing = False
+            if self._state != CLOSED:
+                self._transition(CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+                if self._state != OPEN:
+                    self._transition(OPEN)
+
+    def record(self, exc: BaseException):
+        """Count an error against the circuit if it means upstream is unavailable"""
+        if is_upstream_failure(exc):
+            self.record_failure()
+        else:
+            # watsonx answered (e.g. a 400), so it is up
+            self.record_success()
+
+    def abandon(self):
+        """A call ended without telling us anything (e.g. cancelled); let the next one probe"""
+        with self._lock:
+            self._probing = False
+
+    def _transition(self, state: str):
+        self._state = state
+        CIRCUIT_TRANSITIONS.inc(state=state)
+
+    def stats(self) -> Dict:
+        return {"state": self.state, "consecutive_failures": self._failures}
+
+
+granite_circuit = CircuitBreaker()
+registry.callback(
+    "granite_circuit_state", "watsonx circuit breaker state (0 closed, 1 half-open, 2 open)", "gauge",
+    lambda: {(): _STATE_VALUES[granite_circuit.state]},
+)
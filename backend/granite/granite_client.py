@@ -1,7 +1,78 @@
+import json
+import logging
+import socket
+import threading
 import time
 import requests
-from typing import List
+from typing import Dict, List, Optional
 from backend.config import settings
+from backend.granite.circuit_breaker import granite_circuit, is_upstream_failure
+from backend.granite.prompts import STOP_MATCHER, STOP_SEQUENCES, clean_answer
+from backend.granite.usage import usage_stats
+from backend.granite.resilience import (
+    GRANITE_RETRIES, THROTTLED, TRANSIENT, Throttled, backoff_delay, classify_error, classify_status,
+    retry_after_seconds, watsonx_quota,
+)
+from backend.utils.metrics import registry, record_stage, span
+
+logger = logging.getLogger(__name__)
+
+GRANITE_REQUESTS = registry.counter(
+    "granite_requests_total", "watsonx API calls by operation and outcome", labels=("operation", "status")
+)
+GRANITE_IN_FLIGHT = registry.gauge(
+    "granite_requests_in_flight", "watsonx API calls currently open", labels=("operation",)
+)
+GRANITE_TTFT = registry.histogram(
+    "granite_time_to_first_token_seconds", "Time from stream request to first generated token"
+)
+GRANITE_CANCELLED = registry.counter(
+    "granite_generations_cancelled_total", "Streamed generations closed before the model finished"
+)
+GRANITE_STOPPED = registry.counter(
+    "granite_generations_stopped_total", "Streamed generations closed early because a stop sequence came through"
+)
+GRANITE_TOKENS_SAVED = registry.counter(
+    "granite_tokens_saved_total",
+    "Estimated generation tokens not spent because a stream was cancelled "
+    "(mean length of completed streams minus tokens already generated)"
+)
+
+class StreamCancellation:
+    """
+    Cancel flag for a streamed generation. Setting it also shuts down the
+    upstream socket, so a read blocked waiting for the next token returns
+    at once instead of when the model produces it.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._response = None
+
+    def is_set(self) -> bool:
+        return self._event.is_set()
+
+    def attach(self, response):
+        with self._lock:
+            self._response = response
+        if self.is_set():
+            _shutdown_upstream(response)
+
+    def set(self):
+        self._event.set()
+        with self._lock:
+            response = self._response
+        if response is not None:
+            _shutdown_upstream(response)
+
+
+def _shutdown_upstream(response):
+    try:
+        response.raw.connection.sock.shutdown(socket.SHUT_RDWR)
+    except (AttributeError, OSError):
+        # Already closed, or not a plain socket connection; the next line read will see the flag
+        pass
 
 
 class GraniteClient:
@@ -16,6 +87,13 @@ class GraniteClient:
 
         self._access_token = None
         self._token_expiry = 0
+        # One refresh at a time, so concurrent callers don't all hit IAM when the token expires
+        self._token_lock = threading.Lock()
+
+        # Lengths of completed streams, to estimate what a cancelled one would have cost
+        self._stream_stats_lock = threading.Lock()
+        self._completed_streams = 0
+        self._completed_stream_tokens = 0
 
     # ===============================
     # 1️⃣ GET IAM ACCESS TOKEN
@@ -24,8 +102,16 @@ class GraniteClient:
         if self._access_token and time.time() < self._token_expiry:
             return self._access_token
 
-        response = requests.post(
-            "https://iam.cloud.ibm.com/identity/token",
+        with self._token_lock:
+            if self._access_token and time.time() < self._token_expiry:
+                return self._access_token
+            return self._refresh_iam_token()
+
+    def _refresh_iam_token(self) -> str:
+        response = self._post(
+            "iam_token",
+            settings.IBM_IAM_URL,
+            quota=False,
             headers={
                 "Content-Type": "application/x-www-form-urlencoded"
             },
@@ -33,7 +119,7 @@ class GraniteClient:
                 "grant_type": "urn:ibm:params:oauth:grant-type:apikey",
                 "apikey": self.api_key
             },
-            timeout=30
+            timeout=settings.BUDGET_IAM_TOKEN
         )
 
         response.raise_for_status()
@@ -44,6 +130,82 @@ class GraniteClient:
 
         return self._access_token
 
+    def _post(self, operation: str, url: str, quota: bool = True, **kwargs) -> requests.Response:
+        """POST to watsonx, timing the call as a stage and counting it by outcome"""
+        with span(operation), GRANITE_IN_FLIGHT.track_inprogress(operation=operation):
+            return self._send(operation, url, quota, **kwargs)
+
+    def _send(self, operation: str, url: str, quota: bool = True, **kwargs) -> requests.Response:
+        """
+        POST with the resilience policy (see granite.resilience): take a token
+        from the shared quota (IAM calls don't count against it), fail fast
+        with CircuitOpen while the circuit breaker is open, and retry throttled
+        and transient failures. Returns the last response, which may be an error.
+        """
+        granite_circuit.before_call()
+        deadline = time.monotonic() + settings.GRANITE_RETRY_MAX_WAIT
+        attempt = 0
+        while True:
+            if quota:
+                try:
+                    watsonx_quota.acquire(max(0.0, deadline - time.monotonic()))
+                except Throttled:
+                    granite_circuit.abandon()
+                    raise
+
+            try:
+                response = requests.post(url, **kwargs)
+            except requests.RequestException as e:
+                GRANITE_REQUESTS.inc(operation=operation, status="error")
+                delay = backoff_delay(attempt) if classify_error(e) == TRANSIENT else None
+                if self._can_retry(attempt, delay, deadline):
+                    logger.warning(f"watsonx {operation} request failed, retrying in {delay:.2f}s: {e}")
+                    GRANITE_RETRIES.inc(operation=operation, kind=TRANSIENT)
+                    time.sleep(delay)
+                    attempt += 1
+                    continue
+                granite_circuit.record(e)
+                logger.error(f"watsonx {operation} request failed: {e}")
+                raise
+
+            GRANITE_REQUESTS.inc(operation=operation, status=response.status_code)
+            kind = classify_status(response.status_code)
+            if kind in (THROTTLED, TRANSIENT):
+                delay = retry_after_seconds(response)
+                if delay is None:
+                    delay = backoff_delay(attempt)
+                if kind == THROTTLED and quota:
+                    # Everyone waits out the Retry-After, not just this call
+                    watsonx_quota.pause(delay)
+                if self._can_retry(attempt, delay, deadline):
+                    logger.warning(f"watsonx {operation} returned {response.status_code}, retrying in {delay:.2f}s")
+                    GRANITE_RETRIES.inc(operation=operation, kind=kind)
+                    response.close()
+                    if not (kind == THROTTLED and quota):
+                        time.sleep(delay)
+                    attempt += 1
+                    continue
+
+            self._record_status(response.status_code)
+            if not response.ok:
+                logger.error(f"watsonx {operation} returned {response.status_code}: {response.text}")
+            return response
+
+    @staticmethod
+    def _can_retry(attempt: int, delay: Optional[float], deadline: float) -> bool:
+        return (
+            delay is not None
+            and attempt < settings.GRANITE_MAX_RETRIES
+            and time.monotonic() + delay <= deadline
+        )
+
+    @staticmethod
+    def _record_status(status: int):
+        if status == 429 or status >= 500:
+            granite_circuit.record_failure()
+        else:
+            granite_circuit.record_success()
+
     # ===============================
     # 2️⃣ GENERATE EMBEDDINGS
     # ===============================
@@ -61,16 +223,13 @@ class GraniteClient:
             "Authorization": f"Bearer {token}"
         }
 
-        response = requests.post(
+        response = self._post(
+            "embedding",
             self.embedding_url,
             headers=headers,
             json=payload,
-            timeout=60
+            timeout=settings.BUDGET_EMBEDDING
         )
-
-        if not response.ok:
-            print("IBM RESPONSE:", response.text)
-
         response.raise_for_status()
 
         # print("DEBUG RESPONSE:", response.text)
@@ -104,11 +263,12 @@ class GraniteClient:
             }
             
             try:
-                response = requests.post(
+                response = self._post(
+                    "embedding",
                     self.embedding_url,
                     headers=headers,
                     json=payload,
-                    timeout=60
+                    timeout=settings.BUDGET_EMBEDDING + settings.BUDGET_EMBEDDING_PER_INPUT * (len(batch) - 1)
                 )
                 response.raise_for_status()
                 
@@ -117,7 +277,10 @@ class GraniteClient:
                 for result in results:
                     all_embeddings.append(result["embedding"])
             except Exception as e:
-                print(f"ERROR in batch embedding: {e}")
+                # Splitting the batch helps with a bad input, but multiplies the load on a throttled or failing API
+                if is_upstream_failure(e):
+                    raise
+                logger.error(f"Batch embedding failed, falling back to single requests: {e}")
                 # Fallback to individual embedding
                 for text in batch:
                     all_embeddings.append(self.generate_embedding(text))
@@ -130,58 +293,89 @@ class GraniteClient:
     def __call__(self, text: str) -> List[float]:
         return self.embed_query(text)
 
-    def generate_chat_response(self, prompt: str) -> str:
-        token = self._get_iam_token()
-
-        payload = {
-            "model_id": settings.GRANITE_CHAT_MODEL,
+    def _generation_payload(self, prompt: str, model: Optional[str], max_new_tokens: Optional[int]) -> Dict:
+        return {
+            "model_id": model or settings.GRANITE_CHAT_MODEL,
             "input": prompt,
             "project_id": self.project_id,
             "parameters": {
-                "temperature": 0.2,
-                "max_new_tokens": 400,
-                "stop_sequences": ["\nQuestion:", "\nUser:", "Question:"]
+                "temperature": settings.LLM_TEMPERATURE,
+                "max_new_tokens": max_new_tokens or settings.LLM_MAX_NEW_TOKENS,
+                "stop_sequences": STOP_SEQUENCES
             }
         }
 
-        response = requests.post(
+    def generate_chat_response(self, prompt: str, model: Optional[str] = None,
+                               max_new_tokens: Optional[int] = None) -> str:
+        """Blocking generation; `model` and `max_new_tokens` default to GRANITE_CHAT_MODEL and LLM_MAX_NEW_TOKENS"""
+        token = self._get_iam_token()
+        payload = self._generation_payload(prompt, model, max_new_tokens)
+
+        response = self._post(
+            "generation",
             f"{self.base_url}/ml/v1/text/generation?version=2024-05-01",
             headers={
                 "Authorization": f"Bearer {token}",
                 "Content-Type": "application/json"
             },
             json=payload,
-            timeout=60
+            timeout=settings.BUDGET_GENERATION
         )
-
         response.raise_for_status()
-        text = response.json()["results"][0]["generated_text"]
+        result = response.json()["results"][0]
+        usage_stats.record(
+            payload["model_id"], result.get("input_token_count", 0), result.get("generated_token_count", 0)
+        )
+        text = result["generated_text"]
         
         # Clean up response artifacts
-        for stop_seq in ["User Question:", "Question:", "\nUser:", "\nQuestion:"]:
-            if stop_seq in text:
-                text = text.split(stop_seq)[0]
-                
-        return text.strip()
+        return clean_answer(text)
 
-    def generate_chat_stream(self, prompt: str):
+    def generate_chat_stream(self, prompt: str, cancel: Optional[StreamCancellation] = None,
+                             model: Optional[str] = None, max_new_tokens: Optional[int] = None):
         """
         Generator function that streams tokens from IBM WatsonX
+        Setting `cancel` (or closing the generator) stops reading at the next
+        line and closes the upstream connection. Raises CircuitOpen while the
+        circuit breaker is open, and requests.Timeout if the first token
+        (or any later one) takes longer than BUDGET_FIRST_TOKEN.
+        Text is cut at the first stop sequence, which also ends the stream
+        and closes the connection. Tokens are counted even if the stream is
+        cancelled, since they were billed.
         """
         token = self._get_iam_token()
-        
-        payload = {
-            "model_id": settings.GRANITE_CHAT_MODEL,
-            "input": prompt,
-            "project_id": self.project_id,
-            "parameters": {
-                "temperature": 0.2,
-                "max_new_tokens": 400,
-                "stop_sequences": ["\nQuestion:", "\nUser:", "Question:"]
-            }
-        }
+        payload = self._generation_payload(prompt, model, max_new_tokens)
+
+        started = time.perf_counter()
+        progress = {"generated": 0, "input": 0, "finished": False, "connected": False}
+        failed = False
+        GRANITE_IN_FLIGHT.inc(operation="generation_stream")
+        try:
+            yield from self._stream_tokens(token, payload, started, progress, cancel)
+        except Exception as e:
+            failed = True
+            if progress["connected"]:
+                # Errors before that were counted by _send
+                granite_circuit.record(e)
+            raise
+        finally:
+            GRANITE_IN_FLIGHT.dec(operation="generation_stream")
+            record_stage("llm_stream", time.perf_counter() - started)
+            if progress["connected"]:
+                usage_stats.record(payload["model_id"], progress["input"], progress["generated"])
+            if progress["finished"]:
+                self._record_completed_stream(progress["generated"])
+            elif not failed:
+                if not progress["generated"]:
+                    granite_circuit.abandon()
+                self._record_cancelled_stream(progress["generated"], payload["parameters"]["max_new_tokens"])
 
-        with requests.post(
+    def _stream_tokens(self, token: str, payload: dict, started: float, progress: Dict,
+                       cancel: Optional[StreamCancellation] = None):
+        first_token = True
+        scanner = STOP_MATCHER.scanner()
+        response = self._send(
+            "generation_stream",
             f"{self.base_url}/ml/v1/text/generation_stream?version=2024-05-01",
             headers={
                 "Authorization": f"Bearer {token}",
@@ -190,24 +384,76 @@ class GraniteClient:
             },
             json=payload,
             stream=True,
-            timeout=60
-        ) as response:
+            timeout=settings.BUDGET_FIRST_TOKEN
+        )
+        with response:
             response.raise_for_status()
-            
-            for line in response.iter_lines():
-                if line:
-                    decoded_line = line.decode("utf-8")
-                    if decoded_line.startswith("data:"):
-                        import json
-                        try:
-                            data = json.loads(decoded_line[5:])
-                            results = data.get("results", [])
-                            if results:
-                                chunk = results[0].get("generated_text", "")
-                                if chunk:
-                                    yield chunk
-                        except:
-                            continue
+            progress["connected"] = True
+            if cancel is not None:
+                cancel.attach(response)
+
+            for line in self._iter_lines(response, cancel):
+                if cancel is not None and cancel.is_set():
+                    # Leaving the with-block closes the connection, so watsonx stops generating
+                    return
+                if not line:
+                    continue
+                decoded_line = line.decode("utf-8")
+                if not decoded_line.startswith("data:"):
+                    continue
+                try:
+                    data = json.loads(decoded_line[5:])
+                except ValueError:
+                    continue
+                results = data.get("results", [])
+                if not results:
+                    continue
+                progress["generated"] = results[0].get("generated_token_count", progress["generated"] + 1)
+                progress["input"] = results[0].get("input_token_count", progress["input"])
+                chunk = results[0].get("generated_text", "")
+                if chunk:
+                    if first_token:
+                        first_token = False
+                        granite_circuit.record_success()
+                        ttft = time.perf_counter() - started
+                        GRANITE_TTFT.observe(ttft)
+                        record_stage("llm_ttft", ttft)
+                    # Text that may be the start of a stop sequence is held back until it can't be
+                    text = scanner.feed(chunk)
+                    if text:
+                        yield text
+                    if scanner.stopped:
+                        # Leaving the with-block closes the connection, so watsonx stops generating
+                        GRANITE_STOPPED.inc()
+                        break
+            tail = scanner.flush()
+            if tail:
+                yield tail
+        if cancel is None or not cancel.is_set():
+            progress["finished"] = True
+
+    @staticmethod
+    def _iter_lines(response, cancel: Optional[StreamCancellation]):
+        """response.iter_lines, ending quietly if the read fails because we cancelled"""
+        try:
+            yield from response.iter_lines()
+        except Exception:
+            if cancel is None or not cancel.is_set():
+                raise
+
+    def _record_completed_stream(self, generated: int):
+        with self._stream_stats_lock:
+            self._completed_streams += 1
+            self._completed_stream_tokens += generated
+
+    def _record_cancelled_stream(self, generated: int, max_new_tokens: int):
+        with self._stream_stats_lock:
+            if self._completed_streams:
+                expected = self._completed_stream_tokens / self._completed_streams
+            else:
+                expected = max_new_tokens
+        GRANITE_CANCELLED.inc()
+        GRANITE_TOKENS_SAVED.inc(max(0, round(expected) - generated))
 
 
 # Backward compatibility
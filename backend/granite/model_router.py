@@ -0,0 +1,83 @@
+"""
+Model cascade by question complexity.
+
+Most questions that reach generation are short factual lookups ("What is
+the hostel fee?", "Is there a bus service?") that a small model answers
+from the retrieved context as well as the large one, in fewer and cheaper
+tokens. route_model sends those to GRANITE_SMALL_CHAT_MODEL with a tighter
+cap (LLM_SMALL_MAX_NEW_TOKENS) and everything else to GRANITE_CHAT_MODEL:
+
+    simple    one question of at most CASCADE_SIMPLE_MAX_WORDS words, with
+              no reasoning cue
+    complex   follow-ups (they need the conversation), several questions,
+              comparisons, explanations, advice, and long questions
+
+The rules lean towards "complex": a wrong "complex" costs tokens, a wrong
+"simple" costs answer quality.
+"""
+import re
+from dataclasses import dataclass
+from typing import Dict
+
+from backend.config import settings
+from backend.utils.metrics import registry
+
+SIMPLE, COMPLEX = "simple", "complex"
+
+LLM_ROUTES = registry.counter(
+    "llm_cascade_routes_total", "Generations routed by the model cascade, by question complexity", labels=("tier",)
+)
+
+_WORD = re.compile(r"[a-z0-9']+")
+_REASONING_CUES = {
+    "why", "explain", "compare", "comparison", "difference", "differences", "versus", "vs",
+    "better", "best", "should", "recommend", "suggest", "advice", "advise", "pros", "cons",
+    "describe", "elaborate", "detail", "detailed", "process", "procedure", "steps", "plan",
+}
+# "how much" / "how many" are lookups; other "how" questions ask for a procedure or an explanation
+_LOOKUP_AFTER_HOW = {"much", "many", "long", "far", "old"}
+_QUESTION_WORDS = {"what", "when", "where", "which", "who", "how", "is", "are", "does", "do", "can"}
+
+
+@dataclass(frozen=True)
+class ModelRoute:
+    tier: str
+    model: str
+    max_new_tokens: int
+
+
+def default_route() -> ModelRoute:
+    return ModelRoute(COMPLEX, settings.GRANITE_CHAT_MODEL, settings.LLM_MAX_NEW_TOKENS)
+
+
+def classify_question(question: str, follow_up: bool = False) -> str:
+    if follow_up:
+        return COMPLEX
+    words = _WORD.findall(question.lower())
+    if not words or len(words) > settings.CASCADE_SIMPLE_MAX_WORDS or question.count("?") > 1:
+        return COMPLEX
+    if _REASONING_CUES.intersection(words):
+        return COMPLEX
+    for word, following in zip(words, words[1:] + [""]):
+        if word == "how" and following not in _LOOKUP_AFTER_HOW:
+            return COMPLEX
+    # "What is the fee and when is the deadline" is two lookups; let the large model combine them
+    for i, word in enumerate(words[:-1]):
+        if word == "and" and words[i + 1] in _QUESTION_WORDS:
+            return COMPLEX
+    return SIMPLE
+
+
+def route_model(question: str, follow_up: bool = False) -> ModelRoute:
+    """The model and token cap to answer `question` with"""
+    tier = classify_question(question, follow_up)
+    LLM_ROUTES.inc(tier=tier)
+    if tier == SIMPLE:
+        return ModelRoute(
+            SIMPLE, settings.GRANITE_SMALL_CHAT_MODEL or settings.GRANITE_CHAT_MODEL, settings.LLM_SMALL_MAX_NEW_TOKENS
+        )
+    return default_route()
+
+
+def routing_stats() -> Dict[str, float]:
+    return {tier: LLM_ROUTES.value(tier=tier) for tier in (SIMPLE, COMPLEX)}
@@ -1,20 +1,30 @@
-SYSTEM_PROMPT = """
-You are a College Admission Assistant.
-Answer ONLY using the provided context.
-If the answer is not found, say:
-"This information is not available in the official admission documents."
-Always be accurate and concise.
-"""
-
-def build_prompt(context: str, question: str) -> str:
-    return f"""
-{SYSTEM_PROMPT}
+from backend.granite.stop_matcher import StopSequenceMatcher
 
+SYSTEM_PROMPT = """You are a helpful and professional admission assistant for Vishwakarma University.
+Your task is to answer the user's question based ONLY on the provided context.
+Answer directly and concisely. Do not make up new questions or answers.
+If the answer is not in the context, politely state that you don't have that information."""
+
+# Generation stops at these, so the model doesn't go on to invent the next question.
+# Providers may still return the sequence itself, so answers are cut at STOP_MATCHER too.
+STOP_SEQUENCES = ["\nQuestion:", "\nUser:", "Question:", "User Question:"]
+STOP_MATCHER = StopSequenceMatcher(STOP_SEQUENCES)
+
+
+def build_prompt(context: str, question: str, history: str = "") -> str:
+    # Earlier turns go after the context, so follow-ups like "and the hostel fee?" can be resolved
+    conversation = f"Conversation so far:\n{history}\n---\n\n" if history else ""
+    return f"""{SYSTEM_PROMPT}
+
+---
 Context:
 {context}
+---
+
+{conversation}User Question: {question}
+
+Assistant Answer:"""
 
-Question:
-{question}
 
-Answer:
-"""
+def clean_answer(answer: str) -> str:
+    return STOP_MATCHER.truncate(answer).strip()
@@ -0,0 +1,292 @@
+"""
+LLM providers.
+
+The RAG pipeline and the chat endpoints generate through get_llm(), which
+returns the provider selected by LLM_PROVIDER:
+
+    watsonx   Granite on IBM watsonx (GraniteClient), the default
+    local     a quantized GGUF model on CPU via llama-cpp-python, for
+              running offline and load-testing without network access
+
+With LLM_FALLBACK_PROVIDER set, calls go to the fallback while the primary
+is unavailable or when it fails before producing a token.
+
+Every provider has the same interface: generate(prompt, route) returns a
+cleaned answer, stream(prompt, cancel, route) yields text chunks and stops
+reading (and releases the model) once `cancel` is set, and astream(prompt,
+route) runs stream in a worker thread for async callers. `route` is the
+model cascade's choice of model and token cap (see granite.model_router);
+providers with a single model only apply the cap. `available` tells the
+pipeline whether to try generating at all or answer extractively instead.
+"""
+import asyncio
+import importlib.util
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import AsyncGenerator, Dict, Iterator, Optional
+
+from fastapi.concurrency import run_in_threadpool
+
+from backend.config import settings
+from backend.granite.circuit_breaker import granite_circuit, is_upstream_failure
+from backend.granite.granite_client import GraniteClient, StreamCancellation, granite_embeddings
+from backend.granite.model_router import ModelRoute, default_route
+from backend.granite.prompts import STOP_SEQUENCES, clean_answer
+from backend.granite.usage import usage_stats
+from backend.utils.metrics import record_stage, registry, span
+
+logger = logging.getLogger(__name__)
+
+LLM_FAILOVERS = registry.counter(
+    "llm_failovers_total", "Generations handed to the fallback provider, by provider", labels=("provider",)
+)
+
+_END = object()
+
+
+class LLMProvider:
+    name = "base"
+
+    @property
+    def available(self) -> bool:
+        return True
+
+    def generate(self, prompt: str, route: Optional[ModelRoute] = None) -> str:
+        return clean_answer("".join(self.stream(prompt, route=route)))
+
+    def stream(self, prompt: str, cancel: Optional[StreamCancellation] = None,
+               route: Optional[ModelRoute] = None) -> Iterator[str]:
+        raise NotImplementedError
+
+    def warm(self):
+        """Load whatever the first call would otherwise wait for"""
+
+    async def astream(self, prompt: str, route: Optional[ModelRoute] = None) -> AsyncGenerator[str, None]:
+        """
+        Async version of stream. The stream is read by one worker thread;
+        closing this generator (client disconnect, task cancellation) sets
+        the cancel flag, so the provider stops generating instead of
+        running to max_new_tokens.
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        cancel = StreamCancellation()
+
+        def deliver(item):
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+            except RuntimeError:
+                # The event loop is gone (shutdown); nobody is listening any more
+                cancel.set()
+
+        def produce():
+            stream = self.stream(prompt, cancel=cancel, route=route)
+            try:
+                for chunk in stream:
+                    deliver(chunk)
+                    if cancel.is_set():
+                        break
+            except Exception as e:
+                deliver(e)
+            finally:
+                stream.close()
+                deliver(_END)
+
+        producer = asyncio.ensure_future(run_in_threadpool(produce))
+        try:
+            while True:
+                item = await queue.get()
+                if item is _END:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            cancel.set()
+            # Don't wait for the thread; it notices the flag at its next read and exits
+            producer.add_done_callback(lambda f: f.cancelled() or f.exception())
+
+
+class WatsonxProvider(LLMProvider):
+    name = "watsonx"
+
+    def __init__(self, client: GraniteClient = granite_embeddings):
+        self.client = client
+
+    @property
+    def available(self) -> bool:
+        return not granite_circuit.is_open
+
+    def generate(self, prompt: str, route: Optional[ModelRoute] = None) -> str:
+        route = route or default_route()
+        return self.client.generate_chat_response(prompt, model=route.model, max_new_tokens=route.max_new_tokens)
+
+    def stream(self, prompt: str, cancel: Optional[StreamCancellation] = None,
+               route: Optional[ModelRoute] = None) -> Iterator[str]:
+        route = route or default_route()
+        return self.client.generate_chat_stream(
+            prompt, cancel=cancel, model=route.model, max_new_tokens=route.max_new_tokens
+        )
+
+
+class LocalProvider(LLMProvider):
+    """
+    A quantized model run on CPU by llama.cpp. The model is loaded on first
+    use (or at warm-up) and serves one generation at a time, since a llama.cpp
+    context is not thread-safe; concurrency is still capped by the LLM slots.
+    """
+    name = "local"
+
+    def __init__(self, model_path: str = settings.LOCAL_MODEL_PATH):
+        self.model_path = model_path
+        self._model = None
+        self._load_lock = threading.Lock()
+        self._generate_lock = threading.Lock()
+
+    @property
+    def available(self) -> bool:
+        if self._model is not None:
+            return True
+        return Path(self.model_path).is_file() and importlib.util.find_spec("llama_cpp") is not None
+
+    def load(self):
+        if self._model is None:
+            with self._load_lock:
+                if self._model is None:
+                    try:
+                        from llama_cpp import Llama
+                    except ImportError as e:
+                        raise RuntimeError(
+                            "The local LLM provider needs llama-cpp-python: pip install llama-cpp-python"
+                        ) from e
+                    with span("local_model_load"):
+                        self._model = Llama(
+                            model_path=self.model_path,
+                            n_ctx=settings.LOCAL_MODEL_CONTEXT,
+                            n_threads=settings.LOCAL_MODEL_THREADS or None,
+                            verbose=False,
+                        )
+                    logger.info(f"Loaded local model {self.model_path}")
+        return self._model
+
+    def warm(self):
+        self.load()
+
+    def stream(self, prompt: str, cancel: Optional[StreamCancellation] = None,
+               route: Optional[ModelRoute] = None) -> Iterator[str]:
+        model = self.load()
+        route = route or default_route()
+        started = time.perf_counter()
+        first_token = True
+        generated = 0
+        with self._generate_lock:
+            chunks = model(
+                prompt,
+                max_tokens=route.max_new_tokens,
+                temperature=settings.LLM_TEMPERATURE,
+                stop=STOP_SEQUENCES,
+                stream=True,
+            )
+            try:
+                for chunk in chunks:
+                    if cancel is not None and cancel.is_set():
+                        # Closing the generator stops llama.cpp before the next token
+                        return
+                    generated += 1
+                    text = chunk["choices"][0]["text"]
+                    if not text:
+                        continue
+                    if first_token:
+                        first_token = False
+                        record_stage("llm_ttft", time.perf_counter() - started)
+                    yield text
+            finally:
+                chunks.close()
+                record_stage("llm_stream", time.perf_counter() - started)
+                # Each streamed chunk is one token
+                usage_stats.record(self.name, len(model.tokenize(prompt.encode("utf-8"))), generated)
+
+
+class FailoverProvider(LLMProvider):
+    """
+    The primary provider, or the fallback while the primary is unavailable
+    or when it fails upstream before its first token. Once a stream has
+    produced text it can't be switched.
+    """
+
+    def __init__(self, primary: LLMProvider, fallback: LLMProvider):
+        self.primary = primary
+        self.fallback = fallback
+        self.name = f"{primary.name}+{fallback.name}"
+
+    @property
+    def available(self) -> bool:
+        return self.primary.available or self.fallback.available
+
+    def _failover(self, exc: Optional[BaseException] = None) -> LLMProvider:
+        if exc is not None:
+            logger.warning(f"{self.primary.name} failed, using {self.fallback.name}: {exc}")
+        LLM_FAILOVERS.inc(provider=self.fallback.name)
+        return self.fallback
+
+    def generate(self, prompt: str, route: Optional[ModelRoute] = None) -> str:
+        if not self.primary.available:
+            return self._failover().generate(prompt, route)
+        try:
+            return self.primary.generate(prompt, route)
+        except Exception as e:
+            if not is_upstream_failure(e) or not self.fallback.available:
+                raise
+            return self._failover(e).generate(prompt, route)
+
+    def stream(self, prompt: str, cancel: Optional[StreamCancellation] = None,
+               route: Optional[ModelRoute] = None) -> Iterator[str]:
+        if not self.primary.available:
+            yield from self._failover().stream(prompt, cancel, route)
+            return
+        produced = False
+        try:
+            for chunk in self.primary.stream(prompt, cancel, route):
+                produced = True
+                yield chunk
+        except Exception as e:
+            if produced or not is_upstream_failure(e) or not self.fallback.available:
+                raise
+            yield from self._failover(e).stream(prompt, cancel, route)
+
+    def warm(self):
+        self.primary.warm()
+        if self.fallback.available:
+            self.fallback.warm()
+
+
+PROVIDERS: Dict[str, type] = {
+    "watsonx": WatsonxProvider,
+    "local": LocalProvider,
+}
+
+
+def build_provider(name: str) -> LLMProvider:
+    try:
+        return PROVIDERS[name.strip().lower()]()
+    except KeyError:
+        raise ValueError(f"Unknown LLM provider {name!r}; expected one of {', '.join(PROVIDERS)}") from None
+
+
+_llm: Optional[LLMProvider] = None
+_llm_lock = threading.Lock()
+
+
+def get_llm() -> LLMProvider:
+    """The provider from LLM_PROVIDER, wrapped with LLM_FALLBACK_PROVIDER if one is set"""
+    global _llm
+    if _llm is None:
+        with _llm_lock:
+            if _llm is None:
+                llm = build_provider(settings.LLM_PROVIDER)
+                if settings.LLM_FALLBACK_PROVIDER:
+                    llm = FailoverProvider(llm, build_provider(settings.LLM_FALLBACK_PROVIDER))
+                _llm = llm
+    return _llm
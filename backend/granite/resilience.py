@@ -0,0 +1,123 @@
+"""
+Retries and client-side throttling for watsonx calls.
+
+Every embedding and generation request first takes a token from one
+shared bucket sized to our watsonx quota (WATSONX_REQUESTS_PER_SECOND), so
+a burst is smoothed out here instead of being bounced by the API. A 429
+pauses the bucket for the Retry-After the API asked for, for every caller.
+
+Failed calls are classified:
+
+    throttled   429                          retry after Retry-After (or backoff)
+    transient   502/503/504, connection      retry with exponential backoff + full jitter
+    fatal       other 4xx/5xx, timeouts      no retry (a timeout already used up the budget)
+
+and retried at most GRANITE_MAX_RETRIES times, as long as the total wait
+stays under GRANITE_RETRY_MAX_WAIT.
+"""
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+import requests
+
+from backend.config import settings
+from backend.utils.metrics import registry
+
+THROTTLED, TRANSIENT, FATAL = "throttled", "transient", "fatal"
+
+GRANITE_RETRIES = registry.counter(
+    "granite_retries_total", "watsonx calls retried, by operation and error class", labels=("operation", "kind")
+)
+QUOTA_WAIT = registry.histogram(
+    "granite_quota_wait_seconds", "Time calls waited on the client-side watsonx quota"
+)
+
+
+class Throttled(Exception):
+    """The client-side quota can't admit a call within its wait budget"""
+
+    def __init__(self, wait: float):
+        super().__init__(f"watsonx quota exhausted; next slot in {wait:.1f}s")
+        self.retry_after = wait
+
+
+def classify_status(status: int) -> Optional[str]:
+    if status == 429:
+        return THROTTLED
+    if status in (502, 503, 504):
+        return TRANSIENT
+    return FATAL if status >= 400 else None
+
+
+def classify_error(exc: BaseException) -> str:
+    # A timeout means the call overran its latency budget; retrying would overrun it again
+    if isinstance(exc, requests.ConnectionError) and not isinstance(exc, requests.Timeout):
+        return TRANSIENT
+    return FATAL
+
+
+def retry_after_seconds(response: requests.Response) -> Optional[float]:
+    """The Retry-After header in seconds (it may be a number or an HTTP date)"""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, base: float = settings.GRANITE_BACKOFF_BASE,
+                  cap: float = settings.GRANITE_BACKOFF_MAX) -> float:
+    """Full jitter: uniform in [0, min(cap, base * 2^attempt)]"""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class QuotaBucket:
+    """
+    Token bucket shared by every watsonx call. Tokens are reserved ahead
+    (the count may go negative), so waiting callers are served in order.
+    """
+
+    def __init__(self, rate: float = settings.WATSONX_REQUESTS_PER_SECOND, burst: int = settings.WATSONX_BURST):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, max_wait: float) -> float:
+        """
+        Take a token, sleeping until it is due; raises Throttled if that is
+        more than max_wait away. With rate <= 0 only pauses are applied.
+        """
+        with self._lock:
+            now = time.monotonic()
+            wait = max(0.0, self._paused_until - now)
+            if self.rate > 0:
+                self._tokens = min(float(self.burst), self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                wait = max(wait, max(-self._tokens + 1, 0.0) / self.rate)
+            if wait > max_wait:
+                raise Throttled(wait)
+            self._tokens -= 1
+        if wait > 0:
+            time.sleep(wait)
+        QUOTA_WAIT.observe(wait)
+        return wait
+
+    def pause(self, seconds: float):
+        """Hold every caller back, e.g. for the Retry-After of a 429"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+watsonx_quota = QuotaBucket()
@@ -0,0 +1,105 @@
+"""
+Incremental stop-sequence matching.
+
+The model sometimes goes on past its answer and starts the next turn
+("User Question: ..."). StopSequenceMatcher is an Aho-Corasick automaton
+over the stop sequences, so all of them are looked for in one pass, one
+state transition per character, however the text is split into chunks.
+
+For streams, a StopScanner is fed chunk by chunk. It passes text through
+as soon as it can't be the start of a stop sequence, and holds back only
+the longest suffix that is still a prefix of one (e.g. "\\nUs" after
+"...per year\\nUs"). Once a sequence completes, everything from its
+start on is dropped and `stopped` is set, so the caller can close the
+upstream stream instead of generating to the token cap.
+
+Text is cut at the first stop sequence to complete. Where several
+complete on the same character, the cut is at the start of the longest
+one ("User Question:" rather than "Question:").
+"""
+from typing import Dict, List
+
+
+class StopSequenceMatcher:
+    def __init__(self, patterns: List[str]):
+        patterns = [p for p in patterns if p]
+        # Trie: per state, its transitions, its depth (chars matched), and the
+        # length of the longest pattern ending there (0 if none)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._depth = [0]
+        self._match = [0]
+        for pattern in patterns:
+            state = 0
+            for ch in pattern:
+                if ch not in self._goto[state]:
+                    self._goto.append({})
+                    self._depth.append(self._depth[state] + 1)
+                    self._match.append(0)
+                    self._goto[state][ch] = len(self._goto) - 1
+                state = self._goto[state][ch]
+            self._match[state] = max(self._match[state], len(pattern))
+
+        # Failure links, breadth-first: the longest proper suffix that is also in the trie
+        self._fail = [0] * len(self._goto)
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for ch, child in self._goto[state].items():
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(ch, 0)
+                # A pattern ending at the suffix state also ends here
+                self._match[child] = max(self._match[child], self._match[self._fail[child]])
+                queue.append(child)
+
+    def step(self, state: int, ch: str) -> int:
+        while state and ch not in self._goto[state]:
+            state = self._fail[state]
+        return self._goto[state].get(ch, 0)
+
+    def truncate(self, text: str) -> str:
+        """`text` up to the first stop sequence"""
+        state = 0
+        for i, ch in enumerate(text):
+            state = self.step(state, ch)
+            if self._match[state]:
+                return text[:i + 1 - self._match[state]]
+        return text
+
+    def scanner(self) -> "StopScanner":
+        return StopScanner(self)
+
+
+class StopScanner:
+    """Matching state for one stream"""
+
+    def __init__(self, matcher: StopSequenceMatcher):
+        self._matcher = matcher
+        self._state = 0
+        self._held = ""
+        self.stopped = False
+
+    def feed(self, chunk: str) -> str:
+        """The part of the text so far that can be emitted now"""
+        if self.stopped:
+            return ""
+        matcher = self._matcher
+        text = self._held + chunk
+        offset = len(self._held)
+        state = self._state
+        for i, ch in enumerate(chunk):
+            state = matcher.step(state, ch)
+            if matcher._match[state]:
+                self.stopped = True
+                self._held = ""
+                return text[:offset + i + 1 - matcher._match[state]]
+        self._state = state
+        # The current state's depth is the longest suffix that could still become a stop sequence
+        split = len(text) - matcher._depth[state]
+        self._held = text[split:]
+        return text[:split]
+
+    def flush(self) -> str:
+        """Held-back text, once the stream has ended without completing a stop sequence"""
+        held, self._held = self._held, ""
+        return "" if self.stopped else held
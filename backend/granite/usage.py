@@ -0,0 +1,65 @@
+"""
+Token accounting for LLM calls.
+
+watsonx reports input_token_count and generated_token_count with every
+generation (the local provider counts its own). The counts are added up
+per API endpoint (the request being served, see metrics.current_endpoint)
+and model, exported as llm_tokens_total and kept in process for
+/api/admin/llm/usage. Generations on GRANITE_SMALL_CHAT_MODEL also add an
+estimate of the large-model tokens they saved, from CASCADE_SMALL_COST_RATIO.
+"""
+import threading
+from typing import Dict, Optional, Tuple
+
+from backend.config import settings
+from backend.utils.metrics import current_endpoint, registry
+
+LLM_CALLS = registry.counter(
+    "llm_calls_total", "LLM generations by endpoint and model", labels=("endpoint", "model")
+)
+LLM_TOKENS = registry.counter(
+    "llm_tokens_total", "LLM tokens by endpoint, model and direction (input or output)",
+    labels=("endpoint", "model", "direction")
+)
+LLM_TOKENS_SAVED = registry.counter(
+    "llm_cascade_tokens_saved_total",
+    "Estimated large-model tokens saved by generating on the small model "
+    "(tokens used times 1 - CASCADE_SMALL_COST_RATIO)"
+)
+
+
+class UsageStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (endpoint, model) -> {"calls", "input_tokens", "output_tokens"}
+        self._usage: Dict[Tuple[str, str], Dict[str, int]] = {}
+        self.tokens_saved = 0.0
+
+    def record(self, model: str, input_tokens: int, output_tokens: int, endpoint: Optional[str] = None):
+        endpoint = endpoint or current_endpoint()
+        LLM_CALLS.inc(endpoint=endpoint, model=model)
+        LLM_TOKENS.inc(input_tokens, endpoint=endpoint, model=model, direction="input")
+        LLM_TOKENS.inc(output_tokens, endpoint=endpoint, model=model, direction="output")
+
+        saved = 0.0
+        if settings.GRANITE_SMALL_CHAT_MODEL and model == settings.GRANITE_SMALL_CHAT_MODEL != settings.GRANITE_CHAT_MODEL:
+            saved = (input_tokens + output_tokens) * (1 - settings.CASCADE_SMALL_COST_RATIO)
+            LLM_TOKENS_SAVED.inc(saved)
+
+        with self._lock:
+            usage = self._usage.setdefault((endpoint, model), {"calls": 0, "input_tokens": 0, "output_tokens": 0})
+            usage["calls"] += 1
+            usage["input_tokens"] += input_tokens
+            usage["output_tokens"] += output_tokens
+            self.tokens_saved += saved
+
+    def stats(self) -> Dict:
+        endpoints: Dict[str, Dict] = {}
+        with self._lock:
+            for (endpoint, model), usage in sorted(self._usage.items()):
+                endpoints.setdefault(endpoint, {})[model] = dict(usage)
+            tokens_saved = self.tokens_saved
+        return {"endpoints": endpoints, "tokens_saved": round(tokens_saved)}
+
+
+usage_stats = UsageStats()
@@ -4,10 +4,20 @@ import os
 # Add parent directory to sys.path to allow running from backend/ directory
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from backend.config import settings
-from backend.database import Base, engine
+from backend.database import Base, engine, dispose_async_engine
+from backend.auth.auth_utils import shutdown_hash_pool
+from backend.models.chat_log import ChatLog  # noqa: F401  (register table for create_all)
+from backend.services.chat_log_sink import chat_log_sink
+from backend.services.feedback_store import feedback_store
+from backend.services.warmup import warmup
+from backend.services.admission import AdmissionRejected, rejection_response
+from backend.utils.metrics import registry, ServerTimingMiddleware
 
 
 from backend.auth.routes import router as auth_router
@@ -15,11 +25,32 @@ from backend.api.query import router as query_router
 from backend.api.ingest import router as ingest_router
 from backend.api.admin import router as admin_router
 from backend.api.chat import router as chat_router
+from backend.api.chat_ws import router as chat_ws_router
 from backend.api.feedback import router as feedback_router
+from backend.api.recommend import router as recommend_router
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # ✅ Create DB tables
+    await run_in_threadpool(Base.metadata.create_all, bind=engine)
+
+    # ✅ Background writers
+    await chat_log_sink.start()
+    await feedback_store.start()
+
+    # ✅ Load indexes in the background; /ready reports when they are in memory
+    warmup.start()
+    yield
+    await warmup.stop()
+    await feedback_store.stop()
+    await chat_log_sink.stop()
+    await dispose_async_engine()
+    shutdown_hash_pool()
 
 
 # ✅ CREATE APP ONCE
-app = FastAPI(title=settings.APP_NAME)
+app = FastAPI(title=settings.APP_NAME, lifespan=lifespan)
 
 # ✅ CORS Configuration
 app.add_middleware(
@@ -28,10 +59,17 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
 
-# ✅ Create DB tables
-Base.metadata.create_all(bind=engine)
+# ✅ Per-stage timings (Server-Timing header) and request metrics
+app.add_middleware(ServerTimingMiddleware)
+
+
+# ✅ Admission control: rate-limited or queued-out requests get 429 + Retry-After
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected(request, exc: AdmissionRejected):
+    return rejection_response(exc)
 
 # ✅ Routers
 app.include_router(auth_router, prefix="/auth", tags=["Auth"])
@@ -39,10 +77,25 @@ app.include_router(query_router, prefix="/api", tags=["Query"])
 app.include_router(ingest_router, prefix="/api", tags=["Ingest"])
 app.include_router(admin_router, prefix="/api", tags=["Admin"])
 app.include_router(chat_router, prefix="/api", tags=["Chat"])
+app.include_router(chat_ws_router, prefix="/api", tags=["Chat"])
 app.include_router(feedback_router, prefix="/api", tags=["Feedback"])
+app.include_router(recommend_router, prefix="/api", tags=["Recommend"])
 
 
 @app.get("/")
 @app.get("/health")
 def root():
     return {"status": "ok", "message": "College Admission Agent is running"}
+
+
+@app.get("/ready")
+def ready():
+    """Readiness: 503 until the startup warm-up has loaded every index"""
+    report = warmup.report()
+    return JSONResponse(report, status_code=200 if report["ready"] else 503)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Prometheus text-format metrics"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
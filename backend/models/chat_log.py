@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy import Column, Integer, String, DateTime, Float, Text
 from datetime import datetime
 from backend.database import Base
 
@@ -9,4 +9,7 @@ class ChatLog(Base):
     id = Column(Integer, primary_key=True, index=True)
     question = Column(String)
     answer = Column(String)
+    endpoint = Column(String, nullable=True)
+    latency_ms = Column(Float, nullable=True)
+    sources = Column(Text, nullable=True)  # JSON-encoded list of source dicts
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -1,15 +1,18 @@
 # backend/rag/document_ingestion.py
 
 from pathlib import Path
-from langchain_core.documents import Document
 from backend.granite.granite_client import granite_embeddings
 from backend.rag.vector_store import VectorStore
 from backend.rag.chunking import chunk_text
+from backend.rag.faq_index import build_faq_index, add_faq_document
+from backend.services.deadline_service import get_deadline_index
 
 DATA_DIR = Path("backend/data")
 
 
 def ingest_document(file_path: str):
+    from langchain_core.documents import Document
+
     vector_store = VectorStore()
 
     text = Path(file_path).read_text(encoding="utf-8")
@@ -22,11 +25,17 @@ def ingest_document(file_path: str):
     vector_store.add_documents(documents, granite_embeddings)
     vector_store.save()
 
+    add_faq_document(file_path)
+    get_deadline_index().update_document(file_path)
+
 
 def ingest_all_documents(data_dir: Path = DATA_DIR):
+    from langchain_core.documents import Document
+
     vector_store = VectorStore()
 
-    for file in data_dir.glob("**/*.txt"):
+    files = list(data_dir.glob("**/*.txt"))
+    for file in files:
         text = file.read_text(encoding="utf-8")
         chunks = chunk_text(text)
 
@@ -34,3 +43,6 @@ def ingest_all_documents(data_dir: Path = DATA_DIR):
         vector_store.add_documents(documents, granite_embeddings)
 
     vector_store.save()
+
+    build_faq_index(files, data_dir)
+    get_deadline_index().refresh()
@@ -1,7 +1,5 @@
 
-from backend.granite.granite_client import GraniteClient
-
-granite = GraniteClient()
+from backend.granite.granite_client import granite_embeddings as granite
 
 
 def get_embedding(text: str) -> list[float]:
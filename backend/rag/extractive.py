@@ -0,0 +1,166 @@
+"""
+Extractive answers for degraded mode.
+
+While watsonx is unavailable (circuit open) or over its latency budget, the
+chat endpoints answer with the retrieved sentences that best match the
+question instead of a generated answer. The candidate sentences and the
+question become TF-IDF vectors and are scored with one matrix-vector
+product, so an answer takes milliseconds.
+
+The query embedding comes from watsonx too, so when retrieval itself fails
+the candidate chunks come from a lexical index over the vector store's
+documents.
+"""
+import math
+import re
+import threading
+from collections import Counter
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from backend.config import settings
+from backend.rag.faq_index import _normalize_rows, _tokenize
+from backend.rag.retriever import _format_results, vector_store
+from backend.utils.metrics import registry, span
+
+DEGRADED_ANSWERS = registry.counter(
+    "chat_degraded_answers_total", "Extractive answers served instead of generated ones, by cause",
+    labels=("reason",)
+)
+
+# Chunking flattens each file onto one line, so besides sentence ends, list
+# items ("- ...") mark fragment boundaries too
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+|\n+|\s+-\s+")
+# Document headers (see backend/data). Flattened, only the last one is followed
+# by the text itself, so its value is taken to be one word.
+_HEADER_KEY = r"(?:SOURCE|ACADEMIC_YEAR|CATEGORY|PROGRAM|DURATION):"
+_HEADER = re.compile(rf"^(?:{_HEADER_KEY}\s.*?\s(?={_HEADER_KEY}))*{_HEADER_KEY}\s+\S+\s*")
+# A heading that ended up at the end of the previous item ("... per year Placements:")
+_TRAILING_LABEL = re.compile(r"(?:^|\s)((?:[A-Z][\w’]*\s){0,2}[A-Z][\w’]*(?:\s\([\w’]+\))?:)$")
+_MIN_SENTENCE_CHARS = 15
+
+
+def _split_sentences(context: str) -> List[str]:
+    """
+    Sentences and list items. Items are prefixed with their heading
+    ("Fee: ₹3,10,000 per year") and FAQ answers with their question.
+    """
+    sentences, seen = [], set()
+    label = ""
+    for part in _SENTENCE_SPLIT.split(context):
+        part = _HEADER.sub("", part.strip())
+        trailing = _TRAILING_LABEL.search(part)
+        if trailing:
+            part = part[:trailing.start()].strip()
+
+        if part and part[-1] in ".!?":
+            label = ""
+        elif part and label:
+            part = f"{label} {part}"
+        if part.startswith("A:") and sentences and sentences[-1].startswith("Q:"):
+            sentences[-1] = f"{sentences[-1]} {part}"
+        elif len(part) >= _MIN_SENTENCE_CHARS and not part.endswith(":") and part not in seen:
+            seen.add(part)
+            sentences.append(part)
+
+        if trailing:
+            label = trailing.group(1)
+    return sentences
+
+
+def extractive_answer(question: str, context: str, max_sentences: int = settings.DEGRADED_MAX_SENTENCES) -> Optional[str]:
+    """
+    The sentences of `context` most similar to the question, in their
+    original order, or None if none shares a term with it.
+    """
+    query_tokens = _tokenize(question)
+    sentences = _split_sentences(context)
+    if not query_tokens or not sentences:
+        return None
+
+    with span("extractive"):
+        docs = [_tokenize(s) for s in sentences]
+        vocab = {t: i for i, t in enumerate(sorted({t for doc in docs for t in doc}))}
+        doc_freq = Counter(t for doc in docs for t in set(doc))
+        idf = np.array(
+            [math.log((1 + len(docs)) / (1 + doc_freq[t])) + 1 for t in vocab], dtype=np.float32
+        )
+
+        matrix = np.zeros((len(docs), len(vocab)), dtype=np.float32)
+        for row, doc in enumerate(docs):
+            for token, count in Counter(doc).items():
+                matrix[row, vocab[token]] = count
+        matrix = _normalize_rows(matrix * idf)
+
+        query = np.zeros(len(vocab), dtype=np.float32)
+        for token, count in Counter(query_tokens).items():
+            if token in vocab:
+                query[vocab[token]] = count
+        if not query.any():
+            return None
+        query *= idf
+
+        scores = matrix @ query
+        best = np.argsort(-scores)[:max_sentences]
+        best = sorted(int(i) for i in best if scores[i] > 0)
+    return "\n".join(sentences[i] for i in best)
+
+
+class LexicalIndex:
+    """
+    TF-IDF postings over the vector store's chunks, for retrieval that
+    needs no query embedding. Built on first use and rebuilt when the
+    number of indexed chunks changes (after ingestion).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._size = -1
+        self._docs = []
+        # token -> (chunk rows, weights)
+        self._postings: Dict[str, tuple] = {}
+
+    def _build(self, store):
+        docs = [store.docstore.search(doc_id) for doc_id in store.index_to_docstore_id.values()]
+        tokens = [Counter(_tokenize(doc.page_content)) for doc in docs]
+        rows_by_token: Dict[str, List[int]] = {}
+        for row, counts in enumerate(tokens):
+            for token in counts:
+                rows_by_token.setdefault(token, []).append(row)
+
+        norms = np.zeros(len(docs), dtype=np.float32)
+        weights_by_token = {}
+        for token, rows in rows_by_token.items():
+            idf = math.log((1 + len(docs)) / (1 + len(rows))) + 1
+            weights = np.array([tokens[row][token] * idf for row in rows], dtype=np.float32)
+            norms[rows] += weights ** 2
+            weights_by_token[token] = (np.array(rows), weights, idf)
+
+        norms = np.maximum(np.sqrt(norms), 1e-12)
+        self._postings = {
+            token: (rows, weights / norms[rows], idf) for token, (rows, weights, idf) in weights_by_token.items()
+        }
+        self._docs = docs
+        self._size = len(store.index_to_docstore_id)
+
+    def search(self, question: str, k: int = 5) -> Dict:
+        """Top-k chunks by TF-IDF cosine, in the same shape as retrieve_context"""
+        store = vector_store.store
+        if store is None:
+            return {"context": "", "sources": []}
+        with self._lock:
+            if self._size != len(store.index_to_docstore_id):
+                self._build(store)
+            postings, docs = self._postings, self._docs
+
+        scores = np.zeros(len(docs), dtype=np.float32)
+        for token, count in Counter(_tokenize(question)).items():
+            if token in postings:
+                rows, weights, idf = postings[token]
+                scores[rows] += weights * (count * idf)
+        best = [int(i) for i in np.argsort(-scores)[:k] if scores[i] > 0]
+        return _format_results([docs[i] for i in best])
+
+
+lexical_index = LexicalIndex()
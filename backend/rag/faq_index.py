@@ -0,0 +1,262 @@
+"""
+FAQ fast path.
+
+Q/A pairs found in the knowledge base (e.g. data/faq/general_faq.txt) are
+indexed at ingestion time into a small lexical (TF-IDF) and vector index.
+Questions that match an FAQ above the configured threshold are answered
+directly from the stored answer, without retrieval or a Granite generation.
+"""
+import logging
+import math
+import pickle
+import re
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from backend.config import settings
+from backend.granite.granite_client import granite_embeddings
+from backend.rag.vector_store import VECTOR_DIR
+from backend.utils.metrics import register_cache
+
+logger = logging.getLogger(__name__)
+
+FAQ_INDEX_FILE = VECTOR_DIR / "faq_index.pkl"
+KNOWLEDGE_BASE_DIR = Path(__file__).resolve().parent.parent / "data"
+
+_QA_PATTERN = re.compile(
+    r"^\s*Q:\s*(?P<question>.+?)\s*\n\s*A:\s*(?P<answer>.+?)\s*(?=\n\s*\n|\n\s*Q:|\Z)",
+    re.MULTILINE | re.DOTALL,
+)
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+_STOPWORDS = {
+    "a", "an", "the", "is", "are", "was", "were", "be", "do", "does", "did",
+    "i", "you", "we", "my", "your", "it", "of", "to", "for", "in", "on", "at",
+    "and", "or", "there", "any", "can", "please", "tell", "me", "about", "what",
+}
+
+
+def parse_faq_pairs(text: str, source: str) -> List[Dict]:
+    """Extract Q/A pairs from a knowledge base document"""
+    pairs = []
+    for match in _QA_PATTERN.finditer(text):
+        question = " ".join(match.group("question").split())
+        answer = " ".join(match.group("answer").split())
+        if question and answer:
+            pairs.append({"question": question, "answer": answer, "source": source})
+    return pairs
+
+
+def _tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN_PATTERN.findall(text.lower()) if t not in _STOPWORDS]
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+
+class FAQIndex:
+    def __init__(self, entries: List[Dict], embeddings: Optional[List[List[float]]] = None):
+        self.entries = entries
+
+        # Lexical index: L2-normalised TF-IDF rows over the FAQ questions
+        docs = [_tokenize(e["question"]) for e in entries]
+        vocab = sorted({t for doc in docs for t in doc})
+        self.vocab = {t: i for i, t in enumerate(vocab)}
+        doc_freq = Counter(t for doc in docs for t in set(doc))
+        self.idf = np.array(
+            [math.log((1 + len(docs)) / (1 + doc_freq[t])) + 1 for t in vocab],
+            dtype=np.float32,
+        )
+        self.lexical_matrix = np.zeros((len(docs), len(vocab)), dtype=np.float32)
+        for row, doc in enumerate(docs):
+            for token, count in Counter(doc).items():
+                self.lexical_matrix[row, self.vocab[token]] = count
+        self.lexical_matrix = _normalize_rows(self.lexical_matrix * self.idf)
+
+        # Vector index: normalised Granite embeddings of the FAQ questions
+        self.vector_matrix = None
+        if embeddings:
+            self.vector_matrix = _normalize_rows(np.asarray(embeddings, dtype=np.float32))
+
+    def _lexical_scores(self, question: str) -> np.ndarray:
+        query = np.zeros(len(self.vocab), dtype=np.float32)
+        unknown = Counter()
+        for token in _tokenize(question):
+            idx = self.vocab.get(token)
+            if idx is not None:
+                query[idx] += 1
+            else:
+                unknown[token] += 1
+        if not query.any():
+            return np.zeros(len(self.entries), dtype=np.float32)
+        query *= self.idf
+        # Words no FAQ question has still count towards the query's length (with the idf of a
+        # word in no document), so "Is hostel food compulsory?" is not a perfect match for
+        # "Is hostel compulsory?"
+        unknown_idf = math.log(1 + len(self.entries)) + 1
+        norm = math.sqrt(float(query @ query) + sum((c * unknown_idf) ** 2 for c in unknown.values()))
+        return self.lexical_matrix @ (query / norm)
+
+    def match(self, question: str, embed_query=None) -> Optional[Dict]:
+        """
+        Return the best FAQ entry (with its score) if it clears a threshold.
+        The lexical index is checked first and needs no API call; the vector
+        index is only consulted on a lexical miss, via the embed_query callable.
+        """
+        if not self.entries:
+            return None
+
+        lexical = self._lexical_scores(question)
+        best = int(np.argmax(lexical))
+        if lexical[best] >= settings.FAQ_LEXICAL_THRESHOLD:
+            return {**self.entries[best], "score": float(lexical[best]), "match": "lexical"}
+
+        if embed_query is not None and self.vector_matrix is not None:
+            query = np.asarray(embed_query(question), dtype=np.float32)
+            semantic = self.vector_matrix @ (query / max(np.linalg.norm(query), 1e-12))
+            best = int(np.argmax(semantic))
+            if semantic[best] >= settings.FAQ_VECTOR_THRESHOLD:
+                return {**self.entries[best], "score": float(semantic[best]), "match": "vector"}
+
+        return None
+
+    def save(self, path: Path = FAQ_INDEX_FILE):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "wb") as f:
+            pickle.dump(self, f)
+
+    @staticmethod
+    def load(path: Path = FAQ_INDEX_FILE) -> "FAQIndex":
+        with open(path, "rb") as f:
+            return pickle.load(f)
+
+
+def _source_key(file, data_dir: Optional[Path] = None) -> str:
+    """An entry's source: its path relative to the knowledge base (e.g. "faq/general_faq.txt")"""
+    try:
+        return Path(file).resolve().relative_to(Path(data_dir or KNOWLEDGE_BASE_DIR).resolve()).as_posix()
+    except ValueError:
+        return Path(file).name
+
+
+def build_faq_index(files, data_dir: Path, embed: bool = True) -> FAQIndex:
+    """Parse Q/A pairs from the given files and build (and save) the FAQ index"""
+    entries = []
+    for file in files:
+        text = Path(file).read_text(encoding="utf-8")
+        entries.extend(parse_faq_pairs(text, _source_key(file, data_dir)))
+
+    embeddings = None
+    if embed and entries:
+        embeddings = granite_embeddings.embed_documents([e["question"] for e in entries])
+
+    index = FAQIndex(entries, embeddings)
+    index.save()
+    _set_index(index)
+    logger.info(f"FAQ index built with {len(entries)} entries")
+    return index
+
+
+def add_faq_document(file_path: str):
+    """
+    Replace a newly ingested document's Q/A pairs in the FAQ index. Only the
+    document's own questions are embedded; the other entries keep their vectors.
+    """
+    source = _source_key(file_path)
+    new_entries = parse_faq_pairs(Path(file_path).read_text(encoding="utf-8"), source)
+
+    with _update_lock:
+        current = get_faq_index()
+        kept = [i for i, e in enumerate(current.entries) if e["source"] != source]
+        if not new_entries and len(kept) == len(current.entries):
+            return
+        entries = [current.entries[i] for i in kept] + new_entries
+
+        embeddings = None
+        if current.vector_matrix is not None:
+            new_vectors = granite_embeddings.embed_documents([e["question"] for e in new_entries])
+            embeddings = [current.vector_matrix[i] for i in kept] + list(new_vectors)
+        elif entries:
+            # The index was built without vectors (lexical fallback); embed everything once
+            embeddings = granite_embeddings.embed_documents([e["question"] for e in entries])
+
+        index = FAQIndex(entries, embeddings)
+        index.save()
+        _set_index(index)
+
+
+# ===============================
+# Shared index + hit-rate stats
+# ===============================
+_index: Optional[FAQIndex] = None
+_index_lock = threading.Lock()
+# Serialises add_faq_document's read-modify-write of the index
+_update_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0}
+register_cache("faq", lambda: (_stats["hits"], _stats["misses"]))
+
+
+def _set_index(index: FAQIndex):
+    global _index
+    with _index_lock:
+        _index = index
+
+
+def get_faq_index() -> FAQIndex:
+    """Load the FAQ index built at ingestion time (empty if none exists yet)"""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                try:
+                    _index = FAQIndex.load() if FAQ_INDEX_FILE.exists() else _lexical_fallback()
+                except Exception as e:
+                    logger.error(f"Failed to load FAQ index: {e}")
+                    _index = FAQIndex([])
+    return _index
+
+
+def _lexical_fallback() -> FAQIndex:
+    """Lexical-only index over the bundled knowledge base, used until ingestion runs"""
+    entries = []
+    for file in KNOWLEDGE_BASE_DIR.glob("**/*.txt"):
+        entries.extend(parse_faq_pairs(file.read_text(encoding="utf-8"), _source_key(file)))
+    return FAQIndex(entries)
+
+
+def lookup_faq(question: str, embed_query=None) -> Optional[Dict]:
+    """
+    Answer a question from the FAQ index, or return None on a miss.
+    The result has the same "answer"/"sources" shape as the chat endpoints.
+    """
+    entry = get_faq_index().match(question, embed_query)
+    if entry is None:
+        _stats["misses"] += 1
+        return None
+
+    _stats["hits"] += 1
+    path_parts = entry["source"].split("/")
+    category = path_parts[-2] if len(path_parts) >= 2 else "faq"
+    return {
+        "answer": entry["answer"],
+        "sources": [{
+            "category": category.title(),
+            "filename": path_parts[-1].replace(".txt", "").replace("_", " ").title(),
+            "snippet": f"Q: {entry['question']} A: {entry['answer']}",
+        }],
+    }
+
+
+def get_faq_stats() -> Dict:
+    total = _stats["hits"] + _stats["misses"]
+    return {
+        "entries": len(get_faq_index().entries),
+        "hits": _stats["hits"],
+        "misses": _stats["misses"],
+        "hit_rate": round(_stats["hits"] / total, 4) if total else 0.0,
+    }
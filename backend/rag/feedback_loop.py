@@ -0,0 +1,189 @@
+"""
+Online feedback loop.
+
+Likes and dislikes posted to /api/feedback are applied as they arrive:
+- every retrieval remembers which chunks it returned for a question, so a
+  vote can be credited to those chunks in a compact per-chunk count table;
+- retrieval over-fetches a few candidates and reranks them with a smoothed
+  like/dislike ratio from that table, so repeatedly disliked chunks fall out
+  of the top-k;
+- disliked (question, answer) pairs are blocklisted, and the answer cache in
+  rag_pipeline never serves or stores them again.
+
+Stored feedback entries carry the chunk ids they were credited to, so the
+table and blocklist are rebuilt from the feedback store on first use.
+"""
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from backend.config import settings
+from backend.services.feedback_store import feedback_store
+
+logger = logging.getLogger(__name__)
+
+# Pseudo-votes added to the denominator so one vote cannot swing a chunk fully
+PRIOR_SMOOTHING = 2.0
+
+
+def normalize_question(question: str) -> str:
+    return " ".join(question.lower().split())
+
+
+def _answer_key(question: str, answer: str) -> str:
+    text = normalize_question(question) + "\0" + answer.strip()
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class ChunkFeedback:
+    """Like/dislike counts per docstore id, kept as one int32 array"""
+
+    def __init__(self, capacity: int = 1024):
+        self._slots: Dict[str, int] = {}
+        self._counts = np.zeros((capacity, 2), dtype=np.int32)  # likes, dislikes
+
+    def __len__(self):
+        return len(self._slots)
+
+    def record(self, chunk_ids: Sequence[str], liked: bool):
+        column = 0 if liked else 1
+        for chunk_id in chunk_ids:
+            slot = self._slots.get(chunk_id)
+            if slot is None:
+                slot = len(self._slots)
+                if slot == len(self._counts):
+                    self._counts = np.vstack([self._counts, np.zeros_like(self._counts)])
+                self._slots[chunk_id] = slot
+            self._counts[slot, column] += 1
+
+    def prior(self, chunk_ids: Sequence[str]) -> np.ndarray:
+        """Smoothed (likes - dislikes) / votes in (-1, 1); 0 for chunks without votes"""
+        slots = np.array([self._slots.get(c, -1) for c in chunk_ids], dtype=np.int64)
+        counts = np.where((slots >= 0)[:, None], self._counts[np.maximum(slots, 0)], 0)
+        likes, dislikes = counts[:, 0].astype(np.float64), counts[:, 1].astype(np.float64)
+        return (likes - dislikes) / (likes + dislikes + PRIOR_SMOOTHING)
+
+    def counts(self, chunk_id: str) -> Tuple[int, int]:
+        slot = self._slots.get(chunk_id)
+        if slot is None:
+            return 0, 0
+        return int(self._counts[slot, 0]), int(self._counts[slot, 1])
+
+
+class FeedbackLoop:
+    def __init__(
+        self,
+        prior_weight: float = settings.FEEDBACK_PRIOR_WEIGHT,
+        provenance_size: int = settings.FEEDBACK_PROVENANCE_SIZE,
+    ):
+        self.prior_weight = prior_weight
+        self.provenance_size = provenance_size
+
+        self.chunks = ChunkFeedback()
+        self._disliked: set = set()
+        self._recent: "OrderedDict[str, Tuple[str, ...]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.applied = 0
+        self.unattributed = 0
+
+    @property
+    def has_votes(self) -> bool:
+        return len(self.chunks) > 0
+
+    # ===============================
+    # Retrieval side
+    # ===============================
+    def remember(self, question: str, chunk_ids: Sequence[str]):
+        """Record which chunks answered a question so a later vote can be credited to them"""
+        key = normalize_question(question)
+        with self._lock:
+            self._recent[key] = tuple(chunk_ids)
+            self._recent.move_to_end(key)
+            while len(self._recent) > self.provenance_size:
+                self._recent.popitem(last=False)
+
+    def chunks_for(self, question: str) -> Optional[Tuple[str, ...]]:
+        with self._lock:
+            return self._recent.get(normalize_question(question))
+
+    def rerank(self, hits: List[Tuple[str, object, float]], k: int) -> List[Tuple[str, object, float]]:
+        """
+        Reorder (docstore_id, document, distance) hits by distance scaled with
+        the chunk's feedback prior and keep the best k. Disliked chunks look
+        further away, liked ones closer.
+        """
+        if not hits or not self.has_votes:
+            return hits[:k]
+        with self._lock:
+            prior = self.chunks.prior([doc_id for doc_id, _, _ in hits])
+        distances = np.array([distance for _, _, distance in hits], dtype=np.float64)
+        adjusted = distances * (1.0 - self.prior_weight * prior)
+        order = np.argsort(adjusted, kind="stable")[:k]
+        return [hits[i] for i in order]
+
+    # ===============================
+    # Feedback side
+    # ===============================
+    def apply(self, entry: Dict):
+        feedback_type = entry.get("feedback_type")
+        if feedback_type not in ("like", "dislike"):
+            return
+        chunk_ids = entry.get("chunk_ids") or []
+        with self._lock:
+            if chunk_ids:
+                self.chunks.record(chunk_ids, liked=feedback_type == "like")
+            if feedback_type == "dislike":
+                self._disliked.add(_answer_key(entry.get("question", ""), entry.get("answer", "")))
+            self.applied += 1
+
+    def is_disliked(self, question: str, answer: str) -> bool:
+        return _answer_key(question, answer) in self._disliked
+
+    def stats(self) -> Dict:
+        return {
+            "applied": self.applied,
+            "unattributed": self.unattributed,
+            "chunks_with_votes": len(self.chunks),
+            "disliked_answers": len(self._disliked),
+            "remembered_questions": len(self._recent),
+        }
+
+
+_loop: Optional[FeedbackLoop] = None
+_loop_lock = threading.Lock()
+
+
+def get_feedback_loop() -> FeedbackLoop:
+    global _loop
+    if _loop is None:
+        with _loop_lock:
+            if _loop is None:
+                loop = FeedbackLoop()
+                try:
+                    for entry in feedback_store.entries():
+                        loop.apply(entry)
+                except OSError as e:
+                    logger.error(f"Failed to replay stored feedback: {e}")
+                _loop = loop
+    return _loop
+
+
+def apply_feedback(entry: Dict) -> Dict:
+    """
+    Credit a feedback entry to the chunks last retrieved for its question and
+    update the blocklist. Returns the entry with 'chunk_ids' attached so the
+    attribution is persisted alongside it.
+    """
+    loop = get_feedback_loop()
+    chunk_ids = loop.chunks_for(entry.get("question", ""))
+    if chunk_ids:
+        entry["chunk_ids"] = list(chunk_ids)
+    else:
+        loop.unattributed += 1
+    loop.apply(entry)
+    return entry
@@ -1,44 +1,232 @@
-from backend.rag.retriever import retrieve_context
-from backend.granite.granite_client import granite_embeddings
-from functools import lru_cache
+from backend.config import settings
+from backend.rag.retriever import retrieve_context, _cached_embed_query
+from backend.rag.faq_index import lookup_faq
+from backend.rag.feedback_loop import get_feedback_loop, normalize_question
+from backend.rag.extractive import DEGRADED_ANSWERS, extractive_answer, lexical_index
+from backend.services.intent_router import route_question
+from backend.services.admission import llm_slot
+from backend.services.session_store import SESSION_RETRIEVALS, Session, session_store
+from backend.granite.circuit_breaker import failure_reason, is_upstream_failure
+from backend.granite.model_router import route_model
+from backend.granite.prompts import build_prompt
+from backend.granite.providers import get_llm
+from backend.utils.metrics import register_cache, span
+from collections import OrderedDict
+from fastapi.concurrency import run_in_threadpool
+from typing import List, Optional, Tuple
 import asyncio
+import logging
+import threading
 
+logger = logging.getLogger(__name__)
 
-@lru_cache(maxsize=128)
-def _cached_answer_question(question: str) -> str:
+
+class AnswerCache:
     """
-    Cached version - returns cached result for identical questions.
-    LRU cache stores up to 128 most recent questions.
+    LRU cache of generated answers, with their sources, keyed by normalized question.
+    Unlike lru_cache, entries can be evicted one at a time, and answers
+    users have disliked are neither served nor stored.
     """
-    result = retrieve_context(question)
-    context = result.get("context", "") if isinstance(result, dict) else result
 
+    def __init__(self, maxsize: int = settings.ANSWER_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[str, Tuple[str, List]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, question: str) -> Optional[Tuple[str, List]]:
+        """The cached (answer, sources), if any"""
+        key = normalize_question(question)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and get_feedback_loop().is_disliked(question, entry[0]):
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, question: str, answer: str, sources: Optional[List] = None):
+        if not answer or get_feedback_loop().is_disliked(question, answer):
+            return
+        key = normalize_question(question)
+        with self._lock:
+            self._entries[key] = (answer, list(sources or []))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def evict(self, question: str) -> bool:
+        with self._lock:
+            return self._entries.pop(normalize_question(question), None) is not None
+
+    def stats(self):
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+answer_cache = AnswerCache()
+register_cache("answer", lambda: (answer_cache.hits, answer_cache.misses))
+
+
+def retrieve_for_session(question: str, session: Session) -> dict:
+    """
+    Retrieve context for a session turn: reuse the previous turn's chunks
+    when the question is close to the query that found them, otherwise
+    search with the question (anchored to the previous one for follow-ups).
+    """
+    result = session.reusable_retrieval(question)
+    if result is not None:
+        query = session.last_query
+        SESSION_RETRIEVALS.inc(result="reused")
+    else:
+        query = session.retrieval_query(question)
+        result = retrieve_context(query)
+        session_store.remember_retrieval(session, query, result)
+        SESSION_RETRIEVALS.inc(result="fresh")
+    # Votes come in for the question the user sent, not the (anchored or earlier) query that was searched
+    loop = get_feedback_loop()
+    chunk_ids = loop.chunks_for(query)
+    if chunk_ids is not None and query != question:
+        loop.remember(question, chunk_ids)
+    return result
+
+
+NO_CONTEXT_ANSWER = "I don't have enough information to answer that."
+DEGRADED_NO_ANSWER = (
+    "Our assistant is temporarily unavailable and I couldn't find this in our documents. "
+    "Please try again in a little while."
+)
+
+
+def _prepare_prompt(question: str, session: Optional[Session] = None, follow_up: bool = False):
+    """
+    Retrieve context and build the prompt. Returns (prompt, sources, context),
+    with prompt None when nothing relevant was found. Follow-ups get the
+    conversation so far.
+    """
+    result = retrieve_for_session(question, session) if session is not None else retrieve_context(question)
+    context = result.get("context", "") if isinstance(result, dict) else result
+    sources = result.get("sources", []) if isinstance(result, dict) else []
     if not context.strip():
-        return "I don't have enough information to answer that."
+        return None, sources, context
+
+    with span("prompt_build"):
+        prompt = build_prompt(context, question, session.history() if follow_up else "")
+    return prompt, sources, context
+
+
+def _degrade(question: str, meta: dict, exc: Optional[BaseException] = None, context: Optional[str] = None) -> str:
+    """
+    Extractive answer from the retrieved context, or from a lexical search
+    when retrieval failed too. Marks `meta` as degraded.
+    """
+    reason = failure_reason(exc) if exc is not None else "unavailable"
+    if exc is not None:
+        logger.warning(f"LLM unavailable ({reason}), answering extractively: {exc}")
+    if context is None:
+        result = lexical_index.search(question)
+        context, meta["sources"] = result["context"], result["sources"]
+    DEGRADED_ANSWERS.inc(reason=reason)
+    meta["degraded"] = True
+    return extractive_answer(question, context) or DEGRADED_NO_ANSWER
 
-    prompt = f"""You are a helpful and professional admission assistant for Vishwakarma University.
-Your task is to answer the user's question based ONLY on the provided context.
-Answer directly and concisely. Do not make up new questions or answers.
-If the answer is not in the context, politely state that you don't have that information.
 
----
-Context:
-{context}
----
+def _prepare_or_degrade(question: str, session: Optional[Session], follow_up: bool, meta: dict):
+    """
+    _prepare_prompt, or a degraded answer if no LLM is available.
+    Returns (prompt, context, answer) with exactly one of prompt and answer set.
+    If retrieval fails because watsonx is down (the query embedding comes
+    from there), context comes from the lexical index, so a local model can
+    still answer.
+    """
+    llm = get_llm()
+    if not llm.available:
+        return None, None, _degrade(question, meta)
+    try:
+        prompt, meta["sources"], context = _prepare_prompt(question, session, follow_up)
+    except Exception as e:
+        if not is_upstream_failure(e):
+            raise
+        if not llm.available:
+            return None, None, _degrade(question, meta, e)
+        logger.warning(f"Retrieval failed, using the lexical index: {e}")
+        result = lexical_index.search(question)
+        context, meta["sources"] = result["context"], result["sources"]
+        prompt = None
+        if context.strip():
+            with span("prompt_build"):
+                prompt = build_prompt(context, question, session.history() if follow_up else "")
+    if prompt is None:
+        return None, context, NO_CONTEXT_ANSWER
+    return prompt, context, None
 
-User Question: {question}
 
-Assistant Answer:"""
+def _fast_path(question: str):
+    """Routed intents and FAQ matches, answered without retrieval or generation"""
+    with span("routing"):
+        routed = route_question(question)
+    if routed:
+        return routed
+    with span("faq"):
+        return lookup_faq(question, _cached_embed_query)
 
-    return granite_embeddings.generate_chat_response(prompt)
 
+async def answer_question_async(question: str, session: Optional[Session] = None,
+                                meta: Optional[dict] = None) -> str:
+    """
+    Answer a question for the async endpoints: blocking steps run in
+    the threadpool and generation waits for a global LLM slot (which may
+    raise AdmissionRejected). Fast-path and cached answers need no slot.
+    The sources used are stored in meta["sources"]. While no LLM is
+    available the answer is extractive and meta["degraded"] is set.
+    """
+    meta = meta if meta is not None else {}
+    fast = await run_in_threadpool(_fast_path, question)
+    follow_up = session is not None and session.is_follow_up(question)
+    if fast:
+        answer = fast["answer"]
+        meta["sources"] = fast.get("sources", [])
+    else:
+        cached = None if follow_up else answer_cache.get(question)
+        if cached is not None:
+            answer, meta["sources"] = cached
+        else:
+            answer = await _agenerate(question, session, follow_up, meta)
+            if not follow_up and not meta.get("degraded"):
+                answer_cache.put(question, answer, meta.get("sources"))
+    if session is not None:
+        session_store.record(session, question, answer)
+    return answer
+
+
+async def _agenerate(question: str, session: Optional[Session], follow_up: bool, meta: dict) -> str:
+    prompt, context, answer = await run_in_threadpool(_prepare_or_degrade, question, session, follow_up, meta)
+    if answer is not None:
+        return answer
+    async with llm_slot():
+        # The LLM may have gone down while we waited for the slot
+        llm = get_llm()
+        if not llm.available:
+            return await run_in_threadpool(_degrade, question, meta, None, context)
+        try:
+            return await run_in_threadpool(llm.generate, prompt, route_model(question, follow_up))
+        except Exception as e:
+            if not is_upstream_failure(e):
+                raise
+            return await run_in_threadpool(_degrade, question, meta, e, context)
 
-def answer_question(question: str) -> str:
-    """Main entry point with caching enabled - blocking version"""
-    return _cached_answer_question(question)
 
+async def _stream_text(text: str, size: int = 15):
+    for i in range(0, len(text), size):
+        yield text[i:i + size]
+        await asyncio.sleep(0.01)  # Small delay for smooth streaming
 
-async def stream_answer_question(question: str):
+
+async def stream_answer_question(question: str, session: Optional[Session] = None, meta: Optional[dict] = None):
     """
     Async streaming version - responds like ChatGPT
     Yields response tokens as they arrive
@@ -47,53 +235,68 @@ async def stream_answer_question(question: str):
     1. User sees text appearing immediately
     2. No waiting for full response
     3. Can read as it generates
+
+    Blocking work (routing, retrieval, the upstream token stream) runs in
+    the threadpool so one stream never stalls the others, and generation
+    holds a global LLM slot. The sources used are stored in `meta` for the
+    caller's closing event. If the LLM is unavailable, or misses its
+    first-token budget, an extractive answer is streamed instead and
+    meta["degraded"] is set.
     """
+    meta = meta if meta is not None else {}
+    follow_up = session is not None and session.is_follow_up(question)
+
     # Check if cached first (instant response for known questions)
-    try:
-        cached = _cached_answer_question(question)
+    fast = await run_in_threadpool(_fast_path, question)
+    if fast:
+        cached = fast["answer"]
+        meta["sources"] = fast.get("sources", [])
+    else:
+        # Follow-ups depend on the history and are never cached
+        entry = None if follow_up else answer_cache.get(question)
+        cached, meta["sources"] = entry if entry is not None else (None, [])
+    if cached is not None:
+        if session is not None:
+            session_store.record(session, question, cached)
         # If cached, yield it in chunks for streaming effect
-        for i in range(0, len(cached), 15):
-            chunk = cached[i:i+15]
+        async for chunk in _stream_text(cached):
             yield chunk
-            await asyncio.sleep(0.01)  # Small delay for smooth streaming
         return
-    except:
-        pass
     
     # Not cached - stream from API
-    result = retrieve_context(question)
-    context = result.get("context", "") if isinstance(result, dict) else result
-
-    if not context.strip():
-        response = "I don't have enough information to answer that."
-        for chunk in response.split():
-            yield chunk + " "
-            await asyncio.sleep(0.01)
-        return
+    prompt, context, answer = await run_in_threadpool(_prepare_or_degrade, question, session, follow_up, meta)
 
-    prompt = f"""You are a helpful and professional admission assistant for Vishwakarma University.
-Your task is to answer the user's question based ONLY on the provided context.
-Answer directly and concisely. Do not make up new questions or answers.
-If the answer is not in the context, politely state that you don't have that information.
+    if answer is None:
+        # Stream from the LLM, holding an LLM slot (may raise AdmissionRejected before the first token)
+        # Closing this generator (client gone, stream cancelled) closes the upstream stream too
+        full_response = ""
+        async with llm_slot():
+            llm = get_llm()
+            if not llm.available:
+                # It went down while we waited for the slot
+                answer = await run_in_threadpool(_degrade, question, meta, None, context)
+            else:
+                upstream = llm.astream(prompt, route_model(question, follow_up))
+                try:
+                    async for token in upstream:
+                        full_response += token
+                        yield token
+                except Exception as e:
+                    # Once tokens have been sent, the answer can't be swapped for another
+                    if full_response or not is_upstream_failure(e):
+                        raise
+                    answer = await run_in_threadpool(_degrade, question, meta, e, context)
+                finally:
+                    await upstream.aclose()
 
----
-Context:
-{context}
----
-
-User Question: {question}
-
-Assistant Answer:"""
+    if answer is not None:
+        # No context, or degraded: send it like a cached answer
+        async for chunk in _stream_text(answer):
+            yield chunk
+        full_response = answer
 
-    # Stream from Granite API
-    full_response = ""
-    for token in granite_embeddings.generate_chat_stream(prompt):
-        full_response += token
-        yield token
-        await asyncio.sleep(0.001)  # Minimal delay, stream as fast as possible
-    
-    # Cache the full response for next time
-    try:
-        _cached_answer_question.cache_clear()  # Invalidate cache before setting
-    except:
-        pass
+    # Cache the full response for next time (never a degraded one)
+    if not follow_up and not meta.get("degraded"):
+        answer_cache.put(question, full_response, meta.get("sources"))
+    if session is not None:
+        session_store.record(session, question, full_response)
@@ -1,6 +1,10 @@
+from backend.config import settings
 from backend.rag.vector_store import VectorStore
+from backend.rag.feedback_loop import get_feedback_loop
 from backend.granite.granite_client import granite_embeddings
+from backend.utils.metrics import register_cache, span
 from functools import lru_cache
+from typing import List
 import asyncio
 
 
@@ -13,6 +17,12 @@ def _cached_embed_query(question: str):
     return tuple(granite_embeddings.embed_query(question))
 
 
+register_cache(
+    "query_embedding",
+    lambda: (_cached_embed_query.cache_info().hits, _cached_embed_query.cache_info().misses),
+)
+
+
 async def retrieve_context_async(question: str, k: int = 5):
     """
     Async version of retrieve_context for parallel processing.
@@ -36,8 +46,63 @@ def retrieve_context(question: str, k: int = 5):
     if vector_store.store is None:
         return {"context": "", "sources": []}
 
-    docs = vector_store.similarity_search(question, k=k)
-    
+    # Search with the cached query embedding (shared with the FAQ fast path)
+    with span("retrieval"):
+        return _search([question], [_cached_embed_query(question)], k)[question]
+
+
+def retrieve_context_batch(questions: List[str], k: int = 5):
+    """
+    Retrieve context for many questions at once.
+    Embeds all unique questions in one batched call and searches FAISS
+    with a single matrix query. Returns one result dict per question,
+    in the same order and shape as retrieve_context.
+    """
+    if not questions:
+        return []
+
+    if vector_store.store is None:
+        return [{"context": "", "sources": []} for _ in questions]
+
+    with span("retrieval"):
+        unique_questions = list(dict.fromkeys(questions))
+        embeddings = granite_embeddings.embed_documents(unique_questions)
+        results = _search(unique_questions, embeddings, k)
+    return [results[question] for question in questions]
+
+
+def _search(questions: List[str], embeddings, k: int):
+    """
+    Matrix search, rerank with the feedback prior and remember which chunks
+    each question got, so a later like/dislike can be credited to them.
+    """
+    loop = get_feedback_loop()
+    # Over-fetch only once there are votes that could reorder the candidates
+    fetch_k = k + settings.FEEDBACK_RERANK_CANDIDATES if loop.has_votes else k
+    hits_per_question = vector_store.similarity_search_with_ids(embeddings, k=fetch_k)
+
+    results = {}
+    for question, hits in zip(questions, hits_per_question):
+        hits = loop.rerank(hits, k)
+        loop.remember(question, [doc_id for doc_id, _, _ in hits])
+        results[question] = _format_results([doc for _, doc, _ in hits])
+    return results
+
+
+def source_label(source_name: str) -> dict:
+    """The category and filename shown for a chunk's source path"""
+    # Extract category from path (e.g., "backend/data/fees/tuition_fees.txt" -> "fees")
+    path_parts = source_name.split('/')
+    category = path_parts[-2] if len(path_parts) >= 2 else "general"
+    filename = path_parts[-1] if path_parts else source_name
+    return {
+        "category": category.title(),
+        "filename": filename.replace('.txt', '').replace('_', ' ').title(),
+    }
+
+
+def _format_results(docs):
+    """Build the context string and deduplicated source list for retrieved docs"""
     # Extract context text with better formatting
     context_parts = []
     for doc in docs:
@@ -60,14 +125,8 @@ def retrieve_context(question: str, k: int = 5):
             continue
         seen_sources.add(source_name)
         
-        # Extract category from path (e.g., "backend/data/fees/tuition_fees.txt" -> "fees")
-        path_parts = source_name.split('/')
-        category = path_parts[-2] if len(path_parts) >= 2 else "general"
-        filename = path_parts[-1] if path_parts else source_name
-        
         sources.append({
-            "category": category.title(),
-            "filename": filename.replace('.txt', '').replace('_', ' ').title(),
+            **source_label(source_name),
             "snippet": doc.page_content[:150] + "..." if len(doc.page_content) > 150 else doc.page_content
         })
     
@@ -1,19 +1,20 @@
 from pathlib import Path
-from typing import List
+from typing import TYPE_CHECKING, List
 import threading
 
-from langchain_community.vectorstores import FAISS
-from langchain_core.documents import Document
+import numpy as np
 from backend.granite.granite_client import granite_embeddings
+from backend.utils.metrics import span
+
+if TYPE_CHECKING:
+    from langchain_core.documents import Document
 
 VECTOR_DIR = Path("data/VectorStore")
-VECTOR_DIR.mkdir(parents=True, exist_ok=True)
 
 
 class VectorStore:
     _instance = None
     _lock = threading.Lock()
-    _store_cache = None
     
     def __new__(cls):
         """Singleton pattern - only one VectorStore instance"""
@@ -30,23 +31,53 @@ class VectorStore:
             
         self.index_path = VECTOR_DIR
         self.index_name = "index"
-        self._load_store()
+        self._store = None
+        self._loaded = False
+        self._load_lock = threading.Lock()
         self._initialized = True
 
+    @property
+    def store(self):
+        """The FAISS store, loaded from disk on first use (or by warm-up)"""
+        if not self._loaded:
+            self.load()
+        return self._store
+
+    @store.setter
+    def store(self, value):
+        self._store = value
+        self._loaded = True
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._loaded
+
+    def load(self):
+        with self._load_lock:
+            if not self._loaded:
+                self._load_store()
+                self._loaded = True
+        return self._store
+
     def _load_store(self):
-        """Load FAISS index from disk or cache it"""
+        """Load FAISS index from disk if one exists"""
         if (self.index_path / "index.faiss").exists():
-            self.store = FAISS.load_local(
+            # LangChain/FAISS are heavy imports; pay for them only when an index is loaded
+            from langchain_community.vectorstores import FAISS
+
+            self._store = FAISS.load_local(
                 self.index_path,
                 embeddings=granite_embeddings,
                 index_name=self.index_name,
                 allow_dangerous_deserialization=True,
             )
         else:
-            self.store = None
+            self._store = None
 
-    def add_documents(self, documents: List[Document], embeddings):
+    def add_documents(self, documents: List["Document"], embeddings):
         if self.store is None:
+            from langchain_community.vectorstores import FAISS
+
             self.store = FAISS.from_documents(documents, embeddings)
         else:
             self.store.embedding_function = embeddings
@@ -56,6 +87,7 @@ class VectorStore:
         if self.store is None:
             raise RuntimeError("Cannot save empty FAISS index")
 
+        self.index_path.mkdir(parents=True, exist_ok=True)
         self.store.save_local(
             self.index_path,
             index_name=self.index_name,
@@ -67,3 +99,43 @@ class VectorStore:
             raise RuntimeError("FAISS index not initialized")
 
         return self.store.similarity_search(query, k=k)
+
+    def similarity_search_by_vectors(self, embeddings, k: int = 4):
+        """
+        Search many query embeddings with a single FAISS matrix query.
+        Returns one list of documents per query row, nearest first.
+        """
+        return [
+            [doc for _, doc, _ in row]
+            for row in self.similarity_search_with_ids(embeddings, k=k)
+        ]
+
+    def similarity_search_with_ids(self, embeddings, k: int = 4):
+        """
+        Like similarity_search_by_vectors, but each hit is a
+        (docstore_id, document, distance) tuple so callers can key
+        per-chunk state on a stable id.
+        """
+        if self.store is None:
+            raise RuntimeError("FAISS index not initialized")
+
+        query_matrix = np.asarray(embeddings, dtype=np.float32)
+        if query_matrix.ndim == 1:
+            query_matrix = query_matrix.reshape(1, -1)
+        if self.store._normalize_L2:
+            norms = np.linalg.norm(query_matrix, axis=1, keepdims=True)
+            query_matrix = query_matrix / np.maximum(norms, 1e-12)
+
+        with span("faiss_search"):
+            distances, indices = self.store.index.search(query_matrix, k)
+
+        results = []
+        for row_distances, row in zip(distances, indices):
+            hits = []
+            for distance, idx in zip(row_distances, row):
+                if idx == -1:
+                    continue
+                doc_id = self.store.index_to_docstore_id[int(idx)]
+                hits.append((doc_id, self.store.docstore.search(doc_id), float(distance)))
+            results.append(hits)
+        return results
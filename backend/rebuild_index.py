@@ -85,8 +85,18 @@ def rebuild_vector_store():
         traceback.print_exc()
         return
     
-    # Step 5: Verify the index
-    print("\n5. Verifying index...")
+    # Step 5: Build the FAQ fast-path index
+    print("\n5. Building FAQ index...")
+    try:
+        from backend.rag.faq_index import build_faq_index
+
+        faq_index = build_faq_index(text_files, data_dir)
+        print(f"   [OK] FAQ index created with {len(faq_index.entries)} Q/A pairs")
+    except Exception as e:
+        print(f"   [WARN] FAQ index error: {e}")
+
+    # Step 6: Verify the index
+    print("\n6. Verifying index...")
     try:
         test_vs = VectorStore()
         if test_vs.store is not None:
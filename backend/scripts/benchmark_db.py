@@ -0,0 +1,179 @@
+"""
+Concurrency benchmark for the database layer.
+
+Runs a login workload (look up a user by email, update last_login) next to
+a chat-logging workload (one INSERT + commit per request) from many threads
+against a scratch SQLite file, once with a default engine and once with the
+tuned engine from backend.database (WAL, busy_timeout, pooling). With
+--async it also runs the same mix through AsyncSession.
+
+    python -m backend.scripts.benchmark_db --threads 16 --seconds 10
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from sqlalchemy import create_engine, insert, select, update
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from backend.database import Base, create_db_engine
+from backend.auth.models import User
+from backend.models.chat_log import ChatLog
+
+USERS = 200
+
+
+def _seed(engine):
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"username": f"user{i}", "email": f"user{i}@example.com", "hashed_password": "x"}
+            for i in range(USERS)
+        ])
+
+
+def _login(db):
+    email = f"user{random.randrange(USERS)}@example.com"
+    user = db.execute(select(User).where(User.email == email)).scalar_one()
+    user.last_login = datetime.utcnow()
+    db.commit()
+
+
+def _log(db):
+    db.execute(insert(ChatLog), [{
+        "question": "What is the fee for B.Tech?",
+        "answer": "The fee is listed in the fee structure.",
+        "endpoint": "/api/chat",
+        "latency_ms": 12.5,
+        "sources": "[]",
+    }])
+    db.commit()
+
+
+def _report(name, latencies, errors, elapsed):
+    ops = sum(len(v) for v in latencies.values())
+    print(f"\n{name}: {ops / elapsed:,.0f} ops/s, {errors} errors")
+    for workload, values in latencies.items():
+        if not values:
+            print(f"   {workload:<8} no successful operations")
+            continue
+        values.sort()
+        p95 = values[int(len(values) * 0.95) - 1] if len(values) >= 20 else values[-1]
+        print(
+            f"   {workload:<8} n={len(values):<7} p50={statistics.median(values):7.2f} ms"
+            f"   p95={p95:7.2f} ms   max={values[-1]:7.2f} ms"
+        )
+
+
+def run_threads(name, engine, threads, seconds, login_ratio):
+    SessionFactory = sessionmaker(bind=engine, autoflush=False)
+    latencies = {"login": [], "logging": []}
+    errors = 0
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def worker():
+        nonlocal errors
+        local = {"login": [], "logging": []}
+        local_errors = 0
+        while time.perf_counter() < deadline:
+            workload = "login" if random.random() < login_ratio else "logging"
+            started = time.perf_counter()
+            db = SessionFactory()
+            try:
+                (_login if workload == "login" else _log)(db)
+                local[workload].append((time.perf_counter() - started) * 1000)
+            except OperationalError:  # "database is locked"
+                db.rollback()
+                local_errors += 1
+            finally:
+                db.close()
+        with lock:
+            for key, values in local.items():
+                latencies[key].extend(values)
+            errors += local_errors
+
+    started = time.perf_counter()
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    _report(name, latencies, errors, time.perf_counter() - started)
+    engine.dispose()
+
+
+async def run_async(url, tasks, seconds, login_ratio):
+    from backend.database import get_async_sessionmaker, dispose_async_engine, settings
+
+    settings.DATABASE_URL = url
+    SessionFactory = get_async_sessionmaker()
+    latencies = {"login": [], "logging": []}
+    errors = 0
+    deadline = time.perf_counter() + seconds
+
+    async def worker():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            workload = "login" if random.random() < login_ratio else "logging"
+            started = time.perf_counter()
+            async with SessionFactory() as db:
+                try:
+                    if workload == "login":
+                        email = f"user{random.randrange(USERS)}@example.com"
+                        await db.execute(
+                            update(User).where(User.email == email).values(last_login=datetime.utcnow())
+                        )
+                    else:
+                        await db.execute(insert(ChatLog), [{"question": "q", "answer": "a", "sources": "[]"}])
+                    await db.commit()
+                    latencies[workload].append((time.perf_counter() - started) * 1000)
+                except OperationalError:
+                    await db.rollback()
+                    errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(tasks)))
+    _report("tuned engine (AsyncSession)", latencies, errors, time.perf_counter() - started)
+    await dispose_async_engine()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--login-ratio", type=float, default=0.3)
+    parser.add_argument("--async", dest="run_async", action="store_true", help="also benchmark AsyncSession")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print("=" * 60)
+        print(f"DB benchmark: {args.threads} workers, {args.seconds}s, {args.login_ratio:.0%} logins")
+        print("=" * 60)
+
+        baseline_url = f"sqlite:///{Path(tmp) / 'baseline.db'}"
+        baseline = create_engine(baseline_url, connect_args={"check_same_thread": False})
+        _seed(baseline)
+        run_threads("default engine", baseline, args.threads, args.seconds, args.login_ratio)
+
+        tuned_url = f"sqlite:///{Path(tmp) / 'tuned.db'}"
+        tuned = create_db_engine(tuned_url)
+        _seed(tuned)
+        run_threads("tuned engine", tuned, args.threads, args.seconds, args.login_ratio)
+
+        if args.run_async:
+            try:
+                asyncio.run(run_async(tuned_url, args.threads, args.seconds, args.login_ratio))
+            except ImportError as e:
+                print(f"\nAsyncSession benchmark skipped: {e}")
+
+
+if __name__ == "__main__":
+    main()
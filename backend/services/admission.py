@@ -0,0 +1,255 @@
+"""
+Admission control for the chat endpoints.
+
+Two gates:
+
+- Rate limiting: a token bucket per client, keyed by user id when the
+  request carries a valid token and by IP otherwise. Checked when the
+  request arrives (the `admit` dependency); a batch is charged one token
+  per question it generates (`admit_batch`).
+- LLM concurrency: at most LLM_MAX_CONCURRENCY generations run at once.
+  Callers wait for a slot (llm_slot) in a bounded queue ordered by lane:
+  admins, then signed-in users, then anonymous clients. When the queue is
+  full, a newcomer evicts the newest waiter from a lower lane or is turned
+  away. A request that can't get a slot before its deadline
+  (LLM_QUEUE_TIMEOUT after it arrived, or after a batch item started
+  waiting) fails fast.
+
+Both raise AdmissionRejected, which the app turns into 429 + Retry-After.
+Answers served from the fast path or the answer cache never wait for a slot.
+"""
+import asyncio
+import heapq
+import itertools
+import math
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional
+
+from fastapi import Depends, Request
+from fastapi.responses import JSONResponse
+
+from backend.auth.dependencies import get_optional_user
+from backend.auth.principal_cache import Principal
+from backend.config import settings
+from backend.utils.metrics import registry
+
+LANE_ADMIN, LANE_USER, LANE_ANONYMOUS = 0, 1, 2
+LANE_NAMES = {LANE_ADMIN: "admin", LANE_USER: "user", LANE_ANONYMOUS: "anonymous"}
+
+ADMISSION_DECISIONS = registry.counter(
+    "admission_decisions_total", "Admission decisions by lane and outcome", labels=("lane", "outcome")
+)
+LLM_QUEUE_WAIT = registry.histogram(
+    "llm_queue_wait_seconds", "Time spent waiting for an LLM slot", labels=("lane",)
+)
+
+# Set per request by `admit` (or `enter`); callers outside a request wait as anonymous, without a deadline
+_lane: ContextVar[int] = ContextVar("admission_lane", default=LANE_ANONYMOUS)
+_deadline: ContextVar[Optional[float]] = ContextVar("admission_deadline", default=None)
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+def rejection_response(exc: AdmissionRejected) -> JSONResponse:
+    return JSONResponse(
+        {"detail": "Too many requests, please retry shortly", "reason": exc.reason},
+        status_code=429,
+        headers={"Retry-After": str(max(1, math.ceil(exc.retry_after)))},
+    )
+
+
+# ===============================
+# Per-client token buckets
+# ===============================
+class RateLimiter:
+    def __init__(self, max_keys: int = settings.RATE_LIMIT_MAX_KEYS):
+        self.max_keys = max_keys
+        # key -> [tokens, last refill time]; least recently seen first
+        self._buckets: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def acquire(self, key: str, per_minute: float, burst: int) -> float:
+        """Take a token; returns 0 if admitted, else seconds until one is available"""
+        rate = per_minute / 60
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [float(burst), now]
+                while len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(float(burst), bucket[0] + (now - bucket[1]) * rate)
+                bucket[1] = now
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return 0.0
+            return (1 - bucket[0]) / rate if rate > 0 else 60.0
+
+
+# ===============================
+# Global LLM slots
+# ===============================
+class LLMGate:
+    def __init__(self, capacity: int = settings.LLM_MAX_CONCURRENCY, max_queue: int = settings.LLM_MAX_QUEUE):
+        self.capacity = capacity
+        self.max_queue = max_queue
+        self.in_flight = 0
+        # Heap of [lane, seq, future]: lowest lane first, then first come first served
+        self._waiters: List[list] = []
+        self._seq = itertools.count()
+        # Moving average of how long a slot is held, for Retry-After
+        self._hold_seconds = 5.0
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def retry_after(self) -> float:
+        return self._hold_seconds * (len(self._waiters) + 1) / max(1, self.capacity)
+
+    def _reject(self, lane: int, reason: str):
+        ADMISSION_DECISIONS.inc(lane=LANE_NAMES[lane], outcome=reason)
+        raise AdmissionRejected(reason, self.retry_after())
+
+    def _remove(self, entry: list):
+        if entry in self._waiters:
+            self._waiters.remove(entry)
+            heapq.heapify(self._waiters)
+
+    async def acquire(self, lane: int, deadline: Optional[float] = None):
+        if self.in_flight < self.capacity and not self._waiters:
+            self.in_flight += 1
+            LLM_QUEUE_WAIT.observe(0.0, lane=LANE_NAMES[lane])
+            return
+
+        deadline = deadline if deadline is not None else time.monotonic() + settings.LLM_QUEUE_TIMEOUT
+        timeout = deadline - time.monotonic()
+        if timeout <= 0:
+            self._reject(lane, "deadline")
+        if len(self._waiters) >= self.max_queue:
+            # Make room by turning away the newest waiter of the lowest lane, if it ranks below us
+            worst = max(self._waiters, key=lambda e: (e[0], e[1]))
+            if worst[0] <= lane:
+                self._reject(lane, "queue_full")
+            self._remove(worst)
+            ADMISSION_DECISIONS.inc(lane=LANE_NAMES[worst[0]], outcome="evicted")
+            worst[2].set_exception(AdmissionRejected("evicted", self.retry_after()))
+
+        future = asyncio.get_running_loop().create_future()
+        entry = [lane, next(self._seq), future]
+        heapq.heappush(self._waiters, entry)
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            self._remove(entry)
+            self._reject(lane, "timeout")
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled() and future.exception() is None:
+                # The slot was handed over just as we were cancelled
+                self.release()
+            else:
+                self._remove(entry)
+            raise
+        LLM_QUEUE_WAIT.observe(time.monotonic() - started, lane=LANE_NAMES[lane])
+
+    def release(self, held_seconds: Optional[float] = None):
+        if held_seconds is not None:
+            self._hold_seconds = 0.9 * self._hold_seconds + 0.1 * held_seconds
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)  # hand the slot over; in_flight is unchanged
+                return
+        self.in_flight -= 1
+
+    def stats(self) -> Dict:
+        return {"capacity": self.capacity, "in_flight": self.in_flight, "queued": len(self._waiters)}
+
+
+rate_limiter = RateLimiter()
+llm_gate = LLMGate()
+registry.callback(
+    "llm_slots", "LLM generation slots in use and requests waiting for one", "gauge",
+    lambda: {("in_flight",): llm_gate.in_flight, ("queued",): llm_gate.queued},
+    labels=("state",),
+)
+
+
+@asynccontextmanager
+async def llm_slot(deadline: Optional[float] = None):
+    """
+    Hold one of the global LLM slots for the duration of a generation.
+    Waits until `deadline` (time.monotonic()), by default the request's.
+    """
+    await llm_gate.acquire(_lane.get(), deadline if deadline is not None else _deadline.get())
+    started = time.monotonic()
+    try:
+        yield
+    finally:
+        llm_gate.release(time.monotonic() - started)
+
+
+# ===============================
+# Request admission
+# ===============================
+def lane_for(principal: Optional[Principal]) -> int:
+    if principal is None:
+        return LANE_ANONYMOUS
+    return LANE_ADMIN if principal.role == "admin" else LANE_USER
+
+
+def check_rate(key: str, lane: int):
+    """Apply the per-client token bucket; raises AdmissionRejected when it is empty"""
+    if lane == LANE_ANONYMOUS:
+        per_minute = settings.RATE_LIMIT_ANONYMOUS_PER_MINUTE
+    else:
+        per_minute = settings.RATE_LIMIT_USER_PER_MINUTE
+    wait = rate_limiter.acquire(key, per_minute, settings.RATE_LIMIT_BURST)
+    if wait > 0:
+        ADMISSION_DECISIONS.inc(lane=LANE_NAMES[lane], outcome="rate_limited")
+        raise AdmissionRejected("rate_limited", wait)
+    ADMISSION_DECISIONS.inc(lane=LANE_NAMES[lane], outcome="admitted")
+
+
+def client_key(request: Request, principal: Optional[Principal]) -> str:
+    if principal is not None:
+        return f"user:{principal.id}"
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+
+def enter(lane: int):
+    """Set the lane and LLM deadline for the rest of the current request"""
+    _lane.set(lane)
+    _deadline.set(time.monotonic() + settings.LLM_QUEUE_TIMEOUT)
+
+
+async def admit(request: Request, principal: Optional[Principal] = Depends(get_optional_user)):
+    """Dependency for chat endpoints: rate-limit the client and set its lane and deadline"""
+    lane = lane_for(principal)
+    check_rate(client_key(request, principal), lane)
+    enter(lane)
+
+
+async def admit_batch(request: Request, principal: Optional[Principal] = Depends(get_optional_user)) -> Callable[[], None]:
+    """
+    Dependency for batch endpoints: set the client's lane, and return a
+    function that charges its token bucket for one question. A batch
+    can ask for hundreds of generations, so it pays per question generated
+    rather than once per request.
+    """
+    lane = lane_for(principal)
+    enter(lane)
+    key = client_key(request, principal)
+    return lambda: check_rate(key, lane)
@@ -0,0 +1,155 @@
+"""
+Buffered chat logging.
+
+Request handlers call log_chat(), which only appends to an in-memory ring
+buffer. A background asyncio task drains the buffer and bulk-inserts rows
+into the chat_logs table whenever the batch size is reached or the flush
+interval elapses, so SQLite sees one transaction per batch instead of one
+commit per request. When the buffer is full the oldest entry is dropped and
+counted.
+"""
+import asyncio
+import json
+import logging
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import insert
+
+from backend.config import settings
+from backend.database import SessionLocal
+from backend.models.chat_log import ChatLog
+
+logger = logging.getLogger(__name__)
+
+
+class ChatLogSink:
+    def __init__(
+        self,
+        capacity: int = settings.CHAT_LOG_BUFFER_SIZE,
+        batch_size: int = settings.CHAT_LOG_BATCH_SIZE,
+        flush_interval: float = settings.CHAT_LOG_FLUSH_INTERVAL,
+    ):
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self._buffer = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+        self.enqueued = 0
+        self.dropped = 0
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+
+    # ===============================
+    # Producer side (request path)
+    # ===============================
+    def log(self, question: str, answer: str, latency_ms: float, sources=None, endpoint: str = None):
+        """Enqueue one chat exchange; O(1) and never touches the database"""
+        row = {
+            "question": question,
+            "answer": answer,
+            "endpoint": endpoint,
+            "latency_ms": round(latency_ms, 2),
+            "sources": json.dumps(sources or []),
+            "created_at": datetime.utcnow(),
+        }
+        with self._lock:
+            if len(self._buffer) >= self.capacity:
+                self.dropped += 1  # deque(maxlen) evicts the oldest entry
+            self._buffer.append(row)
+            self.enqueued += 1
+            should_wake = len(self._buffer) >= self.batch_size
+
+        loop = self._loop
+        if should_wake and loop is not None:
+            loop.call_soon_threadsafe(self._wakeup.set)
+
+    # ===============================
+    # Consumer side (background task)
+    # ===============================
+    def _drain(self) -> List[Dict]:
+        with self._lock:
+            count = min(len(self._buffer), self.batch_size)
+            return [self._buffer.popleft() for _ in range(count)]
+
+    def _write_batch(self, rows: List[Dict]):
+        db = SessionLocal()
+        try:
+            db.execute(insert(ChatLog), rows)
+            db.commit()
+        finally:
+            db.close()
+
+    async def flush(self):
+        """Write everything currently buffered, one transaction per batch"""
+        loop = asyncio.get_running_loop()
+        while True:
+            rows = self._drain()
+            if not rows:
+                return
+            try:
+                await loop.run_in_executor(None, self._write_batch, rows)
+                self.written += len(rows)
+                self.batches += 1
+            except Exception as e:
+                self.failed += len(rows)
+                logger.error(f"Failed to write {len(rows)} chat logs: {e}")
+                return
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def start(self):
+        if self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the background task and write whatever is still buffered"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._loop = None
+        await self.flush()
+
+    def stats(self) -> Dict:
+        return {
+            "buffered": len(self._buffer),
+            "capacity": self.capacity,
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "batches": self.batches,
+        }
+
+
+chat_log_sink = ChatLogSink()
+
+
+def log_chat(question: str, answer: str, latency_ms: float, sources=None, endpoint: str = None):
+    """Record a chat exchange without blocking the request"""
+    try:
+        chat_log_sink.log(question, answer, latency_ms, sources, endpoint)
+    except Exception as e:
+        logger.error(f"Failed to enqueue chat log: {e}")
@@ -1,22 +1,198 @@
-def recommend_courses(eligibility_text: str) -> list[str]:
-    """
-    Basic rule-based course recommendation.
-    Can be enhanced later with ML.
-    """
-    courses = []
+"""
+Data-driven course recommendation.
+
+Program documents under data/programs are turned once into a
+program x feature matrix (eligibility subjects, keywords, fee and duration).
+A student profile is encoded into the same feature space and scored against
+every program with a single matrix-vector product.
+"""
+import re
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from backend.services.program_catalog import load_programs, normalize
+
+# Subject / interest vocabulary and the words that signal each entry
+SUBJECTS = {
+    "mathematics": ["math", "maths", "mathematics", "statistics"],
+    "physics": ["physics"],
+    "chemistry": ["chemistry"],
+    "biology": ["biology", "life science", "life sciences"],
+    "computer science": ["computer", "computers", "coding", "programming", "software"],
+    "commerce": ["commerce", "accounts", "accountancy", "economics", "finance", "business"],
+    "arts": ["arts", "humanities", "drawing", "painting", "creative"],
+}
+KEYWORDS = {
+    "ai": ["ai", "artificial intelligence", "ml", "machine learning"],
+    "data": ["data", "analytics", "big data", "data science"],
+    "software": ["software", "development", "cloud", "computing", "programming", "coding"],
+    "management": ["management", "manager", "leadership", "hr", "operations"],
+    "marketing": ["marketing", "sales", "branding"],
+    "finance": ["finance", "banking", "accounts", "investment"],
+    "entrepreneurship": ["entrepreneurship", "startup", "business"],
+    "design": ["design", "product design", "ux", "ui", "creative", "drawing"],
+    "research": ["research", "phd", "doctorate", "academic"],
+}
+LEVELS = {
+    "undergraduate": ["12th", "10+2", "hsc", "school", "undergraduate", "ug"],
+    "postgraduate": ["graduate", "graduation", "bachelor", "bachelors", "degree", "postgraduate", "pg"],
+    "doctoral": ["master", "masters", "postgraduation", "doctoral", "phd"],
+}
+
+FEATURES = [f"subject:{s}" for s in SUBJECTS] + [f"keyword:{k}" for k in KEYWORDS]
+
+# Relative weight of the subject/keyword match versus fee and duration fit
+FEE_PENALTY = 1.0
+DURATION_PENALTY = 0.5
+LEVEL_MISMATCH_PENALTY = 5.0
+
+
+def _mentions(text: str, words: List[str]) -> bool:
+    padded = f" {normalize(text)} "
+    return any(f" {normalize(w)} " in padded for w in words)
+
+
+def _amounts(text: str) -> List[int]:
+    """Rupee amounts written with Indian digit grouping, e.g. ₹2,80,000"""
+    return [int(a.replace(",", "")) for a in re.findall(r"₹\s*([\d,]+)", text)]
+
+
+def _years(text: str) -> Optional[float]:
+    match = re.search(r"(\d+(?:\.\d+)?)\s*years?", text, re.IGNORECASE)
+    return float(match.group(1)) if match else None
+
 
-    text = eligibility_text.lower()
+def _program_level(program: Dict) -> str:
+    eligibility = " ".join(program["eligibility"]).lower()
+    if "master" in eligibility:
+        return "doctoral"
+    if "bachelor" in eligibility or "degree" in eligibility:
+        return "postgraduate"
+    return "undergraduate"
 
-    if "math" in text or "physics" in text:
-        courses.append("B.Tech / Engineering")
 
-    if "biology" in text:
-        courses.append("Medical / Life Sciences")
+class CourseRecommender:
+    def __init__(self, programs: Optional[List[Dict]] = None):
+        self.programs = programs if programs is not None else load_programs()
+        self.levels = [_program_level(p) for p in self.programs]
 
-    if "commerce" in text or "accounts" in text:
-        courses.append("B.Com / Business Studies")
+        # Program x feature matrix; "any stream" programs get partial credit for every subject
+        self.matrix = np.zeros((len(self.programs), len(FEATURES)), dtype=np.float32)
+        for row, program in enumerate(self.programs):
+            eligibility = " ".join(program["eligibility"])
+            profile = " ".join([program["name"], program["description"], eligibility])
+            if _mentions(eligibility, ["any stream"]):
+                self.matrix[row, :len(SUBJECTS)] = 0.5
+            for col, words in enumerate(SUBJECTS.values()):
+                if _mentions(eligibility, words) or _mentions(program["name"], words):
+                    self.matrix[row, col] = 1.0
+            for col, words in enumerate(KEYWORDS.values(), start=len(SUBJECTS)):
+                if _mentions(profile, words):
+                    self.matrix[row, col] = 1.0
+        norms = np.linalg.norm(self.matrix, axis=1, keepdims=True)
+        self.matrix_normalized = self.matrix / np.maximum(norms, 1e-12)
 
-    if not courses:
-        courses.append("General Arts / Humanities")
+        fees = [_amounts(" ".join(p["fee"])) for p in self.programs]
+        self.fee_min = np.array([min(f) if f else np.nan for f in fees], dtype=np.float64)
+        self.duration = np.array(
+            [_years(p["duration"]) or np.nan for p in self.programs], dtype=np.float64
+        )
+        self.level_codes = np.array([list(LEVELS).index(level) for level in self.levels])
 
-    return courses
+    def encode_profile(self, text: str) -> np.ndarray:
+        vector = np.zeros(len(FEATURES), dtype=np.float32)
+        for col, words in enumerate(list(SUBJECTS.values()) + list(KEYWORDS.values())):
+            if _mentions(text, words):
+                vector[col] = 1.0
+        return vector
+
+    def score(
+        self,
+        interests: str,
+        budget: Optional[float] = None,
+        max_duration: Optional[float] = None,
+        level: Optional[str] = None,
+    ) -> np.ndarray:
+        """Score every program against a profile in one vectorised pass"""
+        profile = self.encode_profile(interests)
+        norm = np.linalg.norm(profile)
+        scores = self.matrix_normalized @ (profile / norm) if norm else np.zeros(len(self.programs))
+        scores = scores.astype(np.float64)
+
+        if budget:
+            over_budget = np.nan_to_num((self.fee_min - budget) / budget, nan=0.0)
+            scores -= FEE_PENALTY * np.clip(over_budget, 0, None)
+        if max_duration:
+            too_long = np.nan_to_num(self.duration - max_duration, nan=0.0)
+            scores -= DURATION_PENALTY * np.clip(too_long, 0, None)
+        if level in LEVELS:
+            scores -= LEVEL_MISMATCH_PENALTY * (self.level_codes != list(LEVELS).index(level))
+        return scores
+
+    def recommend(
+        self,
+        interests: str,
+        budget: Optional[float] = None,
+        max_duration: Optional[float] = None,
+        level: Optional[str] = None,
+        top_k: int = 3,
+    ) -> List[Dict]:
+        """Ranked programs with the reasons behind each score"""
+        if not self.programs:
+            return []
+
+        if level is None:
+            level = next((name for name, words in LEVELS.items() if _mentions(interests, words)), None)
+
+        scores = self.score(interests, budget, max_duration, level)
+        profile = self.encode_profile(interests)
+        order = np.argsort(-scores, kind="stable")[:top_k]
+
+        results = []
+        for idx in order:
+            if scores[idx] <= 0:
+                break
+            program = self.programs[idx]
+            matched = [FEATURES[c].split(":", 1)[1] for c in np.flatnonzero(self.matrix[idx] * profile)]
+            reasons = []
+            if matched:
+                reasons.append("Matches your interest in " + ", ".join(matched))
+            if program["fee"]:
+                reason = f"Fee: {program['fee'][0]}"
+                if budget and self.fee_min[idx] <= budget:
+                    reason += " (within your budget)"
+                reasons.append(reason)
+            if program["duration"]:
+                reasons.append(f"Duration: {program['duration']}")
+            if program["eligibility"]:
+                reasons.append("Eligibility: " + "; ".join(program["eligibility"]))
+            results.append({
+                "program": program["name"],
+                "score": round(float(scores[idx]), 4),
+                "reasons": reasons,
+                "source": program["source"],
+            })
+        return results
+
+
+_recommender: Optional[CourseRecommender] = None
+_recommender_lock = threading.Lock()
+
+
+def get_recommender() -> CourseRecommender:
+    global _recommender
+    if _recommender is None:
+        with _recommender_lock:
+            if _recommender is None:
+                _recommender = CourseRecommender()
+    return _recommender
+
+
+def recommend_courses(eligibility_text: str) -> list[str]:
+    """
+    Program names recommended for a free-text description of a student's
+    subjects and interests, best match first.
+    """
+    return [r["program"] for r in get_recommender().recommend(eligibility_text)]
@@ -1,9 +1,303 @@
+"""
+Deadline extraction and lookup.
+
+Every knowledge base document is parsed once into structured deadline
+entries (program, event, start/end date). Entries are kept in a sorted
+timeline and a (program, event) dictionary, and only documents whose
+mtime/size changed are re-parsed on refresh. Date questions are then
+answered straight from the index, without retrieval or the LLM.
+"""
+import bisect
+import calendar
+import logging
 import re
+import threading
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from backend.services.program_catalog import DATA_DIR, find_programs, load_programs, normalize
+
+logger = logging.getLogger(__name__)
+
+ALL_PROGRAMS = "All Programs"
+
+_MONTHS = {
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6,
+    "jul": 7, "aug": 8, "sep": 9, "oct": 10, "nov": 11, "dec": 12,
+}
+_MONTH = (
+    r"\b(?:jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|"
+    r"aug(?:ust)?|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)\b\.?"
+)
+_DAY = r"\b\d{1,2}(?:st|nd|rd|th)?\b"
+_YEAR = r"\b(?:19|20)\d{2}\b"
+
+# "15 June 2025", "June 15, 2025", "June 2025"
+_FULL_DATE = rf"(?:{_DAY}\s+)?{_MONTH}(?:\s+{_DAY})?,?\s+{_YEAR}"
+# "2025-06-15", "15/06/2025", "15-06-2025", "15.06.2025"
+_NUMERIC_DATE = r"\b(?:\d{4}-\d{1,2}-\d{1,2}|\d{1,2}[/.-]\d{1,2}[/.-]\d{4})\b"
+# Left side of a range may omit what the right side states: "March – June 2025", "10 – 20 June 2025"
+_PARTIAL_DATE = rf"(?:{_FULL_DATE}|(?:{_DAY}\s+)?{_MONTH}(?:\s+{_DAY})?|{_DAY})"
+_RANGE_SEP = r"\s*(?:–|—|-|\bto\b|\btill\b|\buntil\b)\s*"
+
+DATE_PATTERN = re.compile(
+    rf"(?P<left>{_NUMERIC_DATE}|{_PARTIAL_DATE}){_RANGE_SEP}(?P<right>{_NUMERIC_DATE}|{_FULL_DATE})"
+    rf"|(?P<single>{_NUMERIC_DATE}|{_FULL_DATE})",
+    re.IGNORECASE,
+)
+
+# Canonical event keys and the words that identify them (in labels and in questions)
+EVENT_KEYWORDS = {
+    "application_deadline": [
+        "last date", "latest date", "last day", "deadline", "closing date", "close", "closes", "apply by",
+        "till when", "until when",
+    ],
+    "application_start": ["application start", "applications open", "registration start", "start date"],
+    "entrance_test": ["entrance", "vunet", "exam", "test"],
+    "counseling": ["counseling", "counselling", "interview"],
+    "session_start": ["session", "classes", "semester", "commence", "academic year"],
+}
+# Whole words only: "test" must not match "latest", nor "exam" "example"
+_EVENT_PATTERNS = {
+    event: re.compile(r"\b(?:" + "|".join(re.escape(k) for k in keywords) + r")\b")
+    for event, keywords in EVENT_KEYWORDS.items()
+}
+# Questions that ask for the whole calendar rather than one event
+_ALL_DATES = re.compile(r"\b(?:(?:important|all|key) dates|schedule|calendar|timeline)\b")
+
+
+@dataclass(frozen=True)
+class Deadline:
+    program: str
+    event: str
+    label: str
+    start: date
+    end: date
+    text: str
+    source: str
+
+
+def _parse_parts(expr: str) -> Tuple[Optional[int], Optional[int], Optional[int]]:
+    """Return (day, month, year) found in a single date expression"""
+    expr = expr.strip()
+    numeric = re.fullmatch(r"(\d{4})-(\d{1,2})-(\d{1,2})", expr)
+    if numeric:
+        return int(numeric.group(3)), int(numeric.group(2)), int(numeric.group(1))
+    numeric = re.fullmatch(r"(\d{1,2})[/.-](\d{1,2})[/.-](\d{4})", expr)
+    if numeric:  # Indian day-first convention
+        return int(numeric.group(1)), int(numeric.group(2)), int(numeric.group(3))
+
+    year = re.search(_YEAR, expr)
+    month = re.search(_MONTH, expr, re.IGNORECASE)
+    without_year = re.sub(_YEAR, "", expr)
+    day = re.search(r"\b(\d{1,2})(?:st|nd|rd|th)?\b", without_year)
+    return (
+        int(day.group(1)) if day else None,
+        _MONTHS[month.group(0).lower()[:3]] if month else None,
+        int(year.group(0)) if year else None,
+    )
+
+
+def _first_day(day, month, year) -> date:
+    return date(year, month, day or 1)
+
+
+def _last_day(day, month, year) -> date:
+    return date(year, month, day or calendar.monthrange(year, month)[1])
+
+
+def parse_date_expression(match: re.Match) -> Optional[Tuple[date, date]]:
+    """Resolve a DATE_PATTERN match into an inclusive (start, end) date range"""
+    try:
+        if match.group("single"):
+            day, month, year = _parse_parts(match.group("single"))
+            return _first_day(day, month, year), _last_day(day, month, year)
+
+        r_day, r_month, r_year = _parse_parts(match.group("right"))
+        l_day, l_month, l_year = _parse_parts(match.group("left"))
+        l_month = l_month or r_month
+        l_year = l_year or r_year
+        start = _first_day(l_day, l_month, l_year)
+        end = _last_day(r_day, r_month, r_year)
+        if start > end and l_year == r_year:  # "Dec – Jan 2026" spans the new year
+            start = start.replace(year=start.year - 1)
+        return start, end
+    except (TypeError, ValueError, KeyError):
+        return None
 
 
 def extract_deadlines(text: str) -> list[str]:
     """
-    Extract common deadline patterns from admission text
+    Extract date and date-range expressions from admission text
     """
-    pattern = r"(\\b\\d{1,2}\\s(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\\s\\d{4}\\b)"
-    return re.findall(pattern, text)
+    return [m.group(0).strip() for m in DATE_PATTERN.finditer(text)]
+
+
+def classify_event(text: str) -> Optional[str]:
+    lowered = text.lower()
+    for event, pattern in _EVENT_PATTERNS.items():
+        if pattern.search(lowered):
+            return event
+    return None
+
+
+def parse_document(text: str, source: str, programs: List[Dict]) -> List[Deadline]:
+    """Parse every dated line of a document into Deadline entries"""
+    header = re.search(r"^PROGRAM:\s*(.+)$", text, re.MULTILINE)
+    doc_program = header.group(1).strip() if header else None
+
+    entries = []
+    for line in text.splitlines():
+        for match in DATE_PATTERN.finditer(line):
+            parsed = parse_date_expression(match)
+            if parsed is None:
+                continue
+
+            label = line[:match.start()].strip(" -*•\t:") or line.strip(" -*•\t")
+            mentioned = find_programs(label, programs)
+            program = doc_program or (mentioned[0]["name"] if mentioned else ALL_PROGRAMS)
+            event = classify_event(label) or normalize(label).replace(" ", "_") or "date"
+
+            entries.append(Deadline(
+                program=program,
+                event=event,
+                label=label,
+                start=parsed[0],
+                end=parsed[1],
+                text=match.group(0).strip(),
+                source=source,
+            ))
+    return entries
+
+
+class DeadlineIndex:
+    """Sorted, incrementally refreshed index of deadlines keyed by (program, event)"""
+
+    def __init__(self, data_dir: Path = DATA_DIR):
+        self.data_dir = data_dir
+        self.programs = load_programs(data_dir)
+        self._lock = threading.Lock()
+        self._files: Dict[str, Tuple[Path, int, int, List[Deadline]]] = {}
+        self.timeline: List[Deadline] = []
+        self._starts: List[date] = []
+        self.by_key: Dict[Tuple[str, str], List[Deadline]] = {}
+
+    def _source_name(self, path: Path) -> str:
+        try:
+            return path.resolve().relative_to(self.data_dir.resolve()).as_posix()
+        except ValueError:
+            return path.name
+
+    def _rebuild(self):
+        entries = sorted(
+            (e for _, _, _, file_entries in self._files.values() for e in file_entries),
+            key=lambda e: (e.start, e.end, e.program, e.event),
+        )
+        by_key: Dict[Tuple[str, str], List[Deadline]] = {}
+        for entry in entries:
+            by_key.setdefault((entry.program, entry.event), []).append(entry)
+        self.timeline = entries
+        self._starts = [e.start for e in entries]
+        self.by_key = by_key
+
+    def update_document(self, path) -> bool:
+        """(Re)parse one document if it changed since it was last indexed"""
+        path = Path(path)
+        source = self._source_name(path)
+        stat = path.stat()
+        with self._lock:
+            known = self._files.get(source)
+            if known and known[1] == stat.st_mtime_ns and known[2] == stat.st_size:
+                return False
+            entries = parse_document(path.read_text(encoding="utf-8"), source, self.programs)
+            self._files[source] = (path, stat.st_mtime_ns, stat.st_size, entries)
+            self._rebuild()
+        return True
+
+    def remove_document(self, path):
+        with self._lock:
+            if self._files.pop(self._source_name(Path(path)), None) is not None:
+                self._rebuild()
+
+    def refresh(self) -> int:
+        """Re-parse changed documents and drop deleted ones; returns the number changed"""
+        for path, _, _, _ in list(self._files.values()):
+            if not path.exists():
+                self.remove_document(path)
+        changed = sum(self.update_document(f) for f in self.data_dir.glob("**/*.txt"))
+        if changed:
+            logger.info(f"Deadline index refreshed: {changed} documents, {len(self.timeline)} entries")
+        return changed
+
+    def lookup(self, program: Optional[str], event: Optional[str]) -> List[Deadline]:
+        """Entries for a program/event, falling back to entries that apply to all programs"""
+        programs = [program, ALL_PROGRAMS] if program else [ALL_PROGRAMS]
+        for name in programs:
+            if event:
+                found = self.by_key.get((name, event))
+            else:
+                found = [e for e in self.timeline if e.program == name]
+            if found:
+                return found
+        return []
+
+    def upcoming(self, today: Optional[date] = None, limit: int = 5) -> List[Deadline]:
+        """Next deadlines starting on or after today"""
+        position = bisect.bisect_left(self._starts, today or date.today())
+        return self.timeline[position:position + limit]
+
+
+_index: Optional[DeadlineIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_deadline_index() -> DeadlineIndex:
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                index = DeadlineIndex()
+                index.refresh()
+                _index = index
+    return _index
+
+
+def answer_deadline_question(question: str) -> Optional[Dict]:
+    """
+    Answer a date question from the deadline index.
+    Returns None when nothing relevant is indexed, so the caller can fall back to RAG.
+    """
+    index = get_deadline_index()
+    mentioned = find_programs(question, index.programs)
+    program = mentioned[0]["name"] if mentioned else None
+    event = classify_event(question)
+    if event is None and not _ALL_DATES.search(question.lower()):
+        # "When was the university founded?" is a date question the calendar can't answer
+        return None
+
+    entries = index.lookup(program, event)
+    if not entries:
+        return None
+
+    sentences = []
+    for entry in entries:
+        sentence = f"{entry.label}: {entry.text}"
+        if program and entry.program == ALL_PROGRAMS:
+            sentence += f" (applies to all programs, including {program})"
+        sentences.append(sentence)
+
+    sources = []
+    for source in dict.fromkeys(e.source for e in entries):
+        parts = source.split("/")
+        sources.append({
+            "category": (parts[-2] if len(parts) >= 2 else "general").title(),
+            "filename": Path(parts[-1]).stem.replace("_", " ").title(),
+            "snippet": "; ".join(f"{e.label}: {e.text}" for e in entries if e.source == source),
+        })
+
+    return {
+        "answer": ". ".join(sentences) + ". Dates are subject to official notifications.",
+        "sources": sources,
+    }
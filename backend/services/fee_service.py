@@ -0,0 +1,109 @@
+import re
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from backend.services.program_catalog import DATA_DIR, load_programs, normalize
+
+_FEE_LINE = re.compile(r"₹[\d,]+(?:\s*[–-]\s*₹[\d,]+)?(?:\s*per\s+\w+)?")
+
+
+def _section_fee(text: str, heading: str) -> Optional[str]:
+    """Return the first fee amount listed under a heading such as 'Fee:'"""
+    match = re.search(rf"^{re.escape(heading)}\s*\n((?:\s*-.*\n?)+)", text, re.MULTILINE)
+    if not match:
+        return None
+    amount = _FEE_LINE.search(match.group(1))
+    return amount.group(0).strip() if amount else None
+
+
+def load_fee_table(data_dir: Path = DATA_DIR) -> List[Dict]:
+    """
+    Parse the fee documents into a lookup table.
+    Each entry has a display name, normalized aliases, the fee text and its source.
+    """
+    entries = []
+
+    for program in load_programs(data_dir):
+        fee = _section_fee(program["text"], "Fee:")
+        if not fee:
+            continue
+        entries.append({
+            "name": program["name"],
+            "aliases": program["aliases"],
+            "fee": fee,
+            "source": program["source"],
+        })
+
+    hostel_file = data_dir / "fees" / "hostel_fees.txt"
+    if hostel_file.exists():
+        fee = _section_fee(hostel_file.read_text(encoding="utf-8"), "Hostel Fee:")
+        if fee:
+            entries.append({
+                "name": "Hostel",
+                "aliases": {"hostel", "hostel fee", "accommodation"},
+                "fee": fee,
+                "source": hostel_file.relative_to(data_dir).as_posix(),
+            })
+
+    tuition_file = data_dir / "fees" / "tuition_fees.txt"
+    if tuition_file.exists():
+        for line in tuition_file.read_text(encoding="utf-8").splitlines():
+            match = re.match(r"\s*(\w+) Programs:\s*(.+)$", line)
+            if not match:
+                continue
+            level = match.group(1)
+            aliases = {normalize(level)}
+            if level.lower() == "undergraduate":
+                aliases |= {"ug", "bachelor", "bachelors"}
+            elif level.lower() == "postgraduate":
+                aliases |= {"pg", "master", "masters"}
+            elif level.lower() == "doctoral":
+                aliases |= {"doctorate", "phd"}
+            entries.append({
+                "name": f"{level} Programs",
+                "aliases": aliases,
+                "fee": match.group(2).strip(),
+                "source": tuition_file.relative_to(data_dir).as_posix(),
+            })
+
+    return entries
+
+
+_fee_table: Optional[List[Dict]] = None
+
+
+def lookup_fee(question: str) -> Optional[Dict]:
+    """
+    Answer a fee question from the fee table.
+    Returns None when no program or fee category is mentioned.
+    """
+    global _fee_table
+    if _fee_table is None:
+        _fee_table = load_fee_table()
+
+    padded = f" {normalize(question)} "
+    matches = []
+    for entry in _fee_table:
+        alias_hits = [a for a in entry["aliases"] if f" {a} " in padded]
+        if alias_hits:
+            matches.append((max(len(a) for a in alias_hits), entry))
+
+    if not matches:
+        return None
+
+    # Prefer the most specific (longest) alias, but answer every entry that ties
+    longest = max(length for length, _ in matches)
+    found = [entry for length, entry in matches if length == longest]
+
+    answer = " ".join(f"The {e['name']} fee is {e['fee']}." for e in found)
+    return {
+        "answer": answer,
+        "sources": [
+            {
+                "category": e["source"].split("/")[0].title(),
+                "filename": Path(e["source"]).stem.replace("_", " ").title(),
+                "snippet": f"{e['name']}: {e['fee']}",
+            }
+            for e in found
+        ],
+    }
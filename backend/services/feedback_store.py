@@ -0,0 +1,309 @@
+"""
+Group-committed, rotating feedback store.
+
+Feedback entries are buffered in memory and written by a single writer in
+batches (one write + fsync per batch), so concurrent requests never
+interleave lines. The active JSONL file is rotated by size or by day and
+rotated segments are gzip-compressed. A compact in-memory index of
+(timestamp, message_id, feedback_type, segment, offset, length) tuples,
+persisted next to each rotated segment, serves lookups by message ID and
+date range without scanning the files.
+"""
+import asyncio
+import bisect
+import gzip
+import json
+import logging
+import os
+import shutil
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from backend.config import settings
+
+logger = logging.getLogger(__name__)
+
+FEEDBACK_DIR = Path("data/feedback")
+ACTIVE_FILE = "feedback.jsonl"
+
+# (timestamp, message_id, feedback_type, segment, offset, length)
+IndexEntry = Tuple[str, str, str, str, int, int]
+
+
+class FeedbackStore:
+    def __init__(
+        self,
+        directory: Path = FEEDBACK_DIR,
+        batch_size: int = settings.FEEDBACK_BATCH_SIZE,
+        flush_interval: float = settings.FEEDBACK_FLUSH_INTERVAL,
+        max_file_bytes: int = settings.FEEDBACK_MAX_FILE_BYTES,
+    ):
+        self.directory = Path(directory)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_file_bytes = max_file_bytes
+
+        self._pending: List[Dict] = []
+        self._pending_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+        self._timeline: List[IndexEntry] = []
+        self._timestamps: List[str] = []
+        self._by_message: Dict[str, List[IndexEntry]] = {}
+        self._active_date: Optional[str] = None
+        self._loaded = False
+
+        self.written = 0
+        self.commits = 0
+        self.rotations = 0
+
+    @property
+    def active_path(self) -> Path:
+        return self.directory / ACTIVE_FILE
+
+    # ===============================
+    # Index
+    # ===============================
+    def _add_to_index(self, entry: IndexEntry):
+        position = bisect.bisect_right(self._timestamps, entry[0])
+        self._timestamps.insert(position, entry[0])
+        self._timeline.insert(position, entry)
+        self._by_message.setdefault(entry[1], []).append(entry)
+
+    @staticmethod
+    def _scan(lines, segment: str) -> List[IndexEntry]:
+        entries, offset = [], 0
+        for line in lines:
+            try:
+                data = json.loads(line)
+                entries.append((
+                    data.get("timestamp", ""), data.get("message_id", ""),
+                    data.get("feedback_type", ""), segment, offset, len(line),
+                ))
+            except ValueError:
+                pass
+            offset += len(line)
+        return entries
+
+    def _load(self):
+        """Load segment sidecar indexes and scan the active file once"""
+        if self._loaded:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        for segment in sorted(self.directory.glob("feedback-*.jsonl.gz")):
+            sidecar = segment.with_name(segment.name + ".idx")
+            if sidecar.exists():
+                entries = [tuple(e) for e in json.loads(sidecar.read_text())]
+            else:
+                with gzip.open(segment, "rb") as f:
+                    entries = self._scan(f, segment.name)
+            for entry in entries:
+                self._add_to_index(entry)
+
+        if self.active_path.exists():
+            with open(self.active_path, "rb") as f:
+                entries = self._scan(f, ACTIVE_FILE)
+            for entry in entries:
+                self._add_to_index(entry)
+            if entries:
+                self._active_date = entries[0][0][:10]
+
+        self._loaded = True
+
+    # ===============================
+    # Writing
+    # ===============================
+    def submit(self, entry: Dict):
+        """Queue one feedback entry; it is durable after the next group commit"""
+        with self._pending_lock:
+            self._pending.append(entry)
+            should_wake = len(self._pending) >= self.batch_size
+
+        loop = self._loop
+        if loop is None:
+            self.flush()  # no background writer running: commit synchronously
+        elif should_wake:
+            loop.call_soon_threadsafe(self._wakeup.set)
+
+    def _rotate(self):
+        """Compress the active file into a dated segment with a sidecar index"""
+        if not self.active_path.exists() or self.active_path.stat().st_size == 0:
+            return
+        stamp = datetime.utcnow().strftime("%Y%m%d-%H%M%S-%f")
+        segment = self.directory / f"feedback-{stamp}.jsonl.gz"
+
+        with open(self.active_path, "rb") as src, gzip.open(segment, "wb") as dst:
+            shutil.copyfileobj(src, dst)
+
+        # Point index entries at the new segment and persist its sidecar index
+        self._timeline = [
+            entry[:3] + (segment.name,) + entry[4:] if entry[3] == ACTIVE_FILE else entry
+            for entry in self._timeline
+        ]
+        self._by_message = {}
+        for entry in self._timeline:
+            self._by_message.setdefault(entry[1], []).append(entry)
+        segment_entries = [entry for entry in self._timeline if entry[3] == segment.name]
+        segment.with_name(segment.name + ".idx").write_text(json.dumps(segment_entries))
+        self.active_path.unlink()
+
+        self._active_date = None
+        self.rotations += 1
+
+    def flush(self) -> int:
+        """Group-commit everything pending: one write and one fsync per call"""
+        with self._pending_lock:
+            pending, self._pending = self._pending, []
+        if not pending:
+            return 0
+
+        with self._write_lock:
+            self._load()
+            today = pending[0].get("timestamp", "")[:10]
+            size = self.active_path.stat().st_size if self.active_path.exists() else 0
+            if size >= self.max_file_bytes or (self._active_date and self._active_date != today):
+                self._rotate()
+                size = 0
+
+            lines = [(json.dumps(entry) + "\n").encode("utf-8") for entry in pending]
+            try:
+                with open(self.active_path, "ab") as f:
+                    f.write(b"".join(lines))
+                    f.flush()
+                    os.fsync(f.fileno())
+            except OSError:
+                with self._pending_lock:
+                    self._pending = pending + self._pending  # retry on the next commit
+                raise
+
+            offset = size
+            for entry, line in zip(pending, lines):
+                self._add_to_index((
+                    entry.get("timestamp", ""), entry.get("message_id", ""),
+                    entry.get("feedback_type", ""), ACTIVE_FILE, offset, len(line),
+                ))
+                offset += len(line)
+            self._active_date = self._active_date or today
+
+            self.written += len(pending)
+            self.commits += 1
+        return len(pending)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await loop.run_in_executor(None, self.flush)
+            except Exception as e:
+                logger.error(f"Failed to commit feedback: {e}")
+
+    async def start(self):
+        if self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        await self._loop.run_in_executor(None, self._load_locked)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._loop = None
+        await asyncio.get_running_loop().run_in_executor(None, self.flush)
+
+    def _load_locked(self):
+        with self._write_lock:
+            self._load()
+
+    # ===============================
+    # Queries
+    # ===============================
+    def _read(self, entry: IndexEntry) -> Optional[Dict]:
+        path = self.directory / entry[3]
+        opener = gzip.open if path.suffix == ".gz" else open
+        try:
+            with opener(path, "rb") as f:
+                f.seek(entry[4])
+                return json.loads(f.read(entry[5]))
+        except (OSError, ValueError) as e:
+            logger.error(f"Failed to read feedback entry from {path}: {e}")
+            return None
+
+    def entries(self):
+        """Yield every committed entry, oldest segment first (for rebuilding derived state)"""
+        with self._write_lock:
+            self._load()
+            paths = sorted(self.directory.glob("feedback-*.jsonl.gz")) + [self.active_path]
+        for path in paths:
+            if not path.exists():
+                continue
+            opener = gzip.open if path.suffix == ".gz" else open
+            with opener(path, "rb") as f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue
+
+    def query(
+        self,
+        message_id: Optional[str] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        limit: int = 100,
+    ) -> List[Dict]:
+        """Feedback entries by message ID and/or timestamp range, oldest first"""
+        with self._write_lock:
+            self._load()
+            if message_id is not None:
+                candidates = list(self._by_message.get(message_id, []))
+                if start:
+                    candidates = [e for e in candidates if e[0] >= start.isoformat()]
+                if end:
+                    candidates = [e for e in candidates if e[0] <= end.isoformat()]
+            else:
+                lo = bisect.bisect_left(self._timestamps, start.isoformat()) if start else 0
+                hi = bisect.bisect_right(self._timestamps, end.isoformat()) if end else len(self._timestamps)
+                candidates = self._timeline[lo:hi]
+            candidates = candidates[:limit]
+
+        return [entry for entry in map(self._read, candidates) if entry is not None]
+
+    def counts(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> Dict[str, int]:
+        """Per-type feedback counts in a date range, answered from the index alone"""
+        with self._write_lock:
+            self._load()
+            lo = bisect.bisect_left(self._timestamps, start.isoformat()) if start else 0
+            hi = bisect.bisect_right(self._timestamps, end.isoformat()) if end else len(self._timestamps)
+            counts: Dict[str, int] = {}
+            for entry in self._timeline[lo:hi]:
+                counts[entry[2]] = counts.get(entry[2], 0) + 1
+        return counts
+
+    def stats(self) -> Dict:
+        return {
+            "pending": len(self._pending),
+            "indexed": len(self._timeline),
+            "written": self.written,
+            "commits": self.commits,
+            "rotations": self.rotations,
+        }
+
+
+feedback_store = FeedbackStore()
@@ -0,0 +1,337 @@
+"""
+Local intent router.
+
+Classifies a question into one of a few intents with hashed keyword/n-gram
+features and a small softmax (multinomial logistic regression) model trained
+in NumPy. Cheap intents are answered by deterministic handlers; only
+open-ended questions ("rag") go through retrieval and Granite generation.
+"""
+import logging
+import re
+import threading
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from backend.config import settings
+from backend.services.course_recommender import get_recommender
+from backend.services.deadline_service import answer_deadline_question
+from backend.services.fee_service import lookup_fee
+
+logger = logging.getLogger(__name__)
+
+INTENTS = ["small_talk", "deadline", "fee", "course_recommendation", "rag"]
+
+N_FEATURES = 2 ** 12
+
+# Keyword groups become extra dense indicator features on top of the hashed n-grams
+KEYWORDS = {
+    "small_talk": {"hi", "hello", "hey", "thanks", "thank", "bye", "morning", "evening", "afternoon", "who", "help"},
+    "deadline": {"deadline", "date", "dates", "last", "when", "start", "starts", "begin", "begins", "schedule", "till", "until"},
+    "fee": {"fee", "fees", "cost", "costs", "price", "tuition", "charges", "expensive", "afford", "pay"},
+    "course_recommendation": {"recommend", "suggest", "suitable", "best", "interested", "interest", "career", "course", "courses"},
+}
+_KEYWORD_OFFSET = N_FEATURES
+_N_TOTAL_FEATURES = N_FEATURES + len(KEYWORDS)
+
+SEED_EXAMPLES: List[Tuple[str, str]] = [
+    ("hi", "small_talk"),
+    ("hello", "small_talk"),
+    ("hey", "small_talk"),
+    ("hi there!", "small_talk"),
+    ("hello, who are you", "small_talk"),
+    ("good morning", "small_talk"),
+    ("good evening", "small_talk"),
+    ("greetings", "small_talk"),
+    ("who are you", "small_talk"),
+    ("what is this", "small_talk"),
+    ("what can you do", "small_talk"),
+    ("how can you help me", "small_talk"),
+    ("can you help me", "small_talk"),
+    ("thanks", "small_talk"),
+    ("thank you so much", "small_talk"),
+    ("ok bye", "small_talk"),
+    ("hey, how are you doing?", "small_talk"),
+    ("when is the last date to apply", "deadline"),
+    ("when is the last date for mba application?", "deadline"),
+    ("what is the application deadline", "deadline"),
+    ("when does the academic session begin", "deadline"),
+    ("when is the entrance test", "deadline"),
+    ("important dates for admission", "deadline"),
+    ("when do counseling rounds start", "deadline"),
+    ("till when can i apply for btech", "deadline"),
+    ("when does the application start", "deadline"),
+    ("vunet exam date", "deadline"),
+    ("admission schedule 2025", "deadline"),
+    ("what is the deadline for phd", "deadline"),
+    ("deadline for bba admission", "deadline"),
+    ("last date for hostel application", "deadline"),
+    ("what is the fee for mba", "fee"),
+    ("how much are the btech fees", "fee"),
+    ("mba fees", "fee"),
+    ("what is the hostel fee", "fee"),
+    ("how much does bba cost", "fee"),
+    ("tuition fee for postgraduate programs", "fee"),
+    ("fee structure of msc data science", "fee"),
+    ("what are the charges for bdes", "fee"),
+    ("how much do i have to pay for phd", "fee"),
+    ("cost of the b.tech computer science program", "fee"),
+    ("which course should i take after 12th science", "course_recommendation"),
+    ("recommend a program for me", "course_recommendation"),
+    ("i like maths and physics, which course is best", "course_recommendation"),
+    ("suggest a course for commerce students", "course_recommendation"),
+    ("i am interested in design, what should i study", "course_recommendation"),
+    ("which program is suitable for a career in data science", "course_recommendation"),
+    ("best course after graduation", "course_recommendation"),
+    ("what should i choose, bba or btech", "course_recommendation"),
+    ("i studied biology, which course can i do", "course_recommendation"),
+    ("what is the admission process", "rag"),
+    ("which documents are required for admission", "rag"),
+    ("which documents do i need", "rag"),
+    ("what do i need to bring for document verification", "rag"),
+    ("which companies visit for placements", "rag"),
+    ("what is the eligibility for btech", "rag"),
+    ("is there a gym on campus", "rag"),
+    ("how do i apply", "rag"),
+    ("tell me about hostel facilities", "rag"),
+    ("what are the eligibility criteria for mba", "rag"),
+    ("who are the top recruiters", "rag"),
+    ("what is the average placement package", "rag"),
+    ("are scholarships available", "rag"),
+    ("what sports facilities are on campus", "rag"),
+    ("is hostel compulsory", "rag"),
+    ("what is vunet", "rag"),
+    ("does the university offer emi options", "rag"),
+    ("tell me about the msc data science program", "rag"),
+    ("what specializations are offered in mba", "rag"),
+    ("is the mess vegetarian", "rag"),
+    # Short questions with small-talk words that are really about the university
+    ("can you help me with the admission process", "rag"),
+    ("can you help me with my application form", "rag"),
+    ("help me choose a hostel", "rag"),
+    ("help me with the scholarship application", "rag"),
+    ("who can apply for phd", "rag"),
+    ("who is eligible for mba", "rag"),
+    ("who teaches data science", "rag"),
+    ("who is the head of the computer science department", "rag"),
+    ("can i get a scholarship", "rag"),
+    ("can i change my branch after first year", "rag"),
+    ("how can i choose my specialization in mba", "rag"),
+    ("thank you, also what documents are needed", "rag"),
+]
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def _tokenize(text: str) -> List[str]:
+    return _TOKEN_PATTERN.findall(text.lower().replace(".", ""))
+
+
+def _feature_indices(text: str) -> List[int]:
+    """Hashed unigram + bigram indices plus keyword-group indicator indices"""
+    tokens = _tokenize(text)
+    grams = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    indices = [zlib.crc32(g.encode("utf-8")) % N_FEATURES for g in grams]
+
+    token_set = set(tokens)
+    for offset, words in enumerate(KEYWORDS.values()):
+        if token_set & words:
+            indices.append(_KEYWORD_OFFSET + offset)
+    return indices
+
+
+def vectorize(texts: List[str]) -> np.ndarray:
+    """Turn texts into an L2-normalised (n_texts x n_features) matrix"""
+    X = np.zeros((len(texts), _N_TOTAL_FEATURES), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for idx in _feature_indices(text):
+            X[row, idx] += 1.0
+    norms = np.linalg.norm(X, axis=1, keepdims=True)
+    return X / np.maximum(norms, 1e-12)
+
+
+def _softmax(logits: np.ndarray) -> np.ndarray:
+    logits = logits - logits.max(axis=1, keepdims=True)
+    exp = np.exp(logits)
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+class IntentClassifier:
+    def __init__(self):
+        self.W = np.zeros((_N_TOTAL_FEATURES, len(INTENTS)), dtype=np.float32)
+        self.b = np.zeros(len(INTENTS), dtype=np.float32)
+
+    def fit(self, texts: List[str], labels: List[str], epochs: int = 300, lr: float = 2.0, l2: float = 1e-4):
+        """Full-batch gradient descent on the softmax cross-entropy loss"""
+        X = vectorize(texts)
+        Y = np.zeros((len(labels), len(INTENTS)), dtype=np.float32)
+        Y[np.arange(len(labels)), [INTENTS.index(label) for label in labels]] = 1.0
+
+        n = len(texts)
+        for _ in range(epochs):
+            grad = (_softmax(X @ self.W + self.b) - Y) / n
+            self.W -= lr * (X.T @ grad + l2 * self.W)
+            self.b -= lr * grad.sum(axis=0)
+        return self
+
+    def predict_proba(self, texts: List[str]) -> np.ndarray:
+        return _softmax(vectorize(texts) @ self.W + self.b)
+
+    def predict(self, text: str) -> Tuple[str, float]:
+        probs = self.predict_proba([text])[0]
+        best = int(np.argmax(probs))
+        return INTENTS[best], float(probs[best])
+
+
+def _chat_log_examples(model: IntentClassifier) -> List[Tuple[str, str]]:
+    """
+    Pseudo-label logged production questions with the seed model.
+    Only confident predictions are kept, so the logs widen the vocabulary
+    without drifting the decision boundaries.
+    """
+    try:
+        from backend.database import SessionLocal
+        from backend.models.chat_log import ChatLog
+
+        db = SessionLocal()
+        try:
+            rows = (
+                db.query(ChatLog.question)
+                .order_by(ChatLog.id.desc())
+                .limit(settings.INTENT_MAX_LOG_EXAMPLES)
+                .all()
+            )
+        finally:
+            db.close()
+    except Exception as e:
+        logger.info(f"No chat logs available for intent training: {e}")
+        return []
+
+    questions = list({row.question for row in rows if row.question})
+    if not questions:
+        return []
+
+    probs = model.predict_proba(questions)
+    best = probs.argmax(axis=1)
+    return [
+        (q, INTENTS[i])
+        for q, i, p in zip(questions, best, probs.max(axis=1))
+        if p >= settings.INTENT_SELF_TRAIN_THRESHOLD
+    ]
+
+
+def train_intent_classifier(use_chat_logs: bool = True) -> IntentClassifier:
+    texts, labels = map(list, zip(*SEED_EXAMPLES))
+    model = IntentClassifier().fit(texts, labels)
+
+    if use_chat_logs:
+        extra = _chat_log_examples(model)
+        if extra:
+            extra_texts, extra_labels = map(list, zip(*extra))
+            model = IntentClassifier().fit(texts + extra_texts, labels + extra_labels)
+            logger.info(f"Intent classifier trained with {len(extra)} chat log examples")
+    return model
+
+
+_classifier: Optional[IntentClassifier] = None
+_classifier_lock = threading.Lock()
+
+
+def get_intent_classifier() -> IntentClassifier:
+    global _classifier
+    if _classifier is None:
+        with _classifier_lock:
+            if _classifier is None:
+                _classifier = train_intent_classifier()
+    return _classifier
+
+
+def classify_intent(question: str) -> Tuple[str, float]:
+    """Return (intent, confidence); low-confidence questions are routed to RAG"""
+    intent, confidence = get_intent_classifier().predict(question)
+    if confidence < settings.INTENT_CONFIDENCE_THRESHOLD:
+        return "rag", confidence
+    return intent, confidence
+
+
+# ===============================
+# Deterministic handlers
+# ===============================
+# Everything a greeting, a thank-you or a question about the assistant itself is made of
+_SMALL_TALK_WORDS = {
+    "hi", "hii", "hello", "hey", "greetings", "good", "morning", "evening", "afternoon", "day", "there",
+    "bye", "goodbye", "see", "later", "ok", "okay", "thanks", "thank", "so", "much", "a", "lot", "very",
+    "who", "what", "are", "is", "this", "you", "your", "name", "can", "do", "how", "help", "me", "doing",
+}
+
+
+def _handle_small_talk(question: str) -> Optional[Dict]:
+    tokens = set(_tokenize(question))
+    # "Thanks! Also, what documents are needed?" is a question; anything beyond small talk goes to RAG
+    if not tokens or not tokens <= _SMALL_TALK_WORDS:
+        return None
+    if tokens & {"thanks", "thank"}:
+        answer = "You're welcome! Let me know if you have any other questions about Vishwakarma University."
+    elif tokens & {"who", "what", "help", "can", "do"}:
+        answer = "I am an AI assistant here to help you with information about Vishwakarma University admissions, programs, fees, and campus life. Feel free to ask me anything!"
+    else:
+        answer = "Hello! I am the Vishwakarma University Admission Assistant. How can I help you today?"
+    return {"answer": answer, "sources": []}
+
+
+def _handle_deadline(question: str) -> Optional[Dict]:
+    return answer_deadline_question(question)
+
+
+def _handle_fee(question: str) -> Optional[Dict]:
+    return lookup_fee(question)
+
+
+def _handle_course_recommendation(question: str) -> Optional[Dict]:
+    recommendations = get_recommender().recommend(question)
+    if not recommendations:
+        return None
+    return {
+        "answer": "Based on your background, you may consider: " + "; ".join(
+            f"{r['program']} ({r['reasons'][0]})" for r in recommendations
+        ) + ".",
+        "sources": [
+            {
+                "category": "Programs",
+                "filename": r["source"].split("/")[-1].replace(".txt", "").replace("_", " ").title(),
+                "snippet": ". ".join(r["reasons"]),
+            }
+            for r in recommendations
+        ],
+    }
+
+
+HANDLERS = {
+    "small_talk": _handle_small_talk,
+    "deadline": _handle_deadline,
+    "fee": _handle_fee,
+    "course_recommendation": _handle_course_recommendation,
+}
+
+
+def route_question(question: str) -> Optional[Dict]:
+    """
+    Answer the question with a deterministic handler if its intent allows it.
+    Returns None for open-ended questions, or when a handler has no answer,
+    so the caller falls through to RAG.
+    """
+    intent, confidence = classify_intent(question)
+    handler = HANDLERS.get(intent)
+    if handler is None:
+        return None
+
+    try:
+        result = handler(question)
+    except Exception as e:
+        logger.error(f"Intent handler '{intent}' failed: {e}")
+        return None
+
+    if result is not None:
+        result["intent"] = intent
+    return result
@@ -0,0 +1,67 @@
+import re
+from pathlib import Path
+from typing import Dict, List
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+PROGRAMS_DIR = DATA_DIR / "programs"
+
+
+def normalize(text: str) -> str:
+    """Lowercase, drop dots and punctuation ("B.Tech" -> "btech") for alias matching"""
+    text = text.lower().replace(".", "").replace("’", "'")
+    return " ".join(re.findall(r"[a-z0-9+]+", text))
+
+
+def _header(text: str, key: str) -> str:
+    match = re.search(rf"^{key}:\s*(.+)$", text, re.MULTILINE)
+    return match.group(1).strip() if match else ""
+
+
+def _section(text: str, heading: str) -> List[str]:
+    """Return the '- item' lines listed under a heading such as 'Eligibility:'"""
+    match = re.search(rf"^{re.escape(heading)}\s*\n((?:[ \t]*-.*\n?)+)", text, re.MULTILINE)
+    if not match:
+        return []
+    return [line.strip().lstrip("-").strip() for line in match.group(1).splitlines() if line.strip()]
+
+
+def parse_program(file: Path, data_dir: Path = DATA_DIR) -> Dict:
+    """Parse one program document into a structured record"""
+    text = file.read_text(encoding="utf-8")
+    name = _header(text, "PROGRAM") or file.stem.replace("_", " ").title()
+
+    body = re.sub(r"^[A-Z_]+:.*$", "", text, flags=re.MULTILINE)
+    description = next(
+        (p.strip() for p in body.split("\n\n") if p.strip() and not p.strip().endswith(":")
+         and ":\n" not in p and not p.strip().startswith("-")),
+        "",
+    )
+
+    return {
+        "name": name,
+        "aliases": {normalize(name), normalize(file.stem.replace("_", " "))},
+        "duration": _header(text, "DURATION"),
+        "description": description,
+        "eligibility": _section(text, "Eligibility:"),
+        "fee": _section(text, "Fee:"),
+        "placements": _section(text, "Placements:"),
+        "text": text,
+        "source": file.relative_to(data_dir).as_posix(),
+    }
+
+
+def load_programs(data_dir: Path = DATA_DIR) -> List[Dict]:
+    """Parse every program document under data/programs"""
+    return [parse_program(f, data_dir) for f in sorted((data_dir / "programs").glob("*.txt"))]
+
+
+def find_programs(question: str, programs: List[Dict]) -> List[Dict]:
+    """Programs whose name or alias appears in the question, most specific first"""
+    padded = f" {normalize(question)} "
+    matches = []
+    for program in programs:
+        hits = [a for a in program["aliases"] if f" {a} " in padded]
+        if hits:
+            matches.append((max(len(a) for a in hits), program))
+    matches.sort(key=lambda m: m[0], reverse=True)
+    return [program for _, program in matches]
@@ -0,0 +1,220 @@
+"""
+Server-side conversation sessions.
+
+A session keeps the last few turns verbatim and compacts older ones into
+one-line summaries, so the history put into a prompt never exceeds
+SESSION_TOKEN_BUDGET however long the conversation runs. It also remembers
+its last retrieval: a follow-up that is lexically close to the query that
+produced it reuses those chunks instead of embedding and searching again,
+and a short follow-up ("and the hostel fee?") is retrieved together with
+the last standalone question.
+
+Sessions are evicted least-recently-used beyond SESSION_MAX and after
+SESSION_TTL seconds of inactivity.
+"""
+import math
+import re
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from backend.config import settings
+from backend.rag.faq_index import _tokenize
+from backend.utils.metrics import registry
+
+SESSION_RETRIEVALS = registry.counter(
+    "session_retrievals_total", "Retrievals for session turns, by whether results were reused",
+    labels=("result",)
+)
+
+# Openers that make a question lean on the previous turn
+_FOLLOW_UP_OPENERS = {"and", "also", "what about", "how about", "it", "its", "that", "this", "those", "they", "them"}
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token); good enough for budgeting"""
+    return math.ceil(len(text) / 4) if text else 0
+
+
+def _clip_words(text: str, words: int) -> str:
+    parts = text.split()
+    return " ".join(parts[:words]) + (" ..." if len(parts) > words else "")
+
+
+def _clip_tokens(text: str, tokens: int) -> str:
+    limit = tokens * 4
+    return text if len(text) <= limit else text[:limit].rsplit(" ", 1)[0] + " ..."
+
+
+def _lexical_similarity(a: Counter, b: Counter) -> float:
+    if not a or not b:
+        return 0.0
+    dot = sum(count * b[token] for token, count in a.items())
+    return dot / math.sqrt(sum(c * c for c in a.values()) * sum(c * c for c in b.values()))
+
+
+@dataclass
+class Turn:
+    question: str
+    answer: str
+    tokens: int
+
+
+@dataclass
+class Session:
+    id: str
+    turns: List[Turn] = field(default_factory=list)
+    summary: List[str] = field(default_factory=list)
+    # Last standalone question; follow-ups are retrieved together with it
+    topic: Optional[str] = None
+    last_query: Optional[str] = None
+    last_query_words: Counter = field(default_factory=Counter)
+    last_retrieval: Optional[Dict] = None
+    touched_at: float = field(default_factory=time.monotonic)
+
+    def is_follow_up(self, question: str) -> bool:
+        """Whether the question only makes sense next to the previous turn"""
+        if not self.turns:
+            return False
+        lowered = " ".join(question.lower().split())
+        if any(lowered == o or lowered.startswith(o + " ") for o in _FOLLOW_UP_OPENERS):
+            return True
+        return len(_tokenize(question)) <= settings.SESSION_FOLLOWUP_MAX_WORDS
+
+    def retrieval_query(self, question: str) -> str:
+        """The question, anchored to the conversation's topic when it is a follow-up"""
+        if self.topic and self.is_follow_up(question):
+            return f"{self.topic} {question}"
+        return question
+
+    def reusable_retrieval(self, question: str) -> Optional[Dict]:
+        """The last retrieval result, if the question is close enough to the query behind it"""
+        if self.last_retrieval is None:
+            return None
+        similarity = _lexical_similarity(Counter(_tokenize(question)), self.last_query_words)
+        if similarity < settings.SESSION_REUSE_SIMILARITY:
+            return None
+        return self.last_retrieval
+
+    def remember_retrieval(self, query: str, result: Dict):
+        self.last_query = query
+        self.last_query_words = Counter(_tokenize(query))
+        self.last_retrieval = result
+
+    def history(self) -> str:
+        """Summaries of older turns followed by the recent ones, for the prompt"""
+        lines = list(self.summary)
+        for turn in self.turns:
+            lines.append(f"User: {turn.question}")
+            lines.append(f"Assistant: {turn.answer}")
+        return "\n".join(lines)
+
+    def history_tokens(self) -> int:
+        return sum(estimate_tokens(s) for s in self.summary) + sum(t.tokens for t in self.turns)
+
+    def add_turn(self, question: str, answer: str, budget: int, summary_budget: int):
+        # A single turn may use at most half the budget, so one long answer can't crowd out the rest
+        question = _clip_tokens(question.strip(), budget // 4)
+        answer = _clip_tokens(answer.strip(), budget // 4)
+        self.turns.append(Turn(question, answer, estimate_tokens(question) + estimate_tokens(answer)))
+
+        # Compact the oldest turns into one-line summaries until the history fits
+        while len(self.turns) > 1 and self.history_tokens() > budget:
+            self.summary.append(_summarize(self.turns.pop(0)))
+        while self.summary and sum(estimate_tokens(s) for s in self.summary) > summary_budget:
+            self.summary.pop(0)
+
+
+def _summarize(turn: Turn) -> str:
+    first_sentence = _SENTENCE_END.split(turn.answer, 1)[0]
+    return f"(Earlier) User asked: {_clip_words(turn.question, 12)} Answer: {_clip_words(first_sentence, 20)}"
+
+
+class SessionStore:
+    def __init__(
+        self,
+        maxsize: int = settings.SESSION_MAX,
+        ttl: float = settings.SESSION_TTL,
+        token_budget: int = settings.SESSION_TOKEN_BUDGET,
+        summary_budget: int = settings.SESSION_SUMMARY_TOKENS,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.token_budget = token_budget
+        self.summary_budget = summary_budget
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.created = 0
+        self.expired = 0
+        self.evicted = 0
+
+    def get_or_create(self, session_id: Optional[str] = None) -> Session:
+        """The live session with this id, or a new one (unknown and expired ids get a fresh id)"""
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            session = self._sessions.get(session_id) if session_id else None
+            if session is None:
+                session = Session(id=uuid.uuid4().hex)
+                self._sessions[session.id] = session
+                self.created += 1
+                while len(self._sessions) > self.maxsize:
+                    self._sessions.popitem(last=False)
+                    self.evicted += 1
+            else:
+                self._sessions.move_to_end(session.id)
+            session.touched_at = now
+            return session
+
+    def get(self, session_id: str) -> Optional[Session]:
+        with self._lock:
+            self._expire(time.monotonic())
+            return self._sessions.get(session_id)
+
+    def record(self, session: Session, question: str, answer: str):
+        with self._lock:
+            if not session.is_follow_up(question):
+                session.topic = question
+            session.add_turn(question, answer, self.token_budget, self.summary_budget)
+            session.touched_at = time.monotonic()
+            if session.id in self._sessions:
+                self._sessions.move_to_end(session.id)
+
+    def remember_retrieval(self, session: Session, query: str, result: Dict):
+        with self._lock:
+            session.remember_retrieval(query, result)
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def _expire(self, now: float):
+        # Least recently used first, so expired sessions sit at the front
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if now - session.touched_at < self.ttl:
+                break
+            self._sessions.popitem(last=False)
+            self.expired += 1
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def stats(self) -> Dict:
+        return {
+            "active": len(self._sessions),
+            "created": self.created,
+            "expired": self.expired,
+            "evicted": self.evicted,
+        }
+
+
+session_store = SessionStore()
+registry.callback(
+    "chat_sessions_active", "Conversation sessions held in memory", "gauge",
+    lambda: {(): len(session_store)},
+)
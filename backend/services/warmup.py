@@ -0,0 +1,126 @@
+"""
+Background warm-up of the in-memory indexes.
+
+The app starts serving (and answering /health) as soon as the routes are
+mounted; the FAISS store, FAQ index, intent classifier and friends are then
+loaded in a worker thread. Every component also loads lazily on first use,
+so a request that arrives mid warm-up is served, just more slowly.
+/ready reports 200 only once every component has loaded.
+"""
+import asyncio
+import logging
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+
+from backend.utils.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+WARMUP_DURATION = registry.gauge(
+    "warmup_component_seconds", "Time taken to load each component at startup", labels=("component",)
+)
+
+
+def _vector_store():
+    from backend.rag.retriever import vector_store
+    vector_store.load()
+
+
+def _faq_index():
+    from backend.rag.faq_index import get_faq_index
+    get_faq_index()
+
+
+def _deadline_index():
+    from backend.services.deadline_service import get_deadline_index
+    get_deadline_index()
+
+
+def _intent_classifier():
+    from backend.services.intent_router import get_intent_classifier
+    get_intent_classifier()
+
+
+def _course_recommender():
+    from backend.services.course_recommender import get_recommender
+    get_recommender()
+
+
+def _feedback_loop():
+    from backend.rag.feedback_loop import get_feedback_loop
+    get_feedback_loop()
+
+
+def _llm():
+    # Loads the model file for the local provider; nothing to do for watsonx
+    from backend.granite.providers import get_llm
+    get_llm().warm()
+
+
+# Loaded in this order; the ones on the chat hot path first
+COMPONENTS: List[Tuple[str, Callable[[], None]]] = [
+    ("vector_store", _vector_store),
+    ("llm", _llm),
+    ("faq_index", _faq_index),
+    ("intent_classifier", _intent_classifier),
+    ("deadline_index", _deadline_index),
+    ("feedback_loop", _feedback_loop),
+    ("course_recommender", _course_recommender),
+]
+
+
+class Warmup:
+    def __init__(self, components: List[Tuple[str, Callable[[], None]]] = COMPONENTS):
+        self.components = components
+        self.status: Dict[str, Dict] = {name: {"state": "pending"} for name, _ in components}
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.finished_at is not None
+
+    def start(self):
+        """Schedule the warm-up on the running event loop"""
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def run(self):
+        self.started_at = time.perf_counter()
+        for name, load in self.components:
+            self.status[name] = {"state": "loading"}
+            started = time.perf_counter()
+            try:
+                await run_in_threadpool(load)
+            except Exception as e:
+                # The component will retry lazily on first use; don't hold readiness hostage
+                logger.error(f"Warm-up of {name} failed: {e}")
+                self.status[name] = {"state": "failed", "error": str(e)}
+            else:
+                self.status[name] = {"state": "ready"}
+            seconds = time.perf_counter() - started
+            self.status[name]["seconds"] = round(seconds, 4)
+            WARMUP_DURATION.set(seconds, component=name)
+        self.finished_at = time.perf_counter()
+        logger.info(f"Warm-up finished in {self.finished_at - self.started_at:.2f}s")
+
+    async def stop(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    def report(self) -> Dict:
+        elapsed = None
+        if self.started_at is not None:
+            elapsed = round((self.finished_at or time.perf_counter()) - self.started_at, 4)
+        return {"ready": self.ready, "elapsed_s": elapsed, "components": self.status}
+
+
+warmup = Warmup()
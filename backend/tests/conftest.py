@@ -0,0 +1,15 @@
+"""
+Settings are read when backend.config is first imported, so the required
+ones are given test values here, before any test module imports the app.
+"""
+import os
+import tempfile
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/test.db")
+os.environ.setdefault("JWT_SECRET", "test")
+os.environ.setdefault("IBM_CLOUD_API_KEY", "test")
+os.environ.setdefault("IBM_PROJECT_ID", "test")
+os.environ.setdefault("IBM_WATSONX_URL", "http://127.0.0.1:9")
+os.environ.setdefault("IBM_IAM_URL", "http://127.0.0.1:9/identity/token")
+os.environ.setdefault("GRANITE_EMBEDDING_MODEL", "ibm/slate-30m-english-rtrvr")
+os.environ.setdefault("GRANITE_CHAT_MODEL", "ibm/granite-3-8b-instruct")
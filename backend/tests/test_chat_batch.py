@@ -0,0 +1,68 @@
+import asyncio
+import json
+
+import pydantic
+import pytest
+
+from backend.api import chat
+from backend.api.chat import BatchChatRequest, chat_batch
+from backend.rag.rag_pipeline import NO_CONTEXT_ANSWER
+
+
+class FakeLLM:
+    available = True
+
+    def __init__(self):
+        self.prompts = []
+
+    def generate(self, prompt, route=None):
+        self.prompts.append(prompt)
+        return "Generated."
+
+
+def _run(monkeypatch, questions, retrieve):
+    llm = FakeLLM()
+    charged = []
+    monkeypatch.setattr(chat, "route_question", lambda q: {"answer": "Hello!"} if q == "hi" else None)
+    monkeypatch.setattr(chat, "lookup_faq", lambda q: None)
+    monkeypatch.setattr(chat, "retrieve_context_batch", retrieve)
+    monkeypatch.setattr(chat, "get_llm", lambda: llm)
+    monkeypatch.setattr(chat, "log_chat", lambda *args, **kwargs: None)
+
+    async def collect():
+        response = await chat_batch(BatchChatRequest(questions=questions), charge=lambda: charged.append(1))
+        return [json.loads(line) async for line in response.body_iterator]
+
+    items = sorted(asyncio.run(collect()), key=lambda item: item["index"])
+    return items, llm, charged
+
+
+def test_questions_differing_in_case_and_spacing_share_one_generation(monkeypatch):
+    retrieved = []
+
+    def retrieve(questions, k):
+        retrieved.extend(questions)
+        return [{"context": "The hostel fee is 50,000.", "sources": ["fees.txt"]} for _ in questions]
+
+    items, llm, charged = _run(
+        monkeypatch, ["What is the hostel fee?", "hi", "what is  the HOSTEL fee?"], retrieve
+    )
+    assert [item["answer"] for item in items] == ["Generated.", "Hello!", "Generated."]
+    assert [item["index"] for item in items] == [0, 1, 2]
+    assert retrieved == ["What is the hostel fee?"]
+    assert len(llm.prompts) == 1 and len(charged) == 1
+
+
+def test_failed_retrieval_without_lexical_matches_does_not_generate(monkeypatch):
+    def retrieve(questions, k):
+        raise ConnectionError("watsonx is down")
+
+    monkeypatch.setattr(chat.lexical_index, "search", lambda q, k=5: {"context": "", "sources": []})
+    items, llm, charged = _run(monkeypatch, ["What is the hostel fee?"], retrieve)
+    assert items[0]["answer"] == NO_CONTEXT_ANSWER
+    assert llm.prompts == [] and charged == []
+
+
+def test_k_is_bounded():
+    with pytest.raises(pydantic.ValidationError):
+        BatchChatRequest(questions=["q"], k=1000)
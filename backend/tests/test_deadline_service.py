@@ -0,0 +1,27 @@
+import pytest
+
+from backend.services.deadline_service import answer_deadline_question, classify_event
+
+
+@pytest.mark.parametrize("text,event", [
+    ("what is the latest date to apply for MBA?", "application_deadline"),
+    ("which is the closest hostel", None),
+    ("for example, how big is the campus", None),
+    ("when is the entrance test", "entrance_test"),
+])
+def test_keywords_match_whole_words(text, event):
+    assert classify_event(text) == event
+
+
+@pytest.mark.parametrize("question", [
+    "when was the university founded?",
+    "when will hostel allotment happen?",
+    "when do I get my hostel room?",
+])
+def test_unrecognised_events_fall_through_to_rag(question):
+    assert answer_deadline_question(question) is None
+
+
+def test_calendar_questions_get_every_date():
+    answer = answer_deadline_question("important dates for admission")["answer"]
+    assert "Entrance Test" in answer and "Last Date to Apply" in answer
@@ -0,0 +1,69 @@
+from backend.rag import faq_index
+from backend.rag.faq_index import FAQIndex, add_faq_document
+
+
+def _setup(tmp_path, monkeypatch):
+    monkeypatch.setattr(faq_index, "KNOWLEDGE_BASE_DIR", tmp_path)
+    monkeypatch.setattr(FAQIndex, "save", lambda self, path=None: None)
+    embedded = []
+
+    def embed_documents(texts):
+        embedded.extend(texts)
+        return [[1.0, float(len(t))] for t in texts]
+
+    monkeypatch.setattr(faq_index.granite_embeddings, "embed_documents", embed_documents)
+    general = {"question": "Is hostel compulsory?", "answer": "No.", "source": "faq/general_faq.txt"}
+    monkeypatch.setattr(faq_index, "_index", FAQIndex([general], [[0.0, 1.0]]))
+    (tmp_path / "faq").mkdir()
+    return tmp_path / "faq" / "hostel_faq.txt", embedded
+
+
+def _sources(index):
+    return [e["source"] for e in index.entries]
+
+
+def test_reupload_replaces_entries_and_embeds_only_new_ones(tmp_path, monkeypatch):
+    path, embedded = _setup(tmp_path, monkeypatch)
+    path.write_text("Q: Is there a mess?\nA: Yes.\n\nQ: Is wifi free?\nA: Yes.\n", encoding="utf-8")
+    add_faq_document(str(path))
+    path.write_text("Q: Is there a mess?\nA: Yes, vegetarian.\n", encoding="utf-8")
+    add_faq_document(str(path))
+
+    index = faq_index.get_faq_index()
+    assert _sources(index) == ["faq/general_faq.txt", "faq/hostel_faq.txt"]
+    assert index.entries[1]["answer"] == "Yes, vegetarian."
+    assert embedded == ["Is there a mess?", "Is wifi free?", "Is there a mess?"]
+    # The untouched entry kept its vector
+    assert index.vector_matrix[0].tolist() == [0.0, 1.0]
+    assert index.vector_matrix.shape == (2, 2)
+
+
+def test_reupload_without_pairs_removes_old_entries(tmp_path, monkeypatch):
+    path, _ = _setup(tmp_path, monkeypatch)
+    path.write_text("Q: Is there a mess?\nA: Yes.\n", encoding="utf-8")
+    add_faq_document(str(path))
+    path.write_text("The hostel has a mess.\n", encoding="utf-8")
+    add_faq_document(str(path))
+
+    assert _sources(faq_index.get_faq_index()) == ["faq/general_faq.txt"]
+
+
+def _general_faq_index():
+    text = (faq_index.KNOWLEDGE_BASE_DIR / "faq" / "general_faq.txt").read_text(encoding="utf-8")
+    return FAQIndex(faq_index.parse_faq_pairs(text, "faq/general_faq.txt"))
+
+
+def test_lexical_match_for_a_rephrased_faq():
+    match = _general_faq_index().match("Is the hostel compulsory?")
+    assert match["question"] == "Is hostel compulsory?"
+    assert match["score"] > 0.99
+
+
+def test_extra_qualifiers_are_not_an_faq_match():
+    index = _general_faq_index()
+    for question in (
+        "Is hostel food compulsory?",
+        "Is the hostel compulsory for PhD students?",
+        "Are scholarships available for sports quota in MBA?",
+    ):
+        assert index.match(question) is None, question
@@ -0,0 +1,32 @@
+import pytest
+
+from backend.services.intent_router import route_question
+
+# Questions with small-talk words in them that need a real answer
+RAG_QUESTIONS = [
+    "can you help me with the admission process?",
+    "who can apply for phd?",
+    "who teaches data science?",
+    "help me choose hostel",
+    "Thank you! Also, what documents are needed?",
+]
+
+SMALL_TALK = {
+    "hi": "Hello!",
+    "good morning": "Hello!",
+    "thank you so much": "You're welcome!",
+    "who are you?": "I am an AI assistant",
+    "what can you do": "I am an AI assistant",
+}
+
+
+@pytest.mark.parametrize("question", RAG_QUESTIONS)
+def test_questions_go_to_rag(question):
+    assert route_question(question) is None
+
+
+@pytest.mark.parametrize("question,reply", SMALL_TALK.items())
+def test_small_talk_gets_a_canned_reply(question, reply):
+    result = route_question(question)
+    assert result["intent"] == "small_talk"
+    assert result["answer"].startswith(reply)
@@ -0,0 +1,54 @@
+import asyncio
+
+from backend.rag import rag_pipeline
+from backend.rag.feedback_loop import FeedbackLoop
+from backend.rag.rag_pipeline import AnswerCache, answer_question_async, retrieve_for_session, stream_answer_question
+from backend.services.session_store import SessionStore
+
+
+def test_session_turns_remember_chunks_under_the_question_sent(monkeypatch):
+    loop = FeedbackLoop()
+    searched = []
+
+    def retrieve_context(query, k=5):
+        searched.append(query)
+        loop.remember(query, [f"chunk-{len(searched)}"])
+        return {"context": "Hostel fees are listed per year.", "sources": []}
+
+    monkeypatch.setattr(rag_pipeline, "get_feedback_loop", lambda: loop)
+    monkeypatch.setattr(rag_pipeline, "retrieve_context", retrieve_context)
+    store = SessionStore()
+    monkeypatch.setattr(rag_pipeline, "session_store", store)
+    session = store.get_or_create(None)
+
+    retrieve_for_session("What is the hostel fee?", session)
+    store.record(session, "What is the hostel fee?", "It is listed per year.")
+
+    # A follow-up is searched anchored to the topic
+    retrieve_for_session("and for PhD?", session)
+    assert searched[-1] == "What is the hostel fee? and for PhD?"
+    assert loop.chunks_for("and for PhD?") == ("chunk-2",)
+    store.record(session, "and for PhD?", "Same as for others.")
+
+    # A question close to the last query reuses its chunks without searching
+    retrieve_for_session("hostel fee for PhD", session)
+    assert len(searched) == 2
+    assert loop.chunks_for("hostel fee for PhD") == ("chunk-2",)
+
+
+def test_cached_answers_keep_their_sources(monkeypatch):
+    cache = AnswerCache()
+    monkeypatch.setattr(rag_pipeline, "get_feedback_loop", lambda: FeedbackLoop())
+    monkeypatch.setattr(rag_pipeline, "answer_cache", cache)
+    monkeypatch.setattr(rag_pipeline, "_fast_path", lambda question: None)
+    sources = [{"category": "Fees", "filename": "Hostel Fees", "snippet": "Hostel fees..."}]
+    cache.put("What is the hostel fee?", "It is 50,000 a year.", sources)
+
+    async def stream(meta):
+        return "".join([chunk async for chunk in stream_answer_question("what is the hostel fee?", None, meta)])
+
+    streamed_meta, blocking_meta = {}, {}
+    assert asyncio.run(stream(streamed_meta)) == "It is 50,000 a year."
+    assert asyncio.run(answer_question_async("What is the hostel fee?", None, blocking_meta)) == "It is 50,000 a year."
+    assert streamed_meta["sources"] == sources
+    assert blocking_meta["sources"] == sources
@@ -0,0 +1,22 @@
+import pydantic
+import pytest
+
+from backend.api.recommend import RecommendRequest
+
+
+@pytest.mark.parametrize("fields", [
+    {"top_k": 0},
+    {"top_k": -2},
+    {"top_k": 100},
+    {"budget": 0},
+    {"max_duration": -1},
+    {"level": "diploma"},
+])
+def test_invalid_profiles_are_rejected(fields):
+    with pytest.raises(pydantic.ValidationError):
+        RecommendRequest(interests="computer science", **fields)
+
+
+def test_valid_profile():
+    req = RecommendRequest(interests="computer science", budget=150000, level="postgraduate", top_k=5)
+    assert req.level == "postgraduate" and req.top_k == 5
@@ -0,0 +1,137 @@
+"""
+The watsonx retry and quota policy (granite.resilience), checked against
+the fake watsonx server from benchmarks.fake_watsonx.
+"""
+import socket
+import threading
+import time
+from email.utils import formatdate
+
+import pytest
+import requests
+import uvicorn
+
+from backend.benchmarks.fake_watsonx import FakeConfig, create_app
+from backend.config import settings
+from backend.granite import granite_client
+from backend.granite.circuit_breaker import CircuitBreaker
+from backend.granite.granite_client import GraniteClient
+from backend.granite.resilience import GRANITE_RETRIES, QuotaBucket, Throttled, retry_after_seconds
+
+
+@pytest.fixture
+def fake_watsonx(monkeypatch):
+    """Start a fake watsonx with the given FakeConfig fields; returns (client, config)"""
+    servers = []
+
+    def start(**fields):
+        config = FakeConfig(latency_ms=0, tokens_per_second=0, **fields)
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        server = uvicorn.Server(uvicorn.Config(create_app(config), host="127.0.0.1", port=port, log_level="warning"))
+        threading.Thread(target=server.run, daemon=True).start()
+        servers.append(server)
+        deadline = time.monotonic() + 10
+        while not server.started:
+            assert time.monotonic() < deadline, "fake watsonx did not start"
+            time.sleep(0.01)
+
+        url = f"http://127.0.0.1:{port}"
+        monkeypatch.setattr(settings, "IBM_IAM_URL", f"{url}/identity/token")
+        client = GraniteClient()
+        client.base_url = url
+        client.embedding_url = f"{url}/ml/v1/text/embeddings?version=2024-05-01"
+        return client, config
+
+    # A fresh quota (pauses only) and a breaker that stays closed, so tests don't affect each other
+    monkeypatch.setattr(granite_client, "watsonx_quota", QuotaBucket(rate=0, burst=1))
+    monkeypatch.setattr(granite_client, "granite_circuit", CircuitBreaker(failure_threshold=1000000))
+    yield start
+    for server in servers:
+        server.should_exit = True
+
+
+def _ml_requests(config: FakeConfig) -> int:
+    return sum(config.requests.get(name, 0) for name in ("embeddings", "throttled", "errors"))
+
+
+def test_retry_after_header_is_honoured(fake_watsonx):
+    client, config = fake_watsonx(quota_rps=1)
+    retries = GRANITE_RETRIES.value(operation="embedding", kind="throttled")
+    client.generate_embedding("first")
+
+    # The stub's quota is spent, so this call gets a 429 with Retry-After: 1 and succeeds on the retry
+    started = time.monotonic()
+    client.generate_embedding("second")
+    assert time.monotonic() - started >= 0.9
+    assert config.requests["throttled"] == 1
+    assert GRANITE_RETRIES.value(operation="embedding", kind="throttled") == retries + 1
+
+
+def test_retries_stop_at_max_retries(fake_watsonx, monkeypatch):
+    monkeypatch.setattr(settings, "GRANITE_MAX_RETRIES", 2)
+    client, config = fake_watsonx(error_rate=1.0)
+    with pytest.raises(requests.HTTPError) as raised:
+        client.generate_embedding("always fails")
+    assert raised.value.response.status_code == 503
+    assert _ml_requests(config) == 3
+
+
+def test_retry_after_beyond_the_wait_cap_is_not_waited_for(fake_watsonx, monkeypatch):
+    monkeypatch.setattr(settings, "GRANITE_RETRY_MAX_WAIT", 2.0)
+    client, config = fake_watsonx(throttle_rate=1.0, retry_after=5)
+    started = time.monotonic()
+    with pytest.raises(requests.HTTPError) as raised:
+        client.generate_embedding("throttled")
+    assert raised.value.response.status_code == 429
+    assert time.monotonic() - started < 1.0
+    assert _ml_requests(config) == 1
+
+
+def test_a_429_pauses_every_caller(fake_watsonx, monkeypatch):
+    monkeypatch.setattr(settings, "GRANITE_RETRY_MAX_WAIT", 0.5)
+    client, config = fake_watsonx(throttle_rate=1.0, retry_after=1)
+    with pytest.raises(requests.HTTPError):
+        client.generate_embedding("throttled")
+
+    # Another caller, in another thread, is held back without reaching the API
+    errors = []
+    other = threading.Thread(target=lambda: _capture(errors, client.generate_embedding, "other caller"))
+    other.start()
+    other.join()
+    assert len(errors) == 1 and isinstance(errors[0], Throttled)
+    assert _ml_requests(config) == 1
+
+    # Once the API recovers, callers wait out the rest of the pause and then go through
+    config.throttle_rate = 0.0
+    monkeypatch.setattr(settings, "GRANITE_RETRY_MAX_WAIT", 5.0)
+    started = time.monotonic()
+    client.generate_embedding("after the pause")
+    assert time.monotonic() - started > 0.2
+    assert config.requests["embeddings"] == 1
+
+
+def _capture(errors, call, *args):
+    try:
+        call(*args)
+    except Exception as e:
+        errors.append(e)
+
+
+def test_retry_after_seconds_reads_numbers_and_dates():
+    response = requests.Response()
+    response.headers["Retry-After"] = "3"
+    assert retry_after_seconds(response) == 3.0
+    response.headers["Retry-After"] = formatdate(time.time() + 30, usegmt=True)
+    assert 25 <= retry_after_seconds(response) <= 30
+    response.headers["Retry-After"] = "soon"
+    assert retry_after_seconds(response) is None
+
+
+def test_quota_bucket_rejects_waits_over_the_budget():
+    bucket = QuotaBucket(rate=10, burst=1)
+    assert bucket.acquire(max_wait=0) == 0
+    with pytest.raises(Throttled):
+        bucket.acquire(max_wait=0.01)
+    assert 0 < bucket.acquire(max_wait=1) <= 0.1
@@ -0,0 +1,326 @@
+"""
+Lightweight in-process metrics.
+
+Counters, gauges and fixed-bucket histograms rendered in the Prometheus
+text format, plus timing spans. A span records its duration in the
+stage_duration_seconds histogram and, when it runs inside an HTTP request,
+in that request's Server-Timing header (see ServerTimingMiddleware).
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(names: Tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{n}="{v}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(n, "")) for n in self.labels)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"] + self._samples()
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def __init__(self, name, help, labels=()):
+        super().__init__(name, help, labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labels, k)} {v}" for k, v in items]
+
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def __init__(self, name, help, labels=()):
+        super().__init__(name, help, labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    @contextmanager
+    def track_inprogress(self, **labels):
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+    def _samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labels, k)} {v}" for k, v in items]
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts..., +Inf count], sum
+        self._counts: Dict[LabelValues, List[int]] = {}
+        self._sums: Dict[LabelValues, float] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        position = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+                self._sums[key] = 0.0
+            counts[position] += 1
+            self._sums[key] += value
+
+    def count(self, **labels) -> int:
+        return sum(self._counts.get(self._key(labels), ()))
+
+    def _samples(self):
+        with self._lock:
+            items = [(k, list(c), self._sums[k]) for k, c in self._counts.items()]
+        lines = []
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                labels = _format_labels(self.labels, key, 'le="' + le + '"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {cumulative}")
+        return lines
+
+
+class CallbackMetric(_Metric):
+    """Counter or gauge whose values are read at scrape time (e.g. existing cache stats)"""
+
+    def __init__(self, name, help, type: str, callback: Callable[[], Dict[LabelValues, float]], labels=()):
+        super().__init__(name, help, labels)
+        self.type = type
+        self.callback = callback
+
+    def _samples(self):
+        try:
+            items = self.callback().items()
+        except Exception:
+            return []
+        return [f"{self.name}{_format_labels(self.labels, k)} {v}" for k, v in items]
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, help, labels=()) -> Counter:
+        return self._register(Counter(name, help, labels))
+
+    def gauge(self, name, help, labels=()) -> Gauge:
+        return self._register(Gauge(name, help, labels))
+
+    def histogram(self, name, help, labels=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, labels, buckets))
+
+    def callback(self, name, help, type, callback, labels=()) -> CallbackMetric:
+        return self._register(CallbackMetric(name, help, type, callback, labels))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+STAGE_DURATION = registry.histogram(
+    "stage_duration_seconds", "Time spent in each pipeline stage", labels=("stage",)
+)
+HTTP_REQUEST_DURATION = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency", labels=("method", "route", "status")
+)
+HTTP_IN_FLIGHT = registry.gauge("http_requests_in_flight", "HTTP requests currently being served")
+
+# Caches keep their own hit/miss counters; they are read at scrape time
+_caches: Dict[str, Callable[[], Tuple[int, int]]] = {}
+
+
+def register_cache(name: str, hits_and_misses: Callable[[], Tuple[int, int]]):
+    """Expose a cache's (hits, misses) as cache_requests_total{cache=name}"""
+    _caches[name] = hits_and_misses
+
+
+def _cache_samples() -> Dict[LabelValues, float]:
+    samples = {}
+    for name, read in list(_caches.items()):
+        hits, misses = read()
+        samples[(name, "hit")] = hits
+        samples[(name, "miss")] = misses
+    return samples
+
+
+registry.callback(
+    "cache_requests_total", "Cache lookups by cache and result", "counter", _cache_samples,
+    labels=("cache", "result"),
+)
+
+
+# ===============================
+# Spans and Server-Timing
+# ===============================
+# Per-request list of (stage, seconds); a list so threadpool copies of the context share it
+_request_timings: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("request_timings", default=None)
+# Path of the endpoint being served, so work done deep in the pipeline (e.g. LLM tokens) can be attributed to it
+_request_endpoint: ContextVar[str] = ContextVar("request_endpoint", default="none")
+
+
+def record_stage(stage: str, seconds: float):
+    STAGE_DURATION.observe(seconds, stage=stage)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.append((stage, seconds))
+
+
+@contextmanager
+def span(stage: str):
+    """Time a block as one pipeline stage"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - started)
+
+
+def track_timings(endpoint: Optional[str] = None) -> List[Tuple[str, float]]:
+    """Start collecting stage timings in the current context (e.g. one WebSocket stream's task)"""
+    timings: List[Tuple[str, float]] = []
+    _request_timings.set(timings)
+    if endpoint is not None:
+        _request_endpoint.set(endpoint)
+    return timings
+
+
+def current_endpoint() -> str:
+    return _request_endpoint.get()
+
+
+def request_timings() -> Dict[str, float]:
+    """Milliseconds per stage recorded so far in the current request"""
+    totals: Dict[str, float] = {}
+    for stage, seconds in _request_timings.get() or ():
+        totals[stage] = totals.get(stage, 0.0) + seconds
+    return {stage: round(seconds * 1000, 1) for stage, seconds in totals.items()}
+
+
+def server_timing_header(timings: List[Tuple[str, float]], total: float) -> str:
+    """Sum repeated stages and format them as a Server-Timing header value"""
+    totals: Dict[str, float] = {}
+    for stage, seconds in timings:
+        totals[stage] = totals.get(stage, 0.0) + seconds
+    parts = [f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in totals.items()]
+    parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
+
+
+class ServerTimingMiddleware:
+    """
+    Pure ASGI middleware: tracks in-flight requests and latency per route,
+    and adds a Server-Timing header listing the stages that finished before
+    the response headers were sent (for streamed responses, the stages
+    before the first byte).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        timings: List[Tuple[str, float]] = []
+        token = _request_timings.set(timings)
+        endpoint_token = _request_endpoint.set(scope.get("path", "none"))
+        status = {"code": 500}
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                header = server_timing_header(timings, time.perf_counter() - started)
+                message = dict(message)
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"server-timing", header.encode("latin-1"))
+                ]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            _request_timings.reset(token)
+            _request_endpoint.reset(endpoint_token)
+            route = scope.get("route")
+            HTTP_REQUEST_DURATION.observe(
+                time.perf_counter() - started,
+                method=scope.get("method", ""),
+                route=getattr(route, "path", "unmatched"),
+                status=status["code"],
+            )
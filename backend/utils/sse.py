@@ -0,0 +1,208 @@
+"""
+Server-Sent Events encoding.
+
+encode_event frames one event per the SSE spec: every line of the payload
+gets its own "data:" field, so tokens containing newlines can't break the
+framing. sse_stream turns an async iterator of text chunks into an event
+stream that coalesces chunks into frames (flushed after SSE_COALESCE_MS or
+once SSE_COALESCE_BYTES have built up; the first chunk is always sent
+immediately to keep time-to-first-token low), sends a comment heartbeat
+after SSE_HEARTBEAT_INTERVAL seconds without output, and ends with a
+"done" event (or an "error" event if the source fails). The framing step
+on its own, coalesce, is shared with the WebSocket chat endpoint, and
+close_on_disconnect stops a stream as soon as its client goes away.
+
+    event: message        id: 1..n, data: the text (may span several data: lines)
+    event: done           data: JSON from the on_done callback
+    event: error          data: {"detail": ...}
+"""
+import asyncio
+import json
+import logging
+import time
+from typing import AsyncGenerator, Callable, Dict, Optional, Tuple, Type
+
+from starlette.requests import Request
+
+from backend.config import settings
+from backend.utils.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+STREAM_DISCONNECTS = registry.counter(
+    "chat_stream_disconnects_total", "SSE streams closed because the client disconnected"
+)
+
+_END = object()
+
+
+def encode_event(data: str, event: Optional[str] = None, id: Optional[int] = None) -> str:
+    lines = []
+    if event:
+        lines.append(f"event: {event}")
+    if id is not None:
+        lines.append(f"id: {id}")
+    # Split on every line ending SSE recognises (\r\n, \r, \n)
+    for line in data.replace("\r\n", "\n").replace("\r", "\n").split("\n"):
+        lines.append(f"data: {line}")
+    return "\n".join(lines) + "\n\n"
+
+
+def encode_comment(text: str = "") -> str:
+    return f": {text}\n\n"
+
+
+async def coalesce(
+    chunks: AsyncGenerator[str, None],
+    coalesce_ms: float = settings.SSE_COALESCE_MS,
+    coalesce_bytes: int = settings.SSE_COALESCE_BYTES,
+    idle: Optional[float] = None,
+):
+    """
+    Re-chunk an async generator of text into larger frames. The first chunk
+    is yielded at once; after that, text is held for up to coalesce_ms or
+    until coalesce_bytes have built up. Yields None after `idle` seconds
+    without output (if set). An exception from the source is raised after
+    the buffered text has been yielded.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=256)
+
+    async def pump():
+        try:
+            async for chunk in chunks:
+                await queue.put(chunk)
+            await queue.put(_END)
+        except Exception as e:
+            await queue.put(e)
+        finally:
+            await chunks.aclose()
+
+    task = asyncio.create_task(pump())
+    buffer, size = [], 0
+    flush_at = None
+    sent_first = False
+    window = coalesce_ms / 1000
+
+    def flush() -> str:
+        nonlocal buffer, size, flush_at
+        text = "".join(buffer)
+        buffer, size, flush_at = [], 0, None
+        return text
+
+    try:
+        while True:
+            timeout = idle if flush_at is None else max(0.0, flush_at - time.monotonic())
+            try:
+                item = await asyncio.wait_for(queue.get(), timeout)
+            except asyncio.TimeoutError:
+                yield flush() if buffer else None
+                continue
+
+            if item is _END or isinstance(item, Exception):
+                if buffer:
+                    yield flush()
+                if item is _END:
+                    return
+                raise item
+
+            if not item:
+                continue
+            buffer.append(item)
+            size += len(item)
+            if not sent_first or size >= coalesce_bytes or window <= 0:
+                sent_first = True
+                yield flush()
+            elif flush_at is None:
+                flush_at = time.monotonic() + window
+    finally:
+        task.cancel()
+        await asyncio.wait({task})
+
+
+async def sse_stream(
+    chunks: AsyncGenerator[str, None],
+    on_done: Callable[[], Dict] = dict,
+    coalesce_ms: float = settings.SSE_COALESCE_MS,
+    coalesce_bytes: int = settings.SSE_COALESCE_BYTES,
+    heartbeat: float = settings.SSE_HEARTBEAT_INTERVAL,
+):
+    """Encode an async generator of text chunks as a coalesced SSE stream"""
+    event_id = 0
+    try:
+        async for text in coalesce(chunks, coalesce_ms, coalesce_bytes, idle=heartbeat):
+            if text is None:
+                yield encode_comment("keep-alive")
+                continue
+            event_id += 1
+            yield encode_event(text, event="message", id=event_id)
+    except Exception as e:
+        logger.error(f"Stream failed: {e}")
+        yield encode_event(json.dumps({"detail": "Failed to generate response"}), event="error", id=event_id + 1)
+        return
+    yield encode_event(json.dumps(on_done()), event="done", id=event_id + 1)
+
+
+async def _wait_for_disconnect(request: Request):
+    while (await request.receive())["type"] != "http.disconnect":
+        pass
+
+
+async def close_on_disconnect(request: Request, frames: AsyncGenerator[str, None]):
+    """
+    Pass frames through until the client goes away, then close the source
+    right away. Starlette does this itself only for servers on ASGI spec
+    < 2.4; from 2.4 on it relies on the next failed write, which for a
+    stream waiting on the model may be many tokens later.
+    """
+    disconnected = asyncio.ensure_future(_wait_for_disconnect(request))
+    next_frame = None
+    try:
+        while True:
+            next_frame = asyncio.ensure_future(frames.__anext__())
+            await asyncio.wait({next_frame, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+            if not next_frame.done():
+                STREAM_DISCONNECTS.inc()
+                return
+            try:
+                frame = next_frame.result()
+            except StopAsyncIteration:
+                return
+            yield frame
+    finally:
+        disconnected.cancel()
+        if next_frame is not None and not next_frame.done():
+            # The source must stop running before it can be closed
+            next_frame.cancel()
+            await asyncio.wait({next_frame})
+        await frames.aclose()
+
+
+async def prime(chunks: AsyncGenerator[str, None], raise_now: Tuple[Type[BaseException], ...] = ()):
+    """
+    Run a generator up to its first chunk before the response starts, so an
+    error of one of the `raise_now` types (e.g. admission control) can still
+    become an HTTP status. Other errors are re-raised from the returned
+    generator, where the stream turns them into an "error" event.
+    """
+    first, error = None, None
+    try:
+        first = await chunks.__anext__()
+    except StopAsyncIteration:
+        pass
+    except raise_now:
+        raise
+    except Exception as e:
+        error = e
+
+    async def primed():
+        try:
+            if error is not None:
+                raise error
+            if first is not None:
+                yield first
+                async for chunk in chunks:
+                    yield chunk
+        finally:
+            await chunks.aclose()
+
+    return primed()